@@ -1,17 +1,17 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import time
 import os
 from dotenv import load_dotenv
-import sentry_sdk
 import logging
+from typing import Dict, List, Tuple
 
 # استيراد الوحدات النمطية الخاصة بالمشروع
-from utils import setup_logging, prepare_arabic_text, load_css, format_currency
-from db_manager import get_db_manager
+from utils import setup_logging, prepare_arabic_text, format_currency
+from streamlit_adapter import get_db_manager, load_css
 from calculations import calculate_primary_yield, analyze_secondary_sale
-from cbe_scraper import fetch_data_from_cbe
+from cbe_scraper import fetch_data_from_cbe, get_shared_driver_pool
+from yield_curve import curve_for_session
 import constants as C
 
 # إعدادات أولية
@@ -19,8 +19,11 @@ setup_logging(level=logging.WARNING)
 load_dotenv()
 
 # --- تهيئة Sentry لمراقبة التطبيق ---
+# المكتبات الثقيلة (Sentry و Plotly و Selenium) لا تُحمّل إلا عند الحاجة إليها
 sentry_dsn = os.environ.get("SENTRY_DSN")
 if sentry_dsn:
+    import sentry_sdk
+
     sentry_sdk.init(
         dsn=sentry_dsn,
         traces_sample_rate=1.0,
@@ -69,167 +72,56 @@ def display_auction_results(title: str, info: str, df: pd.DataFrame):
                     st.markdown(card_html, unsafe_allow_html=True)
 
 
-def main():
-    st.set_page_config(
-        layout="wide",
-        page_title=prepare_arabic_text("حاسبة أذون الخزانة"),
-        page_icon="🏦",
-    )
-
-    st.markdown(
-        """
-        <head>
-            <link rel="preconnect" href="https://fonts.googleapis.com">
-            <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-            <link rel="stylesheet" href="https://fonts.googleapis.com/css2?family=Cairo:wght@400;700&display=swap">
-        </head>
-        """,
-        unsafe_allow_html=True,
-    )
-
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    css_file_path = os.path.join(current_dir, "css", "style.css")
-    load_css(css_file_path)
-
-    db_manager = get_db_manager()
-
-    if "primary_results" not in st.session_state:
-        st.session_state.primary_results = None
-    if "secondary_results" not in st.session_state:
-        st.session_state.secondary_results = None
-
-    if "df_data" not in st.session_state:
-        st.session_state.df_data, st.session_state.last_update = (
-            db_manager.load_latest_data()
+def tenor_yields_for(data_df: pd.DataFrame) -> Dict[int, float]:
+    # خريطة (الأجل -> العائد) تحسب مرة واحدة لكل تحميل للبيانات بدلاً من تصفية الجدول عند كل إدخال
+    if data_df.empty:
+        return {}
+    return {
+        int(tenor): float(yield_rate)
+        for tenor, yield_rate in zip(
+            data_df[C.TENOR_COLUMN_NAME], data_df[C.YIELD_COLUMN_NAME]
         )
-    if "historical_df" not in st.session_state:
-        st.session_state.historical_df = db_manager.load_all_historical_data()
-
-    data_df = st.session_state.df_data
-    last_update_text = st.session_state.last_update
-    historical_df = st.session_state.historical_df
-
-    st.markdown(
-        f"""
-    <div class="centered-header" style="background-color: #343a40; padding: 20px 10px; border-radius: 15px; margin-bottom: 1rem; box-shadow: 0 4px 12px 0 rgba(0,0,0,0.1);">
-        <h1 style="color: #ffffff; margin: 0; font-size: 2.5rem;">{prepare_arabic_text(C.APP_TITLE)}</h1>
-        <p style="color: #aab8c2; margin: 10px 0 0 0; font-size: 1.1rem;">{prepare_arabic_text(C.APP_HEADER)}</p>
-        <div style="margin-top: 15px; font-size: 0.9rem; color: #adb5bd;">
-            {prepare_arabic_text("صُمم وبُرمج بواسطة")}
-            <span style="font-weight: bold; color: #00bfff;">{C.AUTHOR_NAME}</span>
-        </div>
-    </div>
-    """,
-        unsafe_allow_html=True,
+    }
+
+
+def tenor_options_for(tenor_yields: Dict[int, float]) -> List[int]:
+    return sorted(tenor_yields) if tenor_yields else [91, 182, 273, 364]
+
+
+@st.cache_data(max_entries=C.CHART_CACHE_MAX_ENTRIES, show_spinner=False)
+def build_history_figure(
+    data_version: int, tenors: Tuple[int, ...], _historical_df: pd.DataFrame
+):
+    # لا يتم حساب بصمة الجدول نفسه (البادئة _)؛ إصدار البيانات الذي حُمّل عنده هو مفتاح الذاكرة
+    import plotly.express as px
+
+    chart_df = _historical_df[_historical_df[C.TENOR_COLUMN_NAME].isin(tenors)]
+    fig = px.line(
+        chart_df,
+        x=C.DATE_COLUMN_NAME,
+        y=C.YIELD_COLUMN_NAME,
+        color=C.TENOR_COLUMN_NAME,
+        markers=True,
+        labels={
+            C.DATE_COLUMN_NAME: "تاريخ التحديث",
+            C.YIELD_COLUMN_NAME: "نسبة العائد (%)",
+            C.TENOR_COLUMN_NAME: "الأجل (يوم)",
+        },
+        title=prepare_arabic_text("التغير في متوسط العائد المرجح لأذون الخزانة"),
     )
+    fig.update_layout(
+        legend_title_text=prepare_arabic_text("الأجل"),
+        title_x=0.5,
+        template="plotly_dark",
+        xaxis=dict(tickformat="%d-%m-%Y"),
+    )
+    return fig
 
-    top_col1, top_col2 = st.columns([2, 1], gap="large")
-
-    with top_col1:
-        with st.container(border=True):
-            st.subheader(prepare_arabic_text("📊 أحدث العوائد المعتمدة"), anchor=False)
-            st.divider()
-
-            if not data_df.empty and "البيانات الأولية" not in str(last_update_text):
-                try:
-                    sunday_df = data_df[data_df[C.TENOR_COLUMN_NAME].isin([91, 273])]
-                    thursday_df = data_df[data_df[C.TENOR_COLUMN_NAME].isin([182, 364])]
-
-                    display_auction_results(
-                        "عطاء الخميس",
-                        "آجال (6 أشهر و 12 شهر) - التنفيذ الفعلي يوم الثلاثاء التالي.",
-                        thursday_df,
-                    )
-
-                    st.divider()
-
-                    display_auction_results(
-                        "عطاء الأحد",
-                        "آجال (3 أشهر و 9 أشهر) - التنفيذ الفعلي يوم الثلاثاء التالي.",
-                        sunday_df,
-                    )
-
-                    st.divider()
-
-                except Exception as e:
-                    logging.exception("Error displaying auction results.")
-                    if sentry_dsn:
-                        sentry_sdk.capture_exception(e)
-                    st.error(f"حدث خطأ أثناء معالجة البيانات: {e}")
-            else:
-                st.info(
-                    prepare_arabic_text("في انتظار ورود البيانات من البنك المركزي...")
-                )
-
-    with top_col2:
-        with st.container(border=True):
-            st.subheader(prepare_arabic_text("📡 حالة البيانات"), anchor=False)
-
-            date_str, time_str = (
-                last_update_text
-                if isinstance(last_update_text, tuple)
-                else (last_update_text, None)
-            )
-
-            st.markdown(
-                f"""
-            <div style="text-align: center; padding: 10px; border: 1px solid #495057; border-radius: 10px; background-color: #212529; margin-bottom: 1rem;">
-                <p style="font-size: 0.9rem; margin-bottom: 5px; color: #adb5bd;">آخر تحديث للبيانات</p>
-                <p style="font-size: 1.4rem; font-weight: bold; color: #ffffff; margin: 0;">{prepare_arabic_text(str(date_str))}</p>
-                {f'<p style="font-size: 1.1rem; color: #adb5bd; margin: 0;">{prepare_arabic_text(str(time_str))}</p>' if time_str else ''}
-            </div>
-            """,
-                unsafe_allow_html=True,
-            )
-
-            if st.button(
-                " تحديث البيانات الآن 🔄",
-                type="primary",
-                use_container_width=True,
-                help="قد تستغرق هذه العملية دقيقة أو اثنتين.",
-            ):
-                progress_bar = st.progress(0, text="...بدء عملية التحديث")
-                status_text = st.empty()
-
-                def update_progress(status: str):
-                    progress_map = {
-                        "إعداد المتصفح": 10,
-                        "الاتصال بموقع البنك": 30,
-                        "تحليل المحتوى": 60,
-                        "العثور على بيانات جديدة": 80,
-                        "اكتمل": 100,
-                        "محدثة بالفعل": 100,
-                    }
-                    progress_value = 0
-                    progress_key = status
-                    for key, value in progress_map.items():
-                        if key in status:
-                            progress_value = value
-                            break
-                    status_text.info(f"الحالة: {progress_key}")
-                    progress_bar.progress(progress_value, text=progress_key)
-
-                try:
-                    fetch_data_from_cbe(db_manager, status_callback=update_progress)
-                    progress_bar.progress(100, text="اكتمل التحديث!")
-                    st.success("تم تحديث البيانات بنجاح!")
-                    time.sleep(2)
-                    st.rerun()
-                except Exception as e:
-                    progress_bar.empty()
-                    status_text.empty()
-                    logging.exception("Data fetch from CBE failed during button click.")
-                    if sentry_dsn:
-                        sentry_sdk.capture_exception(e)
-                    st.error(f"فشل التحديث: {e}")
-
-            st.link_button(
-                "🔗 فتح موقع البنك المركزي", C.CBE_DATA_URL, use_container_width=True
-            )
-
-    st.divider()
-    st.header(prepare_arabic_text(C.PRIMARY_CALCULATOR_TITLE))
 
+# كل لوحة من اللوحات التالية جزء مستقل (fragment): التفاعل مع عناصرها يعيد تشغيل
+# اللوحة وحدها دون إعادة رسم بقية الصفحة أو إعادة بناء الرسم البياني
+@st.fragment
+def primary_calculator(tenor_yields: Dict[int, float]):
     col_form_main, col_results_main = st.columns(2, gap="large")
 
     with col_form_main:
@@ -244,22 +136,9 @@ def main():
                 help="أدخل القيمة التي ستحصل عليها في نهاية المدة، وعادة ما تكون من مضاعفات 25,000 جنيه.",
             )
 
-            options = (
-                sorted(data_df[C.TENOR_COLUMN_NAME].unique())
-                if not data_df.empty
-                else [91, 182, 273, 364]
-            )
-
-            def get_yield_for_tenor(tenor):
-                if not data_df.empty:
-                    yield_row = data_df[data_df[C.TENOR_COLUMN_NAME] == tenor]
-                    if not yield_row.empty:
-                        return yield_row[C.YIELD_COLUMN_NAME].iloc[0]
-                return None
-
             formatted_options = []
-            for tenor in options:
-                yield_val = get_yield_for_tenor(tenor)
+            for tenor in tenor_options_for(tenor_yields):
+                yield_val = tenor_yields.get(tenor)
                 if yield_val is not None:
                     formatted_options.append(
                         f"{tenor} {prepare_arabic_text('يوم')} - ({yield_val:.3f}%)"
@@ -292,8 +171,8 @@ def main():
                 type="primary",
             ):
                 if selected_tenor_main is not None:
-                    yield_rate = get_yield_for_tenor(selected_tenor_main)
-                    if yield_rate is not None and not data_df.empty:
+                    yield_rate = tenor_yields.get(selected_tenor_main)
+                    if yield_rate is not None:
                         results_dict = calculate_primary_yield(
                             investment_amount_main,
                             yield_rate,
@@ -379,9 +258,9 @@ def main():
                     icon="💡",
                 )
 
-    st.divider()
-    st.header(prepare_arabic_text(C.SECONDARY_CALCULATOR_TITLE))
 
+@st.fragment
+def secondary_calculator(data_df: pd.DataFrame, tenor_options: List[int]):
     col_secondary_form, col_secondary_results = st.columns(2, gap="large")
 
     with col_secondary_form:
@@ -408,7 +287,7 @@ def main():
             )
             original_tenor_secondary = st.selectbox(
                 prepare_arabic_text("أجل الإذن الأصلي (بالأيام)"),
-                options,
+                tenor_options,
                 key="secondary_tenor",
                 help="مدة الإذن الأصلية.",
             )
@@ -435,13 +314,22 @@ def main():
                 step=1,
                 help="عدد الأيام التي احتفظت بها بالإذن قبل أن تقرر بيعه.",
             )
+            # القيمة المقترحة مستوفاة من منحنى آخر عطاءات للأيام المتبقية
+            suggested_market_yield = 30.0
+            if not data_df.empty:
+                remaining_days = int(original_tenor_secondary) - int(
+                    early_sale_days_secondary
+                )
+                suggested_market_yield = round(
+                    curve_for_session(data_df).yields_for(remaining_days), 3
+                )
             secondary_market_yield = st.number_input(
                 prepare_arabic_text("العائد السائد في السوق للمشتري (%)"),
                 min_value=1.0,
-                value=30.0,
+                value=suggested_market_yield,
                 step=0.1,
                 format="%.3f",
-                help="العائد الحالي في السوق الذي سيحصل عليه المشتري الجديد.",
+                help="العائد الحالي في السوق الذي سيحصل عليه المشتري الجديد. القيمة المقترحة محسوبة من منحنى آخر عطاءات للمدة المتبقية ويمكنك تعديلها.",
             )
 
             if st.button(
@@ -518,9 +406,9 @@ def main():
             with st.container(border=True):
                 st.info("📊 ستظهر نتائج تحليل البيع هنا.", icon="💡")
 
-    st.divider()
-    st.header(prepare_arabic_text("📈 تطور العائد تاريخيًا"))
 
+@st.fragment
+def history_chart(historical_df: pd.DataFrame, data_version: int):
     if not historical_df.empty:
         available_tenors = sorted(historical_df[C.TENOR_COLUMN_NAME].unique())
         selected_tenors = st.multiselect(
@@ -530,29 +418,10 @@ def main():
             label_visibility="collapsed",
         )
         if selected_tenors:
-            chart_df = historical_df[
-                historical_df[C.TENOR_COLUMN_NAME].isin(selected_tenors)
-            ]
-            fig = px.line(
-                chart_df,
-                x=C.DATE_COLUMN_NAME,
-                y=C.YIELD_COLUMN_NAME,
-                color=C.TENOR_COLUMN_NAME,
-                markers=True,
-                labels={
-                    C.DATE_COLUMN_NAME: "تاريخ التحديث",
-                    C.YIELD_COLUMN_NAME: "نسبة العائد (%)",
-                    C.TENOR_COLUMN_NAME: "الأجل (يوم)",
-                },
-                title=prepare_arabic_text(
-                    "التغير في متوسط العائد المرجح لأذون الخزانة"
-                ),
-            )
-            fig.update_layout(
-                legend_title_text=prepare_arabic_text("الأجل"),
-                title_x=0.5,
-                template="plotly_dark",
-                xaxis=dict(tickformat="%d-%m-%Y"),
+            fig = build_history_figure(
+                data_version,
+                tuple(int(tenor) for tenor in selected_tenors),
+                historical_df,
             )
             st.plotly_chart(fig, use_container_width=True)
         else:
@@ -568,6 +437,181 @@ def main():
             )
         )
 
+
+def main():
+    st.set_page_config(
+        layout="wide",
+        page_title=prepare_arabic_text("حاسبة أذون الخزانة"),
+        page_icon="🏦",
+    )
+
+    st.markdown(
+        """
+        <head>
+            <link rel="preconnect" href="https://fonts.googleapis.com">
+            <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+            <link rel="stylesheet" href="https://fonts.googleapis.com/css2?family=Cairo:wght@400;700&display=swap">
+        </head>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    css_file_path = os.path.join(current_dir, "css", "style.css")
+    load_css(css_file_path)
+
+    db_manager = get_db_manager()
+
+    if "primary_results" not in st.session_state:
+        st.session_state.primary_results = None
+    if "secondary_results" not in st.session_state:
+        st.session_state.secondary_results = None
+
+    # القراءة من ذاكرة مدير قاعدة البيانات المشتركة بين الجلسات؛ تظهر البيانات
+    # الجديدة فور حفظها دون الحاجة لفتح جلسة جديدة
+    # يُقرأ الإصدار أولاً حتى لا يُحفظ رسم بيانات أقدم تحت مفتاح إصدار أحدث
+    data_version = db_manager.current_version()
+    data_df, last_update_text = db_manager.load_latest_data()
+    historical_df = db_manager.load_all_historical_data()
+    tenor_yields = tenor_yields_for(data_df)
+
+    st.markdown(
+        f"""
+    <div class="centered-header" style="background-color: #343a40; padding: 20px 10px; border-radius: 15px; margin-bottom: 1rem; box-shadow: 0 4px 12px 0 rgba(0,0,0,0.1);">
+        <h1 style="color: #ffffff; margin: 0; font-size: 2.5rem;">{prepare_arabic_text(C.APP_TITLE)}</h1>
+        <p style="color: #aab8c2; margin: 10px 0 0 0; font-size: 1.1rem;">{prepare_arabic_text(C.APP_HEADER)}</p>
+        <div style="margin-top: 15px; font-size: 0.9rem; color: #adb5bd;">
+            {prepare_arabic_text("صُمم وبُرمج بواسطة")}
+            <span style="font-weight: bold; color: #00bfff;">{C.AUTHOR_NAME}</span>
+        </div>
+    </div>
+    """,
+        unsafe_allow_html=True,
+    )
+
+    top_col1, top_col2 = st.columns([2, 1], gap="large")
+
+    with top_col1:
+        with st.container(border=True):
+            st.subheader(prepare_arabic_text("📊 أحدث العوائد المعتمدة"), anchor=False)
+            st.divider()
+
+            if not data_df.empty and "البيانات الأولية" not in str(last_update_text):
+                try:
+                    sunday_df = data_df[data_df[C.TENOR_COLUMN_NAME].isin([91, 273])]
+                    thursday_df = data_df[data_df[C.TENOR_COLUMN_NAME].isin([182, 364])]
+
+                    display_auction_results(
+                        "عطاء الخميس",
+                        "آجال (6 أشهر و 12 شهر) - التنفيذ الفعلي يوم الثلاثاء التالي.",
+                        thursday_df,
+                    )
+
+                    st.divider()
+
+                    display_auction_results(
+                        "عطاء الأحد",
+                        "آجال (3 أشهر و 9 أشهر) - التنفيذ الفعلي يوم الثلاثاء التالي.",
+                        sunday_df,
+                    )
+
+                    st.divider()
+
+                except Exception as e:
+                    logging.exception("Error displaying auction results.")
+                    if sentry_dsn:
+                        sentry_sdk.capture_exception(e)
+                    st.error(f"حدث خطأ أثناء معالجة البيانات: {e}")
+            else:
+                st.info(
+                    prepare_arabic_text("في انتظار ورود البيانات من البنك المركزي...")
+                )
+
+    with top_col2:
+        with st.container(border=True):
+            st.subheader(prepare_arabic_text("📡 حالة البيانات"), anchor=False)
+
+            date_str, time_str = (
+                last_update_text
+                if isinstance(last_update_text, tuple)
+                else (last_update_text, None)
+            )
+
+            st.markdown(
+                f"""
+            <div style="text-align: center; padding: 10px; border: 1px solid #495057; border-radius: 10px; background-color: #212529; margin-bottom: 1rem;">
+                <p style="font-size: 0.9rem; margin-bottom: 5px; color: #adb5bd;">آخر تحديث للبيانات</p>
+                <p style="font-size: 1.4rem; font-weight: bold; color: #ffffff; margin: 0;">{prepare_arabic_text(str(date_str))}</p>
+                {f'<p style="font-size: 1.1rem; color: #adb5bd; margin: 0;">{prepare_arabic_text(str(time_str))}</p>' if time_str else ''}
+            </div>
+            """,
+                unsafe_allow_html=True,
+            )
+
+            if st.button(
+                " تحديث البيانات الآن 🔄",
+                type="primary",
+                use_container_width=True,
+                help="قد تستغرق هذه العملية دقيقة أو اثنتين.",
+            ):
+                progress_bar = st.progress(0, text="...بدء عملية التحديث")
+                status_text = st.empty()
+
+                def update_progress(status: str):
+                    progress_map = {
+                        "إعداد المتصفح": 10,
+                        "الاتصال بموقع البنك": 30,
+                        "تحليل المحتوى": 60,
+                        "العثور على بيانات جديدة": 80,
+                        "اكتمل": 100,
+                        "محدثة بالفعل": 100,
+                    }
+                    progress_value = 0
+                    progress_key = status
+                    for key, value in progress_map.items():
+                        if key in status:
+                            progress_value = value
+                            break
+                    status_text.info(f"الحالة: {progress_key}")
+                    progress_bar.progress(progress_value, text=progress_key)
+
+                try:
+                    fetch_data_from_cbe(
+                        db_manager,
+                        status_callback=update_progress,
+                        driver_pool=get_shared_driver_pool(),
+                    )
+                    progress_bar.progress(100, text="اكتمل التحديث!")
+                    st.success("تم تحديث البيانات بنجاح!")
+                    time.sleep(2)
+                    st.rerun()
+                except Exception as e:
+                    progress_bar.empty()
+                    status_text.empty()
+                    logging.exception("Data fetch from CBE failed during button click.")
+                    if sentry_dsn:
+                        sentry_sdk.capture_exception(e)
+                    st.error(f"فشل التحديث: {e}")
+
+            st.link_button(
+                "🔗 فتح موقع البنك المركزي", C.CBE_DATA_URL, use_container_width=True
+            )
+
+    st.divider()
+    st.header(prepare_arabic_text(C.PRIMARY_CALCULATOR_TITLE))
+
+    primary_calculator(tenor_yields)
+
+    st.divider()
+    st.header(prepare_arabic_text(C.SECONDARY_CALCULATOR_TITLE))
+
+    secondary_calculator(data_df, tenor_options_for(tenor_yields))
+
+    st.divider()
+    st.header(prepare_arabic_text("📈 تطور العائد تاريخيًا"))
+
+    history_chart(historical_df, data_version)
+
     st.divider()
     with st.expander(prepare_arabic_text(C.HELP_TITLE)):
         st.markdown(
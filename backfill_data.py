@@ -0,0 +1,277 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+# إضافة المسار الحالي للسماح بالاستيراد المحلي
+sys.path.append(os.getcwd())
+
+import constants as C  # noqa: E402
+from cbe_scraper import fetch_page_via_http, parse_cbe_html  # noqa: E402
+from db_manager import DatabaseManager, get_db_manager  # noqa: E402
+from utils import setup_logging  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+WEEKDAY_NAMES = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+
+
+class RateLimiter:
+    """Spaces out requests from all worker threads to at most `rate` per second."""
+
+    def __init__(self, rate: float):
+        self._interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class BackfillCheckpoint:
+    """
+    Records which archive dates are already stored, so an interrupted
+    backfill resumes where it stopped instead of starting over.
+    """
+
+    def __init__(self, path: str = C.BACKFILL_CHECKPOINT_FILENAME):
+        self.path = os.path.abspath(path)
+        self._completed = set(self._load().get("completed", []))
+
+    def _load(self) -> Dict[str, List[str]]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint at {self.path}: {e}")
+            return {}
+
+    def is_done(self, day: date) -> bool:
+        return day.isoformat() in self._completed
+
+    def mark_done(self, days: Iterable[date]) -> None:
+        self._completed.update(day.isoformat() for day in days)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"completed": sorted(self._completed)}, f, indent=2)
+        os.replace(temp_path, self.path)
+
+
+def archive_dates(start: date, end: date, weekdays: Iterable[int]) -> List[date]:
+    """Lists the auction days (by weekday) between `start` and `end` inclusive."""
+    weekdays = set(weekdays)
+    days = (start + timedelta(days=i) for i in range((end - start).days + 1))
+    return [day for day in days if day.weekday() in weekdays]
+
+
+def fetch_archive_day(
+    day: date, url_template: str, rate_limiter: RateLimiter
+) -> Tuple[bool, Optional[pd.DataFrame]]:
+    """
+    Downloads and parses the archive page of one day.
+
+    Returns:
+        (fetched, df): `fetched` is False if the page could not be
+        downloaded (it will be retried on the next run); `df` is None when
+        the page holds no auction results.
+    """
+    rate_limiter.wait()
+    page_source = fetch_page_via_http(url_template.format(date=day))
+    if page_source is None:
+        return False, None
+    df = parse_cbe_html(page_source, backend="lxml")
+    if df is None or df.empty:
+        return True, None
+    # نستخدم تاريخ الجلسة كتاريخ للسحب حتى تظهر البيانات القديمة في موضعها
+    # الصحيح على الرسم البياني ولا تُعتبر أحدث من البيانات الحالية
+    df = df.dropna(subset=["session_date_dt"])
+    df[C.DATE_COLUMN_NAME] = df["session_date_dt"].dt.tz_localize("UTC")
+    return True, df
+
+
+def run_backfill(
+    db_manager: DatabaseManager,
+    start: date,
+    end: date,
+    url_template: str = C.CBE_ARCHIVE_URL_TEMPLATE,
+    weekdays: Iterable[int] = (WEEKDAY_NAMES["sun"], WEEKDAY_NAMES["thu"]),
+    workers: int = C.BACKFILL_WORKERS,
+    requests_per_second: float = C.BACKFILL_REQUESTS_PER_SECOND,
+    checkpoint: Optional[BackfillCheckpoint] = None,
+    batch_size: int = 500,
+) -> Dict[str, int]:
+    """
+    Crawls the CBE auction archive for every auction day in the range with a
+    bounded thread pool, and stores the results in batches. A day is only
+    checkpointed once its rows are confirmed saved; days in a batch that
+    fails to save are counted as failed and retried on the next run.
+
+    On an interrupt (Ctrl-C) the queued days are cancelled rather than
+    fetched, the days that already completed are saved, and the interrupt
+    is re-raised.
+
+    Returns:
+        Counts of `days`, `skipped` (already checkpointed), `failed` and
+        `rows` saved.
+    """
+    checkpoint = checkpoint or BackfillCheckpoint()
+    all_days = archive_dates(start, end, weekdays)
+    pending_days = [day for day in all_days if not checkpoint.is_done(day)]
+    summary = {
+        "days": len(all_days),
+        "skipped": len(all_days) - len(pending_days),
+        "failed": 0,
+        "rows": 0,
+    }
+    logger.info(
+        f"Backfilling {len(pending_days)} auction days "
+        f"({summary['skipped']} already done) with {workers} workers."
+    )
+
+    rate_limiter = RateLimiter(requests_per_second)
+    batch_frames: List[pd.DataFrame] = []
+    batch_days: List[date] = []
+
+    def flush() -> None:
+        saved = True
+        if batch_frames:
+            batch_df = pd.concat(batch_frames, ignore_index=True)
+            counts = db_manager.save_data(batch_df)
+            saved = counts["inserted"] + counts["updated"] >= len(batch_df)
+            if saved:
+                summary["rows"] += len(batch_df)
+            else:
+                logger.error(
+                    f"Could not save {len(batch_days)} backfilled days; "
+                    "they will be retried on the next run."
+                )
+                summary["failed"] += len(batch_days)
+        if saved:
+            checkpoint.mark_done(batch_days)
+        batch_frames.clear()
+        batch_days.clear()
+
+    futures: Dict[Future, date] = {}
+    recorded = set()
+
+    def record(future: Future) -> None:
+        recorded.add(future)
+        day = futures[future]
+        try:
+            fetched, df = future.result()
+        except Exception as e:
+            logger.error(f"Backfill of {day} failed: {e}", exc_info=True)
+            fetched, df = False, None
+        if not fetched:
+            summary["failed"] += 1
+            return
+        batch_days.append(day)
+        if df is not None:
+            batch_frames.append(df)
+        if sum(len(frame) for frame in batch_frames) >= batch_size:
+            flush()
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        for day in pending_days:
+            future = executor.submit(fetch_archive_day, day, url_template, rate_limiter)
+            futures[future] = day
+        for future in as_completed(futures):
+            record(future)
+    except BaseException:
+        # بدون الإلغاء ينتظر الخروج جلب كل الأيام المتبقية بمعدل الطلبات المحدد
+        logger.warning("Backfill interrupted; cancelling the queued days.")
+        executor.shutdown(wait=True, cancel_futures=True)
+        for future in futures:
+            if future.done() and not future.cancelled() and future not in recorded:
+                record(future)
+        raise
+    finally:
+        executor.shutdown(wait=True)
+        flush()
+
+    logger.info(f"Backfill finished: {summary}")
+    return summary
+
+
+def _parse_date(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="ملء قاعدة البيانات بنتائج العطاءات التاريخية من أرشيف البنك المركزي."
+    )
+    parser.add_argument("--start", type=_parse_date, required=True, help="YYYY-MM-DD")
+    parser.add_argument(
+        "--end", type=_parse_date, default=date.today(), help="YYYY-MM-DD"
+    )
+    parser.add_argument("--workers", type=int, default=C.BACKFILL_WORKERS)
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=C.BACKFILL_REQUESTS_PER_SECOND,
+        help="الحد الأقصى لعدد الطلبات في الثانية.",
+    )
+    parser.add_argument("--checkpoint", default=C.BACKFILL_CHECKPOINT_FILENAME)
+    parser.add_argument(
+        "--url-template",
+        default=C.CBE_ARCHIVE_URL_TEMPLATE,
+        help="رابط صفحة الأرشيف مع {date} مكان التاريخ.",
+    )
+    parser.add_argument(
+        "--weekdays",
+        default="sun,thu",
+        help="أيام العطاءات مفصولة بفواصل (مثل sun,thu).",
+    )
+    args = parser.parse_args(argv)
+
+    sentry_dsn = os.environ.get("SENTRY_DSN")
+    if sentry_dsn:
+        import sentry_sdk
+
+        sentry_sdk.init(dsn=sentry_dsn, environment="production-backfill")
+
+    setup_logging(level=logging.INFO)
+    db_manager = get_db_manager()
+    try:
+        summary = run_backfill(
+            db_manager,
+            args.start,
+            args.end,
+            url_template=args.url_template,
+            weekdays=[WEEKDAY_NAMES[name.strip()] for name in args.weekdays.split(",")],
+            workers=args.workers,
+            requests_per_second=args.rate,
+            checkpoint=BackfillCheckpoint(args.checkpoint),
+        )
+    except Exception as e:
+        logger.critical(f"Backfill failed unexpectedly: {e}", exc_info=True)
+        if sentry_dsn:
+            sentry_sdk.capture_exception(e)
+        sys.exit(1)
+    finally:
+        db_manager.close()
+    if summary["failed"]:
+        logger.warning(
+            f"{summary['failed']} days could not be fetched; rerun to retry them."
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+import argparse
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# إضافة المسار الحالي للسماح بالاستيراد المحلي
+sys.path.append(os.getcwd())
+
+import constants as C  # noqa: E402
+from calculations import calculate_primary_yield_batch  # noqa: E402
+from db_manager import get_db_manager  # noqa: E402
+from utils import setup_logging  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+STRATEGY_KINDS = ("roll", "ladder", "switch")
+
+
+class Strategy(NamedTuple):
+    """
+    A buy-and-roll strategy variant.
+
+    kind:
+        "roll"   - always reinvest in `tenors[0]`.
+        "ladder" - split the capital equally across `tenors`, each sleeve
+                   rolling its own tenor.
+        "switch" - buy `tenors[1]` when its yield exceeds that of
+                   `tenors[0]` by more than `threshold` percentage points
+                   (and it matures within the horizon), otherwise `tenors[0]`.
+    """
+
+    kind: str
+    tenors: Tuple[int, ...]
+    threshold: float = 0.0
+    horizon_days: int = C.BACKTEST_HORIZON_DAYS
+    tax_rate: float = C.DEFAULT_TAX_RATE_PERCENT
+
+
+class CurveHistory:
+    """
+    The auction curve as known on every session date: one row per session
+    and one column per tenor, with each tenor's last auction yield carried
+    forward to the sessions where it was not auctioned.
+    """
+
+    def __init__(self, session_dates: Iterable, tenors: Iterable, yields: np.ndarray):
+        self.session_dates = np.asarray(session_dates, dtype="datetime64[D]")
+        self.tenors = np.asarray(tenors, dtype=np.int64)
+        self.yields = np.asarray(yields, dtype=np.float64)
+        self._days = self.session_dates.astype(np.int64)
+
+    @classmethod
+    def from_historical_frame(cls, df: pd.DataFrame) -> "CurveHistory":
+        """Builds the history from `DatabaseManager.load_all_historical_data` rows."""
+        session_dates = pd.to_datetime(
+            df[C.SESSION_DATE_COLUMN_NAME].astype(str).str.replace("-", "/"),
+            format="%d/%m/%Y",
+            errors="coerce",
+        )
+        rows = df.assign(_session=session_dates).dropna(subset=["_session"])
+        if rows.empty:
+            raise ValueError("No auction rows with a valid session date to backtest.")
+        # عند تكرار الجلسة يُعتمد آخر سحب لها
+        curve = (
+            rows.sort_values(by=C.DATE_COLUMN_NAME)
+            .pivot_table(
+                index="_session",
+                columns=C.TENOR_COLUMN_NAME,
+                values=C.YIELD_COLUMN_NAME,
+                aggfunc="last",
+            )
+            .sort_index()
+            .ffill()
+        )
+        return cls(curve.index.to_numpy(), curve.columns.to_numpy(), curve.to_numpy())
+
+    def tenor_index(self, tenor: int) -> int:
+        matches = np.flatnonzero(self.tenors == tenor)
+        if matches.size == 0:
+            raise ValueError(f"Tenor {tenor} does not appear in the history.")
+        return int(matches[0])
+
+    def rows_as_of(self, days: np.ndarray) -> np.ndarray:
+        """The curve rows in force on each day (days since the epoch)."""
+        rows = np.searchsorted(self._days, days, side="right") - 1
+        return self.yields[np.maximum(rows, 0)]
+
+    def start_days(self, horizon_days: int, tenors: Iterable[int]) -> np.ndarray:
+        """Sessions where every tenor has a yield and the horizon fits in the history."""
+        columns = [self.tenor_index(tenor) for tenor in tenors]
+        known = ~np.isnan(self.yields[:, columns]).any(axis=1)
+        fits = self._days + horizon_days <= self._days[-1]
+        return self._days[known & fits]
+
+
+Chooser = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+
+def _roll_paths(
+    history: CurveHistory,
+    start_days: np.ndarray,
+    horizon_days: int,
+    tax_rate: float,
+    choose: Chooser,
+) -> np.ndarray:
+    """
+    Rolls one unit of capital from every start day at once. Each step looks
+    up the curve in force for all paths, lets `choose` pick a tenor column
+    per path, and reinvests the net payout at maturity. Paths whose next
+    bill would mature after the horizon stop and hold cash.
+
+    Returns:
+        The final wealth of each path.
+    """
+    wealth = np.ones(start_days.size)
+    days = start_days.copy()
+    end_days = start_days + horizon_days
+    paths = np.arange(start_days.size)
+    while True:
+        rows = history.rows_as_of(days)
+        columns = choose(rows, end_days - days)
+        tenors = history.tenors[columns]
+        active = days + tenors <= end_days
+        if not active.any():
+            return wealth
+        results = calculate_primary_yield_batch(
+            1.0, rows[paths[active], columns[active]], tenors[active], tax_rate
+        )
+        wealth[active] *= 1 + results["real_profit_percentage"].to_numpy() / 100
+        days[active] += tenors[active]
+
+
+def _fixed_tenor(column: int) -> Chooser:
+    return lambda rows, remaining: np.full(len(rows), column)
+
+
+def _spread_switch(base: int, alt: int, alt_tenor: int, threshold: float) -> Chooser:
+    def choose(rows: np.ndarray, remaining: np.ndarray) -> np.ndarray:
+        switch = (rows[:, alt] - rows[:, base] > threshold) & (alt_tenor <= remaining)
+        return np.where(switch, alt, base)
+
+    return choose
+
+
+def simulate(history: CurveHistory, strategy: Strategy) -> pd.DataFrame:
+    """
+    Replays one strategy from every eligible session date.
+
+    Returns:
+        A DataFrame indexed by start date with `final_wealth` (per unit
+        invested) and `annualized_return` (%) over the horizon.
+    """
+    if strategy.kind not in STRATEGY_KINDS:
+        raise ValueError(f"Unknown strategy kind '{strategy.kind}'.")
+    if strategy.kind == "switch" and len(strategy.tenors) != 2:
+        raise ValueError("A switch strategy needs exactly two tenors (base, alt).")
+    if not strategy.tenors:
+        raise ValueError("A strategy needs at least one tenor.")
+
+    columns = [history.tenor_index(tenor) for tenor in strategy.tenors]
+    start_days = history.start_days(strategy.horizon_days, strategy.tenors)
+
+    def run(choose: Chooser) -> np.ndarray:
+        return _roll_paths(
+            history, start_days, strategy.horizon_days, strategy.tax_rate, choose
+        )
+
+    if strategy.kind == "roll":
+        wealth = run(_fixed_tenor(columns[0]))
+    elif strategy.kind == "ladder":
+        wealth = np.mean([run(_fixed_tenor(column)) for column in columns], axis=0)
+    else:
+        wealth = run(
+            _spread_switch(
+                columns[0], columns[1], strategy.tenors[1], strategy.threshold
+            )
+        )
+
+    annualized = (wealth ** (C.DAYS_IN_YEAR / strategy.horizon_days) - 1) * 100
+    return pd.DataFrame(
+        {"final_wealth": wealth, "annualized_return": annualized},
+        index=pd.Index(start_days.astype("datetime64[D]"), name="start_date"),
+    )
+
+
+def summarize(history: CurveHistory, strategy: Strategy) -> Dict:
+    """Runs `simulate` and reduces it to one row of statistics."""
+    returns = simulate(history, strategy)["annualized_return"]
+    return {
+        **strategy._asdict(),
+        "starts": int(returns.size),
+        "mean_return": returns.mean(),
+        "median_return": returns.median(),
+        "worst_return": returns.min(),
+        "best_return": returns.max(),
+    }
+
+
+_worker_history: Optional[CurveHistory] = None
+
+
+def _init_worker(history: CurveHistory) -> None:
+    # يُرسل التاريخ مرة واحدة لكل عملية بدلاً من إرساله مع كل مهمة
+    global _worker_history
+    _worker_history = history
+
+
+def _summarize_all(history: CurveHistory, strategies: List[Strategy]) -> List[Dict]:
+    return [summarize(history, strategy) for strategy in strategies]
+
+
+def _summarize_chunk(strategies: List[Strategy]) -> List[Dict]:
+    return _summarize_all(_worker_history, strategies)
+
+
+def run_sweep(
+    history: CurveHistory,
+    strategies: Iterable[Strategy],
+    workers: Optional[int] = None,
+    chunk_size: int = C.BACKTEST_CHUNK_SIZE,
+) -> pd.DataFrame:
+    """
+    Evaluates many strategy variants, spread over a process pool in chunks.
+    With `workers=1` everything runs in the current process.
+
+    Returns:
+        One row of `summarize` statistics per strategy, in input order.
+    """
+    strategies = list(strategies)
+    chunks = [
+        strategies[i : i + chunk_size] for i in range(0, len(strategies), chunk_size)
+    ]
+    if workers == 1 or len(chunks) <= 1:
+        rows = _summarize_all(history, strategies)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(history,)
+        ) as executor:
+            rows = [
+                row
+                for result in executor.map(_summarize_chunk, chunks)
+                for row in result
+            ]
+    logger.info(f"Backtested {len(strategies)} strategy variants.")
+    return pd.DataFrame(rows)
+
+
+def default_grid(
+    history: CurveHistory,
+    thresholds: Iterable[float] = np.round(np.arange(-2.0, 2.01, 0.05), 2),
+    horizon_days: int = C.BACKTEST_HORIZON_DAYS,
+    tax_rate: float = C.DEFAULT_TAX_RATE_PERCENT,
+) -> List[Strategy]:
+    """
+    Rolling each tenor, the full ladder, and every (base, alt) spread switch
+    over `thresholds`.
+    """
+    tenors = [int(tenor) for tenor in history.tenors]
+    grid = [Strategy("roll", (tenor,), 0.0, horizon_days, tax_rate) for tenor in tenors]
+    grid.append(Strategy("ladder", tuple(tenors), 0.0, horizon_days, tax_rate))
+    for base in tenors:
+        for alt in tenors:
+            if alt == base:
+                continue
+            grid += [
+                Strategy(
+                    "switch", (base, alt), float(threshold), horizon_days, tax_rate
+                )
+                for threshold in thresholds
+            ]
+    return grid
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="اختبار استراتيجيات إعادة استثمار الأذون على البيانات التاريخية."
+    )
+    parser.add_argument("--horizon", type=int, default=C.BACKTEST_HORIZON_DAYS)
+    parser.add_argument("--tax", type=float, default=C.DEFAULT_TAX_RATE_PERCENT)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    setup_logging(level=logging.INFO)
+    history = CurveHistory.from_historical_frame(
+        get_db_manager().load_all_historical_data()
+    )
+    grid = default_grid(history, horizon_days=args.horizon, tax_rate=args.tax)
+    results = run_sweep(history, grid, workers=args.workers)
+    print(
+        results.sort_values(by="mean_return", ascending=False)
+        .head(args.top)
+        .to_string(index=False)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+import argparse
+import logging
+import os
+import sys
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+# إضافة المسار الحالي للسماح بالاستيراد المحلي
+sys.path.append(os.getcwd())
+
+import constants as C  # noqa: E402
+from db_manager import get_db_manager  # noqa: E402
+from utils import setup_logging  # noqa: E402
+from yield_curve import YieldCurve, latest_curve  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+PRICING_MODES = {
+    "primary": (C.FACE_VALUE_COLUMN_NAME, C.TENOR_COLUMN_NAME),
+    "secondary": (
+        C.FACE_VALUE_COLUMN_NAME,
+        C.PURCHASE_YIELD_COLUMN_NAME,
+        C.TENOR_COLUMN_NAME,
+        C.HOLDING_DAYS_COLUMN_NAME,
+    ),
+}
+
+
+def _file_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".parquet", ".pq"):
+        return "parquet"
+    raise ValueError(f"Unsupported file type '{extension}'; use .csv or .parquet.")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet files need the optional 'pyarrow' package.") from e
+    return pyarrow
+
+
+def iter_chunks(
+    path: str, chunk_size: int = C.BATCH_PRICER_CHUNK_SIZE
+) -> Iterator[pd.DataFrame]:
+    """
+    Yields the rows of a CSV or Parquet file `chunk_size` rows at a time,
+    so only one chunk of the input is held in memory.
+    """
+    if _file_format(path) == "csv":
+        with pd.read_csv(path, chunksize=chunk_size) as reader:
+            yield from reader
+        return
+    pyarrow = _require_pyarrow()
+    parquet_file = pyarrow.parquet.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size):
+        yield batch.to_pandas()
+
+
+class ChunkWriter:
+    """
+    Appends priced chunks to a CSV or Parquet file as they arrive. The
+    Parquet schema is taken from the first chunk.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.format = _file_format(path)
+        self.rows = 0
+        self._parquet_writer = None
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        if self.format == "csv":
+            chunk.to_csv(
+                self.path,
+                mode="w" if self.rows == 0 else "a",
+                header=self.rows == 0,
+                index=False,
+            )
+        else:
+            pyarrow = _require_pyarrow()
+            table = pyarrow.Table.from_pandas(chunk, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pyarrow.parquet.ParquetWriter(
+                    self.path, table.schema
+                )
+            self._parquet_writer.write_table(table.cast(self._parquet_writer.schema))
+        self.rows += len(chunk)
+
+    def close(self) -> None:
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    def __enter__(self) -> "ChunkWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def price_chunk(
+    chunk: pd.DataFrame, curve: YieldCurve, mode: str, tax_rate: float
+) -> pd.DataFrame:
+    """
+    Prices one chunk of holdings against `curve` and returns the input
+    columns followed by the result columns.
+
+    mode:
+        "primary"   - buying `face_value` of a `tenor`-day bill at the curve
+                      yield (`YieldCurve.price_bills`).
+        "secondary" - selling each holding after `holding_days` at the curve
+                      yield for its remaining days
+                      (`YieldCurve.price_secondary_sales`).
+    """
+    missing = [column for column in PRICING_MODES[mode] if column not in chunk]
+    if missing:
+        raise ValueError(
+            f"Input is missing the columns {missing} needed for {mode} pricing."
+        )
+    inputs = [
+        pd.to_numeric(chunk[column], errors="coerce") for column in PRICING_MODES[mode]
+    ]
+    if mode == "primary":
+        results = curve.price_bills(inputs[0], inputs[1], tax_rate)
+    else:
+        results = curve.price_secondary_sales(*inputs, tax_rate)
+    # أعمدة النتائج تحل محل أعمدة المدخلات التي تحمل الاسم نفسه
+    passthrough = chunk.drop(
+        columns=[column for column in results.columns if column in chunk]
+    )
+    return pd.concat([passthrough, results], axis=1)
+
+
+_worker_state: Optional[Tuple[YieldCurve, str, float]] = None
+
+
+def _init_worker(curve: YieldCurve, mode: str, tax_rate: float) -> None:
+    # يُرسل المنحنى مرة واحدة لكل عملية بدلاً من إرساله مع كل دفعة
+    global _worker_state
+    _worker_state = (curve, mode, tax_rate)
+
+
+def _price_in_worker(chunk: pd.DataFrame) -> pd.DataFrame:
+    curve, mode, tax_rate = _worker_state
+    return price_chunk(chunk, curve, mode, tax_rate)
+
+
+def _bounded_map(
+    executor: Executor,
+    fn: Callable[[pd.DataFrame], pd.DataFrame],
+    chunks: Iterable[pd.DataFrame],
+    max_pending: int,
+) -> Iterator[pd.DataFrame]:
+    """
+    Like `executor.map`, but reads ahead at most `max_pending` chunks so
+    the input is never loaded faster than the results are written.
+    Results are yielded in input order.
+    """
+    pending: Deque = deque()
+    for chunk in chunks:
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+        pending.append(executor.submit(fn, chunk))
+    while pending:
+        yield pending.popleft().result()
+
+
+def price_file(
+    input_path: str,
+    output_path: str,
+    curve: YieldCurve,
+    mode: str = "secondary",
+    tax_rate: float = C.DEFAULT_TAX_RATE_PERCENT,
+    chunk_size: int = C.BATCH_PRICER_CHUNK_SIZE,
+    workers: int = 1,
+) -> int:
+    """
+    Streams `input_path` through `price_chunk` into `output_path`. With
+    `workers > 1` the chunks are priced on a process pool with at most two
+    chunks in flight per worker.
+
+    Returns:
+        The number of rows written.
+    """
+    if mode not in PRICING_MODES:
+        raise ValueError(
+            f"Unknown pricing mode '{mode}'; expected one of {tuple(PRICING_MODES)}."
+        )
+    chunks = iter_chunks(input_path, chunk_size)
+    with ChunkWriter(output_path) as writer:
+        if workers <= 1:
+            for chunk in chunks:
+                writer.write(price_chunk(chunk, curve, mode, tax_rate))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(curve, mode, tax_rate),
+            ) as executor:
+                for priced in _bounded_map(
+                    executor, _price_in_worker, chunks, 2 * workers
+                ):
+                    writer.write(priced)
+    logger.info(f"Priced {writer.rows} rows from {input_path} into {output_path}.")
+    return writer.rows
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="تسعير ملفات محافظ الأذون الكبيرة (CSV أو Parquet) على دفعات بمنحنى آخر عطاءات."
+    )
+    parser.add_argument("input", help="ملف المدخلات (.csv أو .parquet).")
+    parser.add_argument("output", help="ملف النتائج (.csv أو .parquet).")
+    parser.add_argument(
+        "--mode",
+        choices=tuple(PRICING_MODES),
+        default="secondary",
+        help="primary: شراء بعائد المنحنى، secondary: البيع قبل الاستحقاق.",
+    )
+    parser.add_argument("--tax", type=float, default=C.DEFAULT_TAX_RATE_PERCENT)
+    parser.add_argument("--chunk-size", type=int, default=C.BATCH_PRICER_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--method", default=C.CURVE_INTERPOLATION_METHOD)
+    parser.add_argument("--db", default=C.DB_FILENAME)
+    args = parser.parse_args(argv)
+
+    setup_logging(level=logging.INFO)
+    db_manager = get_db_manager(args.db)
+    try:
+        curve = latest_curve(db_manager, args.method)
+    finally:
+        db_manager.close()
+    price_file(
+        args.input,
+        args.output,
+        curve,
+        mode=args.mode,
+        tax_rate=args.tax,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
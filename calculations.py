@@ -1,5 +1,8 @@
 import logging
-from typing import Dict, Any
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
 
 import constants as C
 
@@ -133,3 +136,336 @@ def analyze_secondary_sale(
 
     logger.info(f"Secondary sale analyzed successfully. Net profit: {net_profit:.2f}")
     return result
+
+
+def _broadcast_inputs(*inputs: Any) -> Tuple[List[np.ndarray], Optional[pd.Index]]:
+    """
+    Broadcasts scalar/array/Series inputs against each other into flat float
+    arrays, and returns the index of the first Series that matches the
+    result length so batch results can be joined back.
+    """
+    arrays = [
+        np.asarray(arr, dtype=np.float64).ravel()
+        for arr in np.broadcast_arrays(*inputs)
+    ]
+    index = next(
+        (
+            arr.index
+            for arr in inputs
+            if isinstance(arr, pd.Series) and len(arr) == arrays[0].size
+        ),
+        None,
+    )
+    return arrays, index
+
+
+def calculate_primary_yield_batch(
+    face_value: Any, yield_rate: Any, tenor: Any, tax_rate: Any
+) -> pd.DataFrame:
+    """
+    Vectorized counterpart of `calculate_primary_yield` for whole books of T-bills.
+
+    Each argument may be a scalar, a list, a NumPy array or a DataFrame column;
+    they are broadcast against each other so that, e.g., a single tax rate can
+    be applied to many holdings, and multi-dimensional sweeps are flattened.
+    Invalid rows are not reported through error dicts: they are flagged in the
+    `is_valid` column and their results are NaN.
+
+    Args:
+        face_value: Nominal value(s) of the T-bills at maturity.
+        yield_rate: Annualized accepted yield rate(s) (e.g., 27.5).
+        tenor: Term(s) of the T-bills in days.
+        tax_rate: Tax rate(s) on profits (e.g., 20.0).
+
+    Returns:
+        A DataFrame with one row per input row and the columns `is_valid`,
+        `purchase_price`, `gross_return`, `tax_amount`, `net_return`,
+        `total_payout` and `real_profit_percentage`. When a pandas Series is
+        passed, its index is kept so the results can be joined back.
+    """
+    (face_value, yield_rate, tenor, tax_rate), index = _broadcast_inputs(
+        face_value, yield_rate, tenor, tax_rate
+    )
+
+    with np.errstate(invalid="ignore"):
+        is_valid = (
+            (face_value > 0)
+            & (yield_rate > 0)
+            & (tenor > 0)
+            & (tax_rate >= 0)
+            & (tax_rate <= 100)
+        )
+
+    purchase_price = np.where(
+        is_valid,
+        face_value / (1 + (yield_rate / 100.0 * tenor / C.DAYS_IN_YEAR)),
+        np.nan,
+    )
+    gross_return = face_value - purchase_price
+    tax_amount = gross_return * (tax_rate / 100.0)
+    net_return = gross_return - tax_amount
+    real_profit_percentage = (net_return / purchase_price) * 100
+
+    logger.debug(
+        "Primary yield batch calculated: %d rows, %d invalid.",
+        is_valid.size,
+        is_valid.size - int(is_valid.sum()),
+    )
+
+    return pd.DataFrame(
+        {
+            "is_valid": is_valid,
+            "purchase_price": purchase_price,
+            "gross_return": gross_return,
+            "tax_amount": tax_amount,
+            "net_return": net_return,
+            "total_payout": np.where(is_valid, face_value, np.nan),
+            "real_profit_percentage": real_profit_percentage,
+        },
+        index=index,
+    )
+
+
+def analyze_secondary_sale_batch(
+    face_value: Any,
+    original_yield: Any,
+    original_tenor: Any,
+    holding_days: Any,
+    secondary_yield: Any,
+    tax_rate: Any,
+) -> pd.DataFrame:
+    """
+    Vectorized counterpart of `analyze_secondary_sale` for a list of
+    holdings. Arguments are broadcast like in `calculate_primary_yield_batch`;
+    invalid rows are flagged in `is_valid` and their results are NaN.
+
+    Returns:
+        A DataFrame with `is_valid`, `remaining_days`,
+        `original_purchase_price`, `sale_price`, `gross_profit`,
+        `tax_amount`, `net_profit` and `period_yield`, one row per holding.
+    """
+    (
+        face_value,
+        original_yield,
+        original_tenor,
+        holding_days,
+        secondary_yield,
+        tax_rate,
+    ), index = _broadcast_inputs(
+        face_value,
+        original_yield,
+        original_tenor,
+        holding_days,
+        secondary_yield,
+        tax_rate,
+    )
+
+    with np.errstate(invalid="ignore"):
+        is_valid = (
+            (face_value > 0)
+            & (original_yield > 0)
+            & (original_tenor > 0)
+            & (secondary_yield > 0)
+            & (tax_rate >= 0)
+            & (tax_rate <= 100)
+            & (holding_days >= 1)
+            & (holding_days < original_tenor)
+        )
+
+    original_purchase_price = np.where(
+        is_valid,
+        face_value / (1 + (original_yield / 100.0 * original_tenor / C.DAYS_IN_YEAR)),
+        np.nan,
+    )
+    remaining_days = np.where(is_valid, original_tenor - holding_days, np.nan)
+    sale_price = face_value / (
+        1 + (secondary_yield / 100.0 * remaining_days / C.DAYS_IN_YEAR)
+    )
+    gross_profit = sale_price - original_purchase_price
+    tax_amount = np.maximum(0, gross_profit * (tax_rate / 100.0))
+    net_profit = gross_profit - tax_amount
+
+    logger.debug(
+        "Secondary sale batch analyzed: %d rows, %d invalid.",
+        is_valid.size,
+        is_valid.size - int(is_valid.sum()),
+    )
+
+    return pd.DataFrame(
+        {
+            "is_valid": is_valid,
+            "remaining_days": remaining_days,
+            "original_purchase_price": original_purchase_price,
+            "sale_price": sale_price,
+            "gross_profit": gross_profit,
+            "tax_amount": tax_amount,
+            "net_profit": net_profit,
+            "period_yield": (net_profit / original_purchase_price) * 100,
+        },
+        index=index,
+    )
+
+
+def analyze_secondary_sale_grid(
+    face_value: float,
+    original_yield: float,
+    original_tenor: int,
+    secondary_yields: Any,
+    tax_rate: float,
+) -> Dict[str, Any]:
+    """
+    Evaluates `analyze_secondary_sale` for every holding day from 1 to
+    `original_tenor - 1` against a vector of candidate market yields at once.
+
+    Args:
+        face_value (float): The T-bill's nominal value.
+        original_yield (float): The yield rate at the time of original purchase.
+        original_tenor (int): The original term of the T-bill in days.
+        secondary_yields: Candidate market yields for the remaining period.
+        tax_rate (float): The tax rate on profits.
+
+    Returns:
+        A dictionary with the 1-D axes `holding_days` and `secondary_yields`,
+        the 2-D matrices `sale_price`, `gross_profit`, `tax_amount`,
+        `net_profit` and `breaks_even` (net profit >= 0), each shaped
+        (len(holding_days), len(secondary_yields)), and the highest market
+        yield that still breaks even for each holding day
+        (`break_even_yield`), or an error message.
+    """
+    secondary_yields = np.asarray(secondary_yields, dtype=np.float64).ravel()
+
+    if (
+        face_value <= 0
+        or original_yield <= 0
+        or original_tenor <= 0
+        or secondary_yields.size == 0
+        or not (secondary_yields > 0).all()
+    ):
+        error_msg = "جميع المدخلات الرقمية يجب أن تكون أرقامًا موجبة."
+        logger.warning(f"Validation failed: {error_msg}")
+        return {"error": error_msg}
+
+    if not 0 <= tax_rate <= 100:
+        error_msg = "نسبة الضريبة يجب أن تكون بين 0 و 100."
+        logger.warning(f"Validation failed: {error_msg}")
+        return {"error": error_msg}
+
+    if original_tenor < 2:
+        error_msg = "أيام الاحتفاظ يجب أن تكون أكبر من صفر وأقل من أجل الإذن الأصلي."
+        logger.warning(f"Validation failed: {error_msg}")
+        return {"error": error_msg}
+
+    original_purchase_price = face_value / (
+        1 + (original_yield / 100.0 * original_tenor / C.DAYS_IN_YEAR)
+    )
+    holding_days = np.arange(1, int(original_tenor))
+    remaining_days = (int(original_tenor) - holding_days)[:, np.newaxis]
+    sale_price = face_value / (
+        1 + (secondary_yields[np.newaxis, :] / 100.0 * remaining_days / C.DAYS_IN_YEAR)
+    )
+    gross_profit = sale_price - original_purchase_price
+    tax_amount = np.maximum(0, gross_profit * (tax_rate / 100.0))
+    net_profit = gross_profit - tax_amount
+
+    logger.debug(
+        "Secondary sale grid analyzed: %d holding days x %d yields.",
+        holding_days.size,
+        secondary_yields.size,
+    )
+
+    return {
+        "error": None,
+        "original_purchase_price": original_purchase_price,
+        "holding_days": holding_days,
+        "secondary_yields": secondary_yields,
+        "sale_price": sale_price,
+        "gross_profit": gross_profit,
+        "tax_amount": tax_amount,
+        "net_profit": net_profit,
+        "breaks_even": net_profit >= 0,
+        "break_even_yield": solve_break_even_yield(
+            face_value, original_yield, original_tenor, holding_days, tax_rate
+        ),
+    }
+
+
+def solve_break_even_yield(
+    face_value: Any,
+    original_yield: Any,
+    original_tenor: Any,
+    holding_days: Any,
+    tax_rate: Any,
+    target_net_profit: Any = 0.0,
+) -> Any:
+    """
+    Solves `analyze_secondary_sale` for the market yield that produces a given
+    net profit, in closed form instead of by repeated evaluation.
+
+    Because tax is only charged on gains (`max(0, ...)`), a positive target is
+    grossed up by the tax rate while a zero or negative target is reached by
+    the untaxed gross profit. For the default target of zero this reduces to
+    `original_yield * original_tenor / (original_tenor - holding_days)`: any
+    higher market yield turns the early sale into a loss.
+
+    All arguments may be scalars or array-likes and are broadcast together.
+
+    Args:
+        face_value: The T-bills' nominal value(s).
+        original_yield: The yield rate(s) at the time of original purchase.
+        original_tenor: The original term(s) of the T-bills in days.
+        holding_days: How many days each T-bill is held before selling.
+        tax_rate: The tax rate(s) on profits.
+        target_net_profit: The net profit to solve for (0 for break-even).
+
+    Returns:
+        The secondary yield (e.g., 27.5) as a float for scalar inputs or a
+        NumPy array otherwise. Invalid inputs and unreachable targets are NaN.
+    """
+    inputs = np.broadcast_arrays(
+        face_value,
+        original_yield,
+        original_tenor,
+        holding_days,
+        tax_rate,
+        target_net_profit,
+    )
+    is_scalar = inputs[0].ndim == 0
+    (
+        face_value,
+        original_yield,
+        original_tenor,
+        holding_days,
+        tax_rate,
+        target_net_profit,
+    ) = (np.asarray(arr, dtype=np.float64) for arr in inputs)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tax_fraction = tax_rate / 100.0
+        original_purchase_price = face_value / (
+            1 + (original_yield / 100.0 * original_tenor / C.DAYS_IN_YEAR)
+        )
+        gross_profit = np.where(
+            target_net_profit > 0,
+            target_net_profit / (1 - tax_fraction),
+            target_net_profit,
+        )
+        sale_price = original_purchase_price + gross_profit
+        remaining_days = original_tenor - holding_days
+        secondary_yield = (
+            (face_value / sale_price - 1) * C.DAYS_IN_YEAR / remaining_days * 100.0
+        )
+        is_valid = (
+            (face_value > 0)
+            & (original_yield > 0)
+            & (original_tenor > 0)
+            & (holding_days >= 1)
+            & (holding_days < original_tenor)
+            & (tax_fraction >= 0)
+            & (tax_fraction <= 1)
+            & ~((target_net_profit > 0) & (tax_fraction >= 1))
+            & (sale_price > 0)
+            & (sale_price < face_value)
+        )
+    secondary_yield = np.where(is_valid, secondary_yield, np.nan)
+
+    return float(secondary_yield) if is_scalar else secondary_yield
@@ -1,34 +1,50 @@
 # cbe_scraper.py (النسخة النهائية والنظيفة)
 import os
+import urllib.error
+import urllib.request
 import pandas as pd
 from io import StringIO
 from datetime import datetime
-from selenium import webdriver
-
-# from selenium.common.exceptions import TimeoutException <-- تم حذفه
-from selenium.webdriver.chrome.options import Options as ChromeOptions
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
+import atexit
+import hashlib
+import json
 import logging
+import re
+import threading
 import time
-from typing import Optional, Callable
+from contextlib import contextmanager
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Callable,
+    Tuple,
+)
 import pytz
 import platform
 
 import constants as C
 from db_manager import DatabaseManager
 
+# Selenium و webdriver-manager و BeautifulSoup و lxml تُستورد عند أول استخدام فقط،
+# حتى لا يدفع مسار HTTP السريع وواجهة التطبيق تكلفة تحميلها عند البدء
+if TYPE_CHECKING:
+    from selenium import webdriver
+
 logger = logging.getLogger(__name__)
 
 
-def setup_driver() -> Optional[webdriver.Chrome]:
+def setup_driver() -> Optional["webdriver.Chrome"]:
     """
     Initializes a headless Chrome WebDriver with environment-specific settings.
     """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options as ChromeOptions
+    from selenium.webdriver.chrome.service import Service
+
     options = ChromeOptions()
     options.add_argument("--headless")
     options.add_argument("--no-sandbox")
@@ -46,6 +62,8 @@ def setup_driver() -> Optional[webdriver.Chrome]:
             options.binary_location = "/usr/bin/chromium"
             service = Service(executable_path="/usr/bin/chromedriver")
         else:
+            from webdriver_manager.chrome import ChromeDriverManager
+
             logger.info("Local environment detected. Using webdriver-manager.")
             log_path = os.devnull
             service = Service(ChromeDriverManager().install(), log_output=log_path)
@@ -58,6 +76,124 @@ def setup_driver() -> Optional[webdriver.Chrome]:
         return None
 
 
+class DriverPool:
+    """
+    Keeps warm Selenium drivers between scrape attempts and refresh clicks,
+    so a retry only pays for a page load instead of a full browser startup.
+
+    Drivers are health-checked before reuse, recycled once they exceed
+    `max_age_seconds`, and discarded if they stop responding after an error.
+    """
+
+    def __init__(
+        self,
+        factory: Optional[Callable[[], Optional["webdriver.Chrome"]]] = None,
+        max_size: int = C.DRIVER_POOL_SIZE,
+        max_age_seconds: float = C.DRIVER_MAX_AGE_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._factory = factory
+        self._max_size = max_size
+        self._max_age_seconds = max_age_seconds
+        self._clock = clock
+        self._idle: List[Tuple["webdriver.Chrome", float]] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _is_healthy(driver: "webdriver.Chrome") -> bool:
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self._clock() - created_at > self._max_age_seconds
+
+    @staticmethod
+    def _quit(driver: "webdriver.Chrome") -> None:
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Error while quitting a pooled driver: {e}")
+
+    def _acquire(self) -> Optional[Tuple["webdriver.Chrome", float]]:
+        while True:
+            with self._lock:
+                entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                break
+            driver, created_at = entry
+            if self._is_expired(created_at):
+                logger.info("Recycling a pooled driver that exceeded its max age.")
+            elif not self._is_healthy(driver):
+                logger.warning(
+                    "Recycling a pooled driver that failed its health check."
+                )
+            else:
+                logger.info("Reusing a warm driver from the pool.")
+                return entry
+            self._quit(driver)
+
+        driver = (self._factory or setup_driver)()
+        return (driver, self._clock()) if driver else None
+
+    def _release(
+        self, driver: "webdriver.Chrome", created_at: float, discard: bool
+    ) -> None:
+        if not discard and not self._is_expired(created_at):
+            with self._lock:
+                if len(self._idle) < self._max_size:
+                    self._idle.append((driver, created_at))
+                    return
+        self._quit(driver)
+
+    @contextmanager
+    def lease(self) -> Iterator[Optional["webdriver.Chrome"]]:
+        """
+        Lends a driver for the duration of a `with` block, or None if no
+        browser could be started. The driver returns to the pool afterwards
+        unless it crashed.
+        """
+        entry = self._acquire()
+        if entry is None:
+            yield None
+            return
+        driver, created_at = entry
+        discard = False
+        try:
+            yield driver
+        except BaseException:
+            discard = not self._is_healthy(driver)
+            raise
+        finally:
+            self._release(driver, created_at, discard)
+
+    def close(self) -> None:
+        """Quits every idle driver."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for driver, _ in idle:
+            self._quit(driver)
+
+
+_shared_driver_pool: Optional[DriverPool] = None
+_shared_driver_pool_lock = threading.Lock()
+
+
+def get_shared_driver_pool() -> DriverPool:
+    """
+    Returns the process-wide driver pool, creating it on first use. It is
+    shared by every Streamlit session and closed when the process exits.
+    """
+    global _shared_driver_pool
+    with _shared_driver_pool_lock:
+        if _shared_driver_pool is None:
+            _shared_driver_pool = DriverPool()
+            atexit.register(_shared_driver_pool.close)
+        return _shared_driver_pool
+
+
 def verify_page_structure(page_source: str) -> None:
     logger.info("Verifying page structure for essential text markers...")
     for marker in C.ESSENTIAL_TEXT_MARKERS:
@@ -70,58 +206,172 @@ def verify_page_structure(page_source: str) -> None:
     logger.info("Page structure verification successful. All markers found.")
 
 
-def parse_cbe_html(page_source: str) -> Optional[pd.DataFrame]:
-    logger.info("Starting to parse HTML content using the robust logic.")
-    soup = BeautifulSoup(page_source, "lxml")
+def _normalize_text(element) -> str:
+    return " ".join(element.text_content().split())
+
+
+def _to_float(text: str) -> Optional[float]:
     try:
-        results_headers = soup.find_all(
-            lambda tag: tag.name == "h2" and "النتائج" in tag.get_text()
-        )
-        if not results_headers:
-            return None
-        all_dataframes = []
-        for header in results_headers:
-            dates_table = header.find_next("table")
-            if not dates_table:
+        return float(text.replace(",", ""))
+    except ValueError:
+        return None
+
+
+def _table_rows(table) -> List[List[str]]:
+    return [
+        [_normalize_text(cell) for cell in row.iterchildren("th", "td")]
+        for row in table.iter("tr")
+    ]
+
+
+def _extract_sections_lxml(page_source: str) -> Optional[pd.DataFrame]:
+    """
+    Single-pass extraction with lxml: walks headers, markers and tables once
+    in document order and collects tenors, session dates and weighted-average
+    yields straight into flat lists, without building per-table DataFrames.
+    """
+    from lxml import html as lxml_html
+
+    parser = lxml_html.HTMLParser(encoding="utf-8")
+    root = lxml_html.fromstring(page_source.encode("utf-8"), parser=parser)
+
+    tenors: List[int] = []
+    session_dates: List[str] = []
+    yields: List[float] = []
+    # الحالة: 0 = لا يوجد قسم، 1 = في انتظار جدول التواريخ،
+    # 2 = في انتظار عنوان العروض المقبولة، 3 = في انتظار جدول العوائد
+    state = 0
+    section_tenors: List[int] = []
+    section_dates: List[str] = []
+    for element in root.iter("h2", "p", "strong", "table"):
+        tag = element.tag
+        if tag == "h2":
+            if "النتائج" in element.text_content():
+                state = 1
+        elif state == 2 and tag in ("p", "strong"):
+            if C.ACCEPTED_BIDS_KEYWORD in element.text_content():
+                state = 3
+        elif tag == "table" and state == 1:
+            state = 0
+            rows = _table_rows(element)
+            if not rows:
                 continue
-            dates_df = pd.read_html(StringIO(str(dates_table)))[0]
-            tenors = (
-                pd.to_numeric(dates_df.columns[1:], errors="coerce")
-                .dropna()
-                .astype(int)
-                .tolist()
+            header = (_to_float(cell) for cell in rows[0][1:])
+            section_tenors = [int(value) for value in header if value is not None]
+            dates_row = next(
+                (row for row in rows[1:] if row and row[0] == "تاريخ الجلسة"), None
             )
-            session_dates_row = dates_df[dates_df.iloc[:, 0] == "تاريخ الجلسة"]
-            if session_dates_row.empty or not tenors:
+            if dates_row is None or not section_tenors:
                 continue
-            session_dates = session_dates_row.iloc[0, 1 : len(tenors) + 1].tolist()
-            dates_tenors_df = pd.DataFrame(
-                {C.TENOR_COLUMN_NAME: tenors, C.SESSION_DATE_COLUMN_NAME: session_dates}
+            section_dates = dates_row[1 : len(section_tenors) + 1]
+            if len(section_dates) == len(section_tenors):
+                state = 2
+        elif tag == "table" and state == 3:
+            state = 0
+            yield_row = next(
+                (
+                    row
+                    for row in _table_rows(element)
+                    if row and C.YIELD_ANCHOR_TEXT in row[0]
+                ),
+                None,
             )
-            accepted_bids_header = header.find_next(
-                lambda tag: tag.name in ["p", "strong"]
-                and C.ACCEPTED_BIDS_KEYWORD in tag.get_text()
-            )
-            if not accepted_bids_header:
-                continue
-            yields_table = accepted_bids_header.find_next("table")
-            if not yields_table:
+            if yield_row is None:
                 continue
-            yields_df_raw = pd.read_html(StringIO(str(yields_table)))[0]
-            yields_df_raw.columns = ["البيان"] + tenors
-            yield_row = yields_df_raw[
-                yields_df_raw.iloc[:, 0].str.contains(C.YIELD_ANCHOR_TEXT, na=False)
+            section_yields = [
+                _to_float(cell) for cell in yield_row[1 : len(section_tenors) + 1]
             ]
-            if yield_row.empty:
+            if len(section_yields) != len(section_tenors) or None in section_yields:
                 continue
-            yield_series = yield_row.iloc[0, 1:].astype(float)
-            yield_series.name = C.YIELD_COLUMN_NAME
-            section_df = dates_tenors_df.join(yield_series, on=C.TENOR_COLUMN_NAME)
-            if not section_df[C.YIELD_COLUMN_NAME].isnull().any():
-                all_dataframes.append(section_df)
-        if not all_dataframes:
+            tenors.extend(section_tenors)
+            session_dates.extend(section_dates)
+            yields.extend(section_yields)
+
+    if not tenors:
+        return None
+    return pd.DataFrame(
+        {
+            C.TENOR_COLUMN_NAME: tenors,
+            C.SESSION_DATE_COLUMN_NAME: session_dates,
+            C.YIELD_COLUMN_NAME: yields,
+        }
+    )
+
+
+def _extract_sections_bs4(page_source: str) -> Optional[pd.DataFrame]:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(page_source, "lxml")
+    results_headers = soup.find_all(
+        lambda tag: tag.name == "h2" and "النتائج" in tag.get_text()
+    )
+    if not results_headers:
+        return None
+    all_dataframes = []
+    for header in results_headers:
+        dates_table = header.find_next("table")
+        if not dates_table:
+            continue
+        dates_df = pd.read_html(StringIO(str(dates_table)))[0]
+        tenors = (
+            pd.to_numeric(dates_df.columns[1:], errors="coerce")
+            .dropna()
+            .astype(int)
+            .tolist()
+        )
+        session_dates_row = dates_df[dates_df.iloc[:, 0] == "تاريخ الجلسة"]
+        if session_dates_row.empty or not tenors:
+            continue
+        session_dates = session_dates_row.iloc[0, 1 : len(tenors) + 1].tolist()
+        dates_tenors_df = pd.DataFrame(
+            {C.TENOR_COLUMN_NAME: tenors, C.SESSION_DATE_COLUMN_NAME: session_dates}
+        )
+        accepted_bids_header = header.find_next(
+            lambda tag: tag.name in ["p", "strong"]
+            and C.ACCEPTED_BIDS_KEYWORD in tag.get_text()
+        )
+        if not accepted_bids_header:
+            continue
+        yields_table = accepted_bids_header.find_next("table")
+        if not yields_table:
+            continue
+        yields_df_raw = pd.read_html(StringIO(str(yields_table)))[0]
+        yields_df_raw.columns = ["البيان"] + tenors
+        yield_row = yields_df_raw[
+            yields_df_raw.iloc[:, 0].str.contains(C.YIELD_ANCHOR_TEXT, na=False)
+        ]
+        if yield_row.empty:
+            continue
+        yield_series = yield_row.iloc[0, 1:].astype(float)
+        yield_series.name = C.YIELD_COLUMN_NAME
+        section_df = dates_tenors_df.join(yield_series, on=C.TENOR_COLUMN_NAME)
+        if not section_df[C.YIELD_COLUMN_NAME].isnull().any():
+            all_dataframes.append(section_df)
+    if not all_dataframes:
+        return None
+    return pd.concat(all_dataframes, ignore_index=True)
+
+
+def parse_cbe_html(
+    page_source: str, backend: str = C.HTML_PARSER_BACKEND
+) -> Optional[pd.DataFrame]:
+    """
+    Parses the CBE auctions page into one row per tenor (its latest session).
+
+    Args:
+        page_source: The page HTML.
+        backend: "bs4" (BeautifulSoup + pandas.read_html) or "lxml" (a
+            single-pass lxml walk, much faster on large archive pages). Both
+            produce the same DataFrame.
+    """
+    extractors = {"bs4": _extract_sections_bs4, "lxml": _extract_sections_lxml}
+    if backend not in extractors:
+        raise ValueError(f"Unknown HTML parser backend: {backend!r}")
+    logger.info(f"Starting to parse HTML content using the {backend} backend.")
+    try:
+        final_df = extractors[backend](page_source)
+        if final_df is None:
             return None
-        final_df = pd.concat(all_dataframes, ignore_index=True)
         final_df[C.DATE_COLUMN_NAME] = datetime.now(pytz.utc)
         final_df["session_date_dt"] = pd.to_datetime(
             final_df[C.SESSION_DATE_COLUMN_NAME], format="%d/%m/%Y", errors="coerce"
@@ -137,67 +387,293 @@ def parse_cbe_html(page_source: str) -> Optional[pd.DataFrame]:
         return None
 
 
+_TABLE_PATTERN = re.compile(r"<table\b.*?</table>", re.IGNORECASE | re.DOTALL)
+
+
+def compute_content_hash(page_source: str) -> str:
+    """
+    Hashes only the auction tables that follow the first results header, so
+    unrelated page changes (banners, tokens, timestamps) do not count as new
+    data. Falls back to hashing the whole page if no table is found.
+    """
+    start = max(page_source.find("النتائج"), 0)
+    sections = _TABLE_PATTERN.findall(page_source, start) or [page_source]
+    digest = hashlib.sha256()
+    for section in sections:
+        digest.update(section.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class FetchStateCache:
+    """
+    Remembers what the last successful scrape saw: the HTTP validators
+    (ETag, Last-Modified) and a hash of the auction tables. An unchanged
+    page can then be skipped before any parsing or database access.
+
+    The file only changes when the page does, so the scheduled workflow
+    that commits it does not produce a commit for every no-op run.
+    """
+
+    def __init__(self, path: str = C.FETCH_STATE_FILENAME):
+        self.path = os.path.abspath(path)
+        self.state = self._load()
+
+    def _load(self) -> Dict[str, Optional[str]]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+            return state if isinstance(state, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable fetch state at {self.path}: {e}")
+            return {}
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.state.get("etag"):
+            headers["If-None-Match"] = self.state["etag"]
+        if self.state.get("last_modified"):
+            headers["If-Modified-Since"] = self.state["last_modified"]
+        return headers
+
+    def is_unchanged(self, content_hash: str) -> bool:
+        return content_hash == self.state.get("content_hash")
+
+    def update(
+        self,
+        content_hash: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        state = {
+            "content_hash": content_hash,
+            "etag": etag,
+            "last_modified": last_modified,
+        }
+        if state == self.state:
+            return
+        self.state = state
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self.state, f, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not persist fetch state to {self.path}: {e}")
+
+
+class HttpPage(NamedTuple):
+    status: int
+    text: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+def fetch_http_page(
+    url: str = C.CBE_DATA_URL,
+    timeout: int = C.HTTP_TIMEOUT_SECONDS,
+    headers: Optional[Dict[str, str]] = None,
+) -> Optional[HttpPage]:
+    """
+    Performs a plain HTTP GET, optionally conditional. A "304 Not Modified"
+    answer is returned as a page with status 304 and no text.
+    Returns None if the request fails.
+    """
+    request = urllib.request.Request(
+        url,
+        headers={
+            "User-Agent": C.USER_AGENT,
+            "Accept-Language": "ar",
+            **(headers or {}),
+        },
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            charset = response.headers.get_content_charset() or "utf-8"
+            return HttpPage(
+                status=response.status,
+                text=response.read().decode(charset, errors="replace"),
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return HttpPage(
+                304, "", e.headers.get("ETag"), e.headers.get("Last-Modified")
+            )
+        logger.warning(f"HTTP fetch of {url} failed: {e}")
+        return None
+    except (urllib.error.URLError, OSError) as e:
+        logger.warning(f"HTTP fetch of {url} failed: {e}")
+        return None
+
+
+def fetch_page_via_http(
+    url: str = C.CBE_DATA_URL, timeout: int = C.HTTP_TIMEOUT_SECONDS
+) -> Optional[str]:
+    """
+    Downloads a page with a plain HTTP GET, without starting a browser.
+    Returns the decoded HTML, or None if the request fails.
+    """
+    page = fetch_http_page(url, timeout)
+    return page.text if page is not None else None
+
+
+def _report_up_to_date(status_callback: Optional[Callable[[str], None]]) -> None:
+    if status_callback:
+        status_callback("البيانات محدثة بالفعل. لا حاجة للحفظ.")
+        time.sleep(2)
+
+
+def _save_if_new(
+    db_manager: DatabaseManager,
+    final_df: pd.DataFrame,
+    status_callback: Optional[Callable[[str], None]] = None,
+) -> bool:
+    """
+    Saves `final_df` unless its latest session is already stored.
+    Returns True once the data is confirmed to be in the database, and
+    False if the write failed (`save_data` logs the error and reports
+    fewer rows than it was given).
+    """
+    db_session_date_str = db_manager.get_latest_session_date()
+    live_latest_date_str = final_df[C.SESSION_DATE_COLUMN_NAME].iloc[0]
+    if db_session_date_str and live_latest_date_str == db_session_date_str:
+        _report_up_to_date(status_callback)
+        return True
+    if status_callback:
+        status_callback("تم العثور على بيانات جديدة، جاري الحفظ...")
+    counts = db_manager.save_data(final_df)
+    if counts["inserted"] + counts["updated"] < len(final_df):
+        return False
+    if status_callback:
+        status_callback("اكتمل تحديث البيانات بنجاح!")
+    return True
+
+
+def _process_verified_page(
+    page_source: str,
+    db_manager: DatabaseManager,
+    status_callback: Optional[Callable[[str], None]],
+    fetch_state: Optional[FetchStateCache],
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> bool:
+    """
+    Parses and stores a page that already passed `verify_page_structure`,
+    unless its auction tables match the cached hash. The hash is only
+    recorded once the data is confirmed to be stored, so a failed write is
+    retried on the next run.
+    Returns False if the page yielded no data; raises RuntimeError if the
+    data could not be saved.
+    """
+    content_hash = compute_content_hash(page_source)
+    if fetch_state is not None and fetch_state.is_unchanged(content_hash):
+        logger.info("Auction tables unchanged since the last scrape; skipping parse.")
+        fetch_state.update(content_hash, etag, last_modified)
+        _report_up_to_date(status_callback)
+        return True
+    final_df = parse_cbe_html(page_source)
+    if final_df is None or final_df.empty:
+        return False
+    if not _save_if_new(db_manager, final_df, status_callback):
+        raise RuntimeError("فشل حفظ البيانات الجديدة في قاعدة البيانات.")
+    if fetch_state is not None:
+        fetch_state.update(content_hash, etag, last_modified)
+    return True
+
+
 def fetch_data_from_cbe(
-    db_manager: DatabaseManager, status_callback: Optional[Callable[[str], None]] = None
+    db_manager: DatabaseManager,
+    status_callback: Optional[Callable[[str], None]] = None,
+    use_http_fast_path: bool = True,
+    url: str = C.CBE_DATA_URL,
+    driver_pool: Optional[DriverPool] = None,
+    fetch_state: Optional[FetchStateCache] = None,
 ) -> None:
+    if use_http_fast_path:
+        if status_callback:
+            status_callback("جاري الاتصال بموقع البنك (اتصال مباشر)...")
+        page = fetch_http_page(
+            url, headers=fetch_state.conditional_headers() if fetch_state else None
+        )
+        if page is not None and page.status == 304:
+            logger.info("Server reports the page as not modified; skipping.")
+            _report_up_to_date(status_callback)
+            return
+        if page is not None:
+            try:
+                verify_page_structure(page.text)
+            except RuntimeError:
+                logger.info("Static HTML lacks the expected markers.")
+            else:
+                if _process_verified_page(
+                    page.text,
+                    db_manager,
+                    status_callback,
+                    fetch_state,
+                    page.etag,
+                    page.last_modified,
+                ):
+                    logger.info("HTTP fast path succeeded; Selenium was not needed.")
+                    return
+        logger.info("HTTP fast path unavailable. Falling back to Selenium.")
+
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    # بدون مجمع مشترك، ننشئ مجمعًا مؤقتًا حتى تعيد المحاولات استخدام نفس المتصفح
+    owns_pool = driver_pool is None
+    pool = DriverPool() if owns_pool else driver_pool
     retries = C.SCRAPER_RETRIES
     delay_seconds = C.SCRAPER_RETRY_DELAY_SECONDS
-    for attempt in range(retries):
-        driver = None
-        logger.info(f"--- Starting FULL scrape attempt {attempt + 1} of {retries} ---")
-        try:
-            if status_callback:
-                status_callback(
-                    f"محاولة ({attempt + 1}/{retries}): جاري إعداد المتصفح..."
-                )
-            driver = setup_driver()
-            if not driver:
-                raise RuntimeError("فشل إعداد المتصفح. لا يمكن المتابعة.")
-            if status_callback:
-                status_callback(
-                    f"محاولة ({attempt + 1}/{retries}): جاري الاتصال بموقع البنك..."
-                )
-            driver.get(C.CBE_DATA_URL)
-            WebDriverWait(driver, C.SCRAPER_TIMEOUT_SECONDS).until(
-                EC.presence_of_element_located((By.TAG_NAME, "h2"))
+    try:
+        for attempt in range(retries):
+            logger.info(
+                f"--- Starting FULL scrape attempt {attempt + 1} of {retries} ---"
             )
-            if status_callback:
-                status_callback(
-                    f"محاولة ({attempt + 1}/{retries}): تم الاتصال، جاري تحليل المحتوى..."
-                )
-            page_source = driver.page_source
-            verify_page_structure(page_source)
-            final_df = parse_cbe_html(page_source)
-            if final_df is not None and not final_df.empty:
-                db_session_date_str = db_manager.get_latest_session_date()
-                live_latest_date_str = final_df[C.SESSION_DATE_COLUMN_NAME].iloc[0]
-                if db_session_date_str and live_latest_date_str == db_session_date_str:
-                    if status_callback:
-                        status_callback("البيانات محدثة بالفعل. لا حاجة للحفظ.")
-                    time.sleep(2)
-                    return
+            try:
                 if status_callback:
                     status_callback(
-                        f"محاولة ({attempt + 1}/{retries}): تم العثور على بيانات جديدة، جاري الحفظ..."
+                        f"محاولة ({attempt + 1}/{retries}): جاري إعداد المتصفح..."
+                    )
+                with pool.lease() as driver:
+                    if not driver:
+                        raise RuntimeError("فشل إعداد المتصفح. لا يمكن المتابعة.")
+                    if status_callback:
+                        status_callback(
+                            f"محاولة ({attempt + 1}/{retries}): جاري الاتصال بموقع البنك..."
+                        )
+                    driver.get(url)
+                    WebDriverWait(driver, C.SCRAPER_TIMEOUT_SECONDS).until(
+                        EC.presence_of_element_located((By.TAG_NAME, "h2"))
                     )
-                db_manager.save_data(final_df)
+                    if status_callback:
+                        status_callback(
+                            f"محاولة ({attempt + 1}/{retries}): تم الاتصال، جاري تحليل المحتوى..."
+                        )
+                    page_source = driver.page_source
+                verify_page_structure(page_source)
+                if _process_verified_page(
+                    page_source, db_manager, status_callback, fetch_state
+                ):
+                    return
+            except Exception as e:  # يعالج كل الأخطاء بما فيها TimeoutException
+                logger.error(
+                    f"An unexpected error occurred during full scrape attempt {attempt + 1}: {e}",
+                    exc_info=True,
+                )
                 if status_callback:
-                    status_callback("اكتمل تحديث البيانات بنجاح!")
-                return
-        except Exception as e:  # هذا السطر يعالج كل الأخطاء بما فيها TimeoutException
-            logger.error(
-                f"An unexpected error occurred during full scrape attempt {attempt + 1}: {e}",
-                exc_info=True,
-            )
-            if status_callback:
-                status_callback(f"فشلت المحاولة {attempt + 1}: {e}")
-        finally:
-            if driver:
-                driver.quit()
-        if attempt < retries - 1:
-            if status_callback:
-                status_callback(f"ستتم إعادة المحاولة بعد {delay_seconds} ثانية...")
-            time.sleep(delay_seconds)
-    raise RuntimeError(
-        f"فشلت جميع المحاولات ({retries}) لجلب البيانات من البنك المركزي."
-    )
+                    status_callback(f"فشلت المحاولة {attempt + 1}: {e}")
+            if attempt < retries - 1:
+                if status_callback:
+                    status_callback(f"ستتم إعادة المحاولة بعد {delay_seconds} ثانية...")
+                time.sleep(delay_seconds)
+        raise RuntimeError(
+            f"فشلت جميع المحاولات ({retries}) لجلب البيانات من البنك المركزي."
+        )
+    finally:
+        if owns_pool:
+            pool.close()
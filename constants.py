@@ -10,21 +10,67 @@ TENOR_COLUMN_NAME = "tenor"
 YIELD_COLUMN_NAME = "yield"
 DATE_COLUMN_NAME = "scrape_date"
 SESSION_DATE_COLUMN_NAME = "session_date"
+SESSION_DATE_ISO_COLUMN_NAME = "session_date_iso"
+ROW_VERSION_COLUMN_NAME = "row_version"
+
+# --- Portfolio Columns ---
+FACE_VALUE_COLUMN_NAME = "face_value"
+PURCHASE_YIELD_COLUMN_NAME = "purchase_yield"
+PURCHASE_DATE_COLUMN_NAME = "purchase_date"
+HOLDING_DAYS_COLUMN_NAME = "holding_days"
 
 # --- Database ---
 DB_FILENAME = "cbe_historical_data.db"
 TABLE_NAME = "cbe_t_bills"
+SNAPSHOT_TABLE_NAME = "cbe_curve_snapshots"
+CURVE_TENORS = (91, 182, 273, 364)
+CURVE_INTERPOLATION_METHOD = "monotone_cubic"
+CURVE_CACHE_SIZE = 128
+DB_BUSY_TIMEOUT_SECONDS = 30.0
+DB_CACHED_STATEMENTS = 256
+DB_CACHE_SIZE_KIB = 16 * 1024
+DB_MMAP_SIZE_BYTES = 256 * 1024 * 1024
+DB_CACHE_TTL_SECONDS = 5.0
+FETCH_STATE_FILENAME = "cbe_fetch_state.json"
 
 # --- Web Scraping ---
 CBE_DATA_URL = "https://www.cbe.org.eg/ar/auctions/egp-t-bills"
 YIELD_ANCHOR_TEXT = "متوسط العائد المرجح"
 ACCEPTED_BIDS_KEYWORD = "المقبولة"
+HTML_PARSER_BACKEND = "bs4"  # "bs4" أو "lxml" (أسرع بكثير مع صفحات الأرشيف الكبيرة)
+# رابط صفحة نتائج عطاء يوم معين في الأرشيف، ويمكن تغييره من سطر الأوامر
+CBE_ARCHIVE_URL_TEMPLATE = CBE_DATA_URL + "?date={date:%Y-%m-%d}"
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
 
 # --- Web Scraping Controls ---
 SCRAPER_RETRIES = 3
 SCRAPER_RETRY_DELAY_SECONDS = 10
 SCRAPER_TIMEOUT_SECONDS = 60
+HTTP_TIMEOUT_SECONDS = 20
+DRIVER_POOL_SIZE = 1
+DRIVER_MAX_AGE_SECONDS = 30 * 60
+
+# --- Historical Backfill ---
+BACKFILL_CHECKPOINT_FILENAME = "backfill_checkpoint.json"
+BACKFILL_WORKERS = 4
+BACKFILL_REQUESTS_PER_SECOND = 2.0
+
+# --- Backtesting ---
+BACKTEST_HORIZON_DAYS = 364
+BACKTEST_CHUNK_SIZE = 64
+
+# --- Batch Pricing ---
+# عدد الصفوف في كل دفعة تُقرأ وتُسعّر وتُكتب (يحدد أقصى استهلاك للذاكرة)
+BATCH_PRICER_CHUNK_SIZE = 100_000
+
+# --- Pricing API ---
+PRICING_API_HOST = "127.0.0.1"
+PRICING_API_PORT = 8765
+# الطلبات التي تصل خلال هذه المدة تُسعّر معًا في استدعاء واحد؛ القيمة 0 تجمع
+# ما يصل في نفس دورة حلقة الأحداث دون إضافة أي تأخير للطلب المنفرد
+PRICING_API_BATCH_WINDOW_SECONDS = 0.0
+PRICING_API_MAX_BATCH_SIZE = 1024
+PRICING_API_MAX_BODY_BYTES = 1024 * 1024
 
 # --- Financial ---
 DAYS_IN_YEAR = 365.0
@@ -49,6 +95,8 @@ PRIMARY_CALCULATOR_TITLE = "🧮 حاسبة العائد الأساسية (ال
 SECONDARY_CALCULATOR_TITLE = "⚖️ حاسبة تحليل البيع في السوق الثانوي"
 HELP_TITLE = "💡 شرح ومساعدة (أسئلة شائعة)"
 AUTHOR_NAME = "Mohamed AL-QaTri"
+# عدد رسوم التطور التاريخي المحفوظة (لكل إصدار بيانات ومجموعة آجال)
+CHART_CACHE_MAX_ENTRIES = 32
 
 # --- Paths ---
 CSS_FILE_PATH = "css/style.css"
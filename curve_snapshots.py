@@ -0,0 +1,135 @@
+import argparse
+import logging
+import sqlite3
+from typing import List, Optional
+
+import constants as C
+
+logger = logging.getLogger(__name__)
+
+
+def yield_column(tenor: int) -> str:
+    return f"{C.YIELD_COLUMN_NAME}_{tenor}"
+
+
+def session_column(tenor: int) -> str:
+    return f"{C.SESSION_DATE_COLUMN_NAME}_{tenor}"
+
+
+def snapshot_columns() -> List[str]:
+    """Columns of the snapshot table, in order."""
+    columns = [C.SESSION_DATE_ISO_COLUMN_NAME, C.SESSION_DATE_COLUMN_NAME]
+    for tenor in C.CURVE_TENORS:
+        columns += [yield_column(tenor), session_column(tenor)]
+    return columns
+
+
+def create_snapshot_table(conn: sqlite3.Connection) -> None:
+    """
+    One row per auction session with the whole curve as of that session:
+    each tenor column holds the latest yield known on that date (tenors
+    auctioned on other days are carried forward) and the session it came
+    from.
+    """
+    tenor_columns = "".join(
+        f'"{yield_column(tenor)}" REAL, "{session_column(tenor)}" TEXT, '
+        for tenor in C.CURVE_TENORS
+    )
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS "{C.SNAPSHOT_TABLE_NAME}" (
+            "{C.SESSION_DATE_ISO_COLUMN_NAME}" TEXT PRIMARY KEY,
+            "{C.SESSION_DATE_COLUMN_NAME}" TEXT NOT NULL,
+            {tenor_columns.rstrip(", ")}
+        ) WITHOUT ROWID
+        """)
+
+
+def _snapshot_select_sql() -> str:
+    table, iso = C.TABLE_NAME, C.SESSION_DATE_ISO_COLUMN_NAME
+    selects, joins = [], []
+    for tenor in C.CURVE_TENORS:
+        alias = f"t{tenor}"
+        selects += [
+            f'{alias}."{C.YIELD_COLUMN_NAME}"',
+            f'{alias}."{C.SESSION_DATE_COLUMN_NAME}"',
+        ]
+        # بحث واحد في فهرس (المدة، تاريخ الجلسة) لكل مدة في كل جلسة
+        joins.append(f"""
+            LEFT JOIN "{table}" {alias} ON {alias}.rowid = (
+                SELECT rowid FROM "{table}"
+                WHERE "{C.TENOR_COLUMN_NAME}" = {tenor} AND "{iso}" <= d.iso
+                ORDER BY "{iso}" DESC, "{C.DATE_COLUMN_NAME}" DESC
+                LIMIT 1
+            )""")
+    return f"""
+        SELECT d.iso, (
+            SELECT "{C.SESSION_DATE_COLUMN_NAME}" FROM "{table}"
+            WHERE "{iso}" = d.iso LIMIT 1
+        ), {", ".join(selects)}
+        FROM (
+            SELECT DISTINCT "{iso}" AS iso FROM "{table}"
+            WHERE "{iso}" >= ?
+        ) d
+        {"".join(joins)}
+    """
+
+
+def refresh_snapshots(conn: sqlite3.Connection, since_iso: Optional[str]) -> int:
+    """
+    Recomputes the snapshots of every session on or after `since_iso`
+    (YYYY-MM-DD), or of all sessions when it is None. Later sessions are
+    included because they carry forward yields from earlier ones. Runs in
+    the caller's transaction.
+
+    Returns:
+        The number of snapshot rows written.
+    """
+    since_iso = since_iso or ""
+    conn.execute(
+        f'DELETE FROM "{C.SNAPSHOT_TABLE_NAME}" '
+        f'WHERE "{C.SESSION_DATE_ISO_COLUMN_NAME}" >= ?',
+        (since_iso,),
+    )
+    columns = ", ".join(f'"{col}"' for col in snapshot_columns())
+    cursor = conn.execute(
+        f'INSERT INTO "{C.SNAPSHOT_TABLE_NAME}" ({columns}) {_snapshot_select_sql()}',
+        (since_iso,),
+    )
+    return cursor.rowcount
+
+
+def rebuild_snapshots(conn: sqlite3.Connection) -> int:
+    """Rebuilds the whole snapshot table in one transaction."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        create_snapshot_table(conn)
+        written = refresh_snapshots(conn, None)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    logger.info(f"Rebuilt {written} yield-curve snapshots.")
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="إعادة بناء جدول لقطات منحنى العائد من بيانات العطاءات."
+    )
+    parser.add_argument("--db", default=C.DB_FILENAME, help="مسار ملف قاعدة البيانات.")
+    args = parser.parse_args(argv)
+
+    # db_migrations يستورد هذه الوحدة، لذلك يُستورد هنا فقط
+    from db_migrations import apply_migrations
+
+    logging.basicConfig(level=logging.INFO)
+    conn = sqlite3.connect(args.db)
+    try:
+        apply_migrations(conn)
+        print(f"Snapshots written: {rebuild_snapshots(conn)}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,165 +1,433 @@
 import sqlite3
+import threading
+from functools import cache
+import time
+import weakref
 import pandas as pd
 import os
 import logging
-from typing import Tuple, Optional
-import streamlit as st
+from typing import Dict, List, Tuple, Optional
 import pytz
 
 import constants as C
+from curve_snapshots import (
+    rebuild_snapshots,
+    refresh_snapshots,
+    session_column,
+    snapshot_columns,
+    yield_column,
+)
+from db_migrations import apply_migrations, iso_date_sql
 
 logger = logging.getLogger(__name__)
 
 
-@st.cache_resource
+@cache
 def get_db_manager(db_filename: str = C.DB_FILENAME) -> "DatabaseManager":
     """
     Factory function to get a cached instance of the DatabaseManager.
-    Using st.cache_resource ensures that the database connection and
-    manager are created only once per session.
+    The manager is created once per process and database file, without
+    importing Streamlit; the web app uses `streamlit_adapter.get_db_manager`.
     """
     return DatabaseManager(db_filename)
 
 
+class _PooledConnection(sqlite3.Connection):
+    """sqlite3.Connection subclass so pooled connections can be weakly tracked."""
+
+
 class DatabaseManager:
+    # تُطبق على كل اتصال جديد: وضع WAL يسمح بالقراءة أثناء الكتابة،
+    # و synchronous=NORMAL آمن مع WAL ويقلل عمليات المزامنة مع القرص
+    _PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA cache_size=-{C.DB_CACHE_SIZE_KIB}",
+        f"PRAGMA mmap_size={C.DB_MMAP_SIZE_BYTES}",
+        "PRAGMA temp_store=MEMORY",
+    )
+
     def __init__(self, db_filename: str = C.DB_FILENAME):
         """
         Initializes the DatabaseManager and ensures the database
         and its table are created.
         """
         self.db_filename = os.path.abspath(db_filename)
+        self._local = threading.local()
+        self._connections: "weakref.WeakSet[_PooledConnection]" = weakref.WeakSet()
+        self._connections_lock = threading.Lock()
+        self._generation = 0
+        self._write_columns = [
+            C.TENOR_COLUMN_NAME,
+            C.YIELD_COLUMN_NAME,
+            C.SESSION_DATE_COLUMN_NAME,
+            C.DATE_COLUMN_NAME,
+        ]
+        stored_columns = self._write_columns + [
+            C.SESSION_DATE_ISO_COLUMN_NAME,
+            C.ROW_VERSION_COLUMN_NAME,
+        ]
+        quoted_columns = ", ".join(f'"{col}"' for col in stored_columns)
+        # يُحسب التاريخ الموحد من نفس معامل تاريخ الجلسة داخل الاستعلام
+        session_param = f"?{self._write_columns.index(C.SESSION_DATE_COLUMN_NAME) + 1}"
+        placeholders = ", ".join(
+            [f"?{i}" for i in range(1, len(self._write_columns) + 1)]
+            + [iso_date_sql(session_param), f"?{len(self._write_columns) + 1}"]
+        )
+        assignments = ", ".join(f'"{col}" = excluded."{col}"' for col in stored_columns)
+        # بدون تحديد هدف للتعارض حتى يعمل مع أي مفتاح أساسي للجدول
+        self._upsert_sql = (
+            f'INSERT INTO "{C.TABLE_NAME}" ({quoted_columns}) VALUES ({placeholders}) '
+            f"ON CONFLICT DO UPDATE SET {assignments}"
+        )
+        # ذاكرة مشتركة على مستوى العملية، مفتاحها رقم إصدار البيانات
+        self._version_lock = threading.Lock()
+        self._known_version: Optional[int] = None
+        self._version_checked_at = 0.0
+        self._latest_cache: Optional[Tuple[int, Tuple]] = None
+        self._history_lock = threading.Lock()
+        self._history_df: Optional[pd.DataFrame] = None
+        self._history_watermark: Optional[int] = None
+        self._history_version: Optional[int] = None
+        self._snapshot_select_columns = ", ".join(
+            f'"{col}"' for col in snapshot_columns()
+        )
+        self.migration_report: List[Dict] = []
         self._init_db()
 
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Returns this thread's pooled connection, opening and tuning it on
+        first use. Connections stay open across calls, so SQLite's prepared
+        statement cache is reused, and are closed when their thread ends.
+        """
+        pooled = getattr(self._local, "pooled", None)
+        if pooled is not None and pooled[0] == self._generation:
+            return pooled[1]
+        conn = sqlite3.connect(
+            self.db_filename,
+            timeout=C.DB_BUSY_TIMEOUT_SECONDS,
+            check_same_thread=False,
+            cached_statements=C.DB_CACHED_STATEMENTS,
+            factory=_PooledConnection,
+        )
+        for pragma in self._PRAGMAS:
+            conn.execute(pragma)
+        self._local.pooled = (self._generation, conn)
+        with self._connections_lock:
+            self._connections.add(conn)
+        return conn
+
+    def close(self) -> None:
+        """
+        Closes every pooled connection. Closing the last connection lets
+        SQLite checkpoint the WAL back into the main database file.
+        """
+        with self._connections_lock:
+            self._generation += 1
+            connections = list(self._connections)
+            self._connections = weakref.WeakSet()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Error while closing a database connection: {e}")
+
     def _init_db(self) -> None:
         """
-        Initializes the database. Creates the table for T-bill data
-        if it doesn't already exist.
+        Initializes the database by applying any pending schema migrations
+        (see `db_migrations`). The applied steps and their timings are kept
+        in `migration_report`.
         """
         try:
-            with sqlite3.connect(self.db_filename) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    f"""
-                CREATE TABLE IF NOT EXISTS "{C.TABLE_NAME}" (
-                    "{C.TENOR_COLUMN_NAME}" INTEGER NOT NULL,
-                    "{C.YIELD_COLUMN_NAME}" REAL NOT NULL,
-                    "{C.SESSION_DATE_COLUMN_NAME}" TEXT NOT NULL,
-                    "{C.DATE_COLUMN_NAME}" DATETIME NOT NULL,
-                    PRIMARY KEY ("{C.TENOR_COLUMN_NAME}", "{C.SESSION_DATE_COLUMN_NAME}")
-                )
-                """
-                )
+            self.migration_report = apply_migrations(self._connection())
         except sqlite3.Error as e:
             logger.error(f"Database initialization failed: {e}", exc_info=True)
             raise
 
-    def save_data(self, df: pd.DataFrame) -> None:
+    def save_data(self, df: pd.DataFrame) -> Dict[str, int]:
         """
         Saves a DataFrame to the database using an "upsert" operation.
         If a record with the same primary key already exists, it's replaced.
+
+        Returns:
+            The number of rows `inserted` and `updated`.
+        """
+        return self.bulk_upsert(df)
+
+    def _rows_for_write(self, df: pd.DataFrame) -> list:
+        columns = []
+        for col in self._write_columns:
+            values = df[col]
+            if pd.api.types.is_datetime64_any_dtype(values):
+                values = values.astype(str)
+            columns.append(values.tolist())
+        return list(zip(*columns))
+
+    def bulk_upsert(self, df: pd.DataFrame) -> Dict[str, int]:
         """
-        df_to_save = df.copy()
-        if "session_date_dt" in df_to_save.columns:
-            df_to_save = df_to_save.drop(columns=["session_date_dt"])
+        Writes all rows with one prepared "INSERT ... ON CONFLICT DO UPDATE"
+        statement streamed through `executemany` inside a single explicit
+        transaction. Every row written is stamped with the next row version,
+        and the yield-curve snapshots from the earliest affected session
+        onwards are refreshed in the same transaction.
 
+        Returns:
+            The number of rows `inserted` and `updated`.
+        """
+        counts = {"inserted": 0, "updated": 0}
+        missing = [col for col in self._write_columns if col not in df.columns]
+        if missing:
+            logger.error(f"Cannot save data: missing columns {missing}.")
+            return counts
+
+        rows = self._rows_for_write(df)
+        count_sql = f'SELECT COUNT(*) FROM "{C.TABLE_NAME}"'
+        version_sql = (
+            f'SELECT COALESCE(MAX("{C.ROW_VERSION_COLUMN_NAME}"), 0) + 1 '
+            f'FROM "{C.TABLE_NAME}"'
+        )
         try:
-            with sqlite3.connect(self.db_filename) as conn:
-                df_to_save.to_sql(
-                    C.TABLE_NAME,
-                    conn,
-                    if_exists="append",
-                    index=False,
-                    method=self._upsert,
-                )
-            logger.info(f"{len(df_to_save)} records processed for saving.")
+            with self._connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    before = conn.execute(count_sql).fetchone()[0]
+                    version = conn.execute(version_sql).fetchone()[0]
+                    conn.executemany(
+                        self._upsert_sql, (row + (version,) for row in rows)
+                    )
+                    earliest_session = conn.execute(
+                        f'SELECT MIN("{C.SESSION_DATE_ISO_COLUMN_NAME}") '
+                        f'FROM "{C.TABLE_NAME}" WHERE "{C.ROW_VERSION_COLUMN_NAME}" = ?',
+                        (version,),
+                    ).fetchone()[0]
+                    if earliest_session is not None:
+                        refresh_snapshots(conn, earliest_session)
+                    after = conn.execute(count_sql).fetchone()[0]
+                    conn.commit()
+                except sqlite3.Error:
+                    conn.rollback()
+                    raise
+            self._invalidate_caches()
+            counts["inserted"] = after - before
+            counts["updated"] = len(rows) - counts["inserted"]
+            logger.info(
+                f"{len(rows)} records processed for saving: "
+                f"{counts['inserted']} inserted, {counts['updated']} updated."
+            )
         except sqlite3.Error as e:
             logger.error(f"Failed to save data to database: {e}", exc_info=True)
+        return counts
+
+    def data_version(self) -> int:
+        """
+        Returns the current data version: the row version of the latest
+        write (0 for an empty table). It changes whenever `save_data` writes
+        rows, from this process or any other, and costs one index seek.
+        """
+        with self._connection() as conn:
+            return conn.execute(
+                f'SELECT COALESCE(MAX("{C.ROW_VERSION_COLUMN_NAME}"), 0) '
+                f'FROM "{C.TABLE_NAME}"'
+            ).fetchone()[0]
 
-    def _upsert(self, table, conn, keys, data_iter):
+    def current_version(self) -> int:
         """
-        Custom "upsert" method for pandas to_sql.
-        Uses "INSERT OR REPLACE" to handle conflicts with the primary key.
+        The data version as last seen, re-read from the database at most
+        once per `DB_CACHE_TTL_SECONDS`. Writes made through this manager
+        invalidate it immediately; writes by other processes show up after
+        at most one TTL.
         """
-        # --- بداية الإصلاح ---
-        # The 'conn' object passed by pandas is already a cursor, so we use it directly.
-        cursor = conn
-        # --- نهاية الإصلاح ---
-        for data in data_iter:
-            placeholders = ", ".join("?" * len(data))
-            sql = f"INSERT OR REPLACE INTO {table.name} ({', '.join(keys)}) VALUES ({placeholders})"
-            cursor.execute(sql, data)
+        with self._version_lock:
+            now = time.monotonic()
+            if (
+                self._known_version is None
+                or now - self._version_checked_at >= C.DB_CACHE_TTL_SECONDS
+            ):
+                self._known_version = self.data_version()
+                self._version_checked_at = now
+            return self._known_version
+
+    def _invalidate_caches(self) -> None:
+        with self._version_lock:
+            self._known_version = None
 
     def load_latest_data(
         self,
     ) -> Tuple[pd.DataFrame, Tuple[Optional[str], Optional[str]]]:
         """
-        Loads the most recent record for each T-bill tenor.
+        Loads the most recent record (by session date) for each T-bill tenor.
         Also returns the timestamp of the last data scrape, converted to Cairo time.
+
+        The result is cached for the whole process and keyed by the data
+        version, so concurrent sessions share one query per write. The
+        returned frame is shared between callers and must not be modified
+        in place.
         """
         try:
-            with sqlite3.connect(self.db_filename) as conn:
-                query = f"""
-                WITH RankedData AS (
-                    SELECT *,
-                           ROW_NUMBER() OVER(PARTITION BY "{C.TENOR_COLUMN_NAME}" ORDER BY "{C.DATE_COLUMN_NAME}" DESC) as rn,
-                           MAX("{C.DATE_COLUMN_NAME}") OVER () as max_scrape_date
-                    FROM "{C.TABLE_NAME}"
-                )
-                SELECT "{C.TENOR_COLUMN_NAME}", "{C.YIELD_COLUMN_NAME}", "{C.SESSION_DATE_COLUMN_NAME}", max_scrape_date
-                FROM RankedData
-                WHERE rn = 1;
-                """
-                df = pd.read_sql_query(query, conn)
+            version = self.current_version()
+            cached = self._latest_cache
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            result = self._read_latest_data()
+        except sqlite3.Error as e:
+            logger.warning(
+                f"Could not load latest data (table might be empty): {e}", exc_info=True
+            )
+            return pd.DataFrame(), ("البيانات الأولية", None)
+        self._latest_cache = (version, result)
+        return result
 
-                if not df.empty:
-                    last_update_dt_utc = pd.to_datetime(df["max_scrape_date"].iloc[0])
-                    cairo_tz = pytz.timezone(C.TIMEZONE)
+    def _read_latest_data(
+        self,
+    ) -> Tuple[pd.DataFrame, Tuple[Optional[str], Optional[str]]]:
+        """
+        Reads the latest curve from the newest row of the snapshot table
+        and unpivots it to one row per tenor.
+        """
+        with self._connection() as conn:
+            snapshot = conn.execute(
+                f'SELECT {self._snapshot_select_columns} FROM "{C.SNAPSHOT_TABLE_NAME}" '
+                f'ORDER BY "{C.SESSION_DATE_ISO_COLUMN_NAME}" DESC LIMIT 1'
+            ).fetchone()
+            max_scrape_date = conn.execute(
+                f'SELECT MAX("{C.DATE_COLUMN_NAME}") FROM "{C.TABLE_NAME}"'
+            ).fetchone()[0]
+            rows = []
+            if snapshot is not None:
+                values = dict(zip(snapshot_columns(), snapshot))
+                rows = [
+                    (tenor, values[yield_column(tenor)], values[session_column(tenor)])
+                    for tenor in C.CURVE_TENORS
+                    if values[yield_column(tenor)] is not None
+                ]
+            df = pd.DataFrame(
+                rows,
+                columns=[
+                    C.TENOR_COLUMN_NAME,
+                    C.YIELD_COLUMN_NAME,
+                    C.SESSION_DATE_COLUMN_NAME,
+                ],
+            )
+            df["max_scrape_date"] = max_scrape_date
 
-                    if last_update_dt_utc.tzinfo is None:
-                        last_update_dt_utc = last_update_dt_utc.tz_localize("UTC")
+            if not df.empty:
+                last_update_dt_utc = pd.to_datetime(df["max_scrape_date"].iloc[0])
+                cairo_tz = pytz.timezone(C.TIMEZONE)
 
-                    last_update_dt_cairo = last_update_dt_utc.tz_convert(cairo_tz)
+                if last_update_dt_utc.tzinfo is None:
+                    last_update_dt_utc = last_update_dt_utc.tz_localize("UTC")
 
-                    last_update_date = last_update_dt_cairo.strftime("%Y-%m-%d")
-                    last_update_time = last_update_dt_cairo.strftime("%I:%M %p")
+                last_update_dt_cairo = last_update_dt_utc.tz_convert(cairo_tz)
 
-                    df = df.drop(columns=["max_scrape_date"])
-                    return df, (last_update_date, last_update_time)
+                last_update_date = last_update_dt_cairo.strftime("%Y-%m-%d")
+                last_update_time = last_update_dt_cairo.strftime("%I:%M %p")
+
+                df = df.drop(columns=["max_scrape_date"])
+                return df, (last_update_date, last_update_time)
 
-                return pd.DataFrame(), ("البيانات الأولية", None)
-        except sqlite3.Error as e:
-            logger.warning(
-                f"Could not load latest data (table might be empty): {e}", exc_info=True
-            )
             return pd.DataFrame(), ("البيانات الأولية", None)
 
-    def load_all_historical_data(self) -> pd.DataFrame:
+    def load_curve_snapshots(self) -> pd.DataFrame:
         """
-        Loads all historical data from the database for charting purposes.
+        Loads the yield-curve snapshots: one row per auction session, oldest
+        first, with the yield of every tenor as of that session in the
+        `yield_<tenor>` columns and its source session in `session_date_<tenor>`.
         """
         try:
-            with sqlite3.connect(self.db_filename) as conn:
-                query = f'SELECT * FROM "{C.TABLE_NAME}"'
-                df = pd.read_sql_query(query, conn)
-                return df.sort_values(by=C.DATE_COLUMN_NAME, ascending=False)
+            with self._connection() as conn:
+                return pd.read_sql_query(
+                    f'SELECT {self._snapshot_select_columns} FROM "{C.SNAPSHOT_TABLE_NAME}" '
+                    f'ORDER BY "{C.SESSION_DATE_ISO_COLUMN_NAME}"',
+                    conn,
+                )
         except sqlite3.Error as e:
-            logger.error(f"Failed to load historical data: {e}", exc_info=True)
+            logger.error(f"Failed to load curve snapshots: {e}", exc_info=True)
             return pd.DataFrame()
 
+    def rebuild_snapshots(self) -> int:
+        """Recomputes every yield-curve snapshot from the auction rows."""
+        return rebuild_snapshots(self._connection())
+
+    def load_historical_data_since(
+        self, watermark: Optional[int] = None
+    ) -> Tuple[pd.DataFrame, Optional[int]]:
+        """
+        Loads only the rows written after `watermark` (a row version), or
+        every row when it is None. Served by the row version index, so the
+        cost depends on the size of the change, not of the history.
+
+        Returns:
+            The changed rows and the watermark to pass on the next call.
+
+        Raises:
+            sqlite3.Error: If the query fails.
+        """
+        columns = ", ".join(f'"{col}"' for col in self._write_columns)
+        query = (
+            f'SELECT {columns}, "{C.ROW_VERSION_COLUMN_NAME}" FROM "{C.TABLE_NAME}"'
+        )
+        params: Tuple = ()
+        if watermark is not None:
+            query += f' WHERE "{C.ROW_VERSION_COLUMN_NAME}" > ?'
+            params = (watermark,)
+        with self._connection() as conn:
+            df = pd.read_sql_query(query, conn, params=params)
+        if not df.empty:
+            watermark = int(df[C.ROW_VERSION_COLUMN_NAME].max())
+        return df.drop(columns=[C.ROW_VERSION_COLUMN_NAME]), watermark
+
+    def load_all_historical_data(self) -> pd.DataFrame:
+        """
+        Loads all historical data from the database for charting purposes.
+
+        The full history is read once per process; later calls only fetch
+        the rows written since then and merge them in, and skip the database
+        entirely while the data version is unchanged. The returned frame is
+        shared between callers and must not be modified in place.
+        """
+        with self._history_lock:
+            try:
+                version = self.current_version()
+                if self._history_df is not None and self._history_version == version:
+                    return self._history_df
+                delta, watermark = self.load_historical_data_since(
+                    self._history_watermark
+                )
+            except sqlite3.Error as e:
+                logger.error(f"Failed to load historical data: {e}", exc_info=True)
+                return (
+                    self._history_df if self._history_df is not None else pd.DataFrame()
+                )
+            if self._history_df is None or not delta.empty:
+                merged = (
+                    delta
+                    if self._history_df is None
+                    else pd.concat([self._history_df, delta], ignore_index=True)
+                )
+                # الصفوف المحدثة تحل محل نسختها القديمة في الذاكرة
+                merged = merged.drop_duplicates(
+                    subset=[C.TENOR_COLUMN_NAME, C.SESSION_DATE_COLUMN_NAME],
+                    keep="last",
+                )
+                self._history_df = merged.sort_values(
+                    by=C.DATE_COLUMN_NAME, ascending=False, ignore_index=True
+                )
+                self._history_watermark = watermark
+            self._history_version = version
+            return self._history_df
+
     def get_latest_session_date(self) -> Optional[str]:
         """
-        Gets the most recent session date from the database based on the date string.
-        Assumes date format is 'DD-MM-YYYY'.
+        Gets the most recent session date from the database, read from the
+        end of the ISO session date index.
         """
         try:
-            with sqlite3.connect(self.db_filename) as conn:
+            with self._connection() as conn:
                 query = f"""
                 SELECT "{C.SESSION_DATE_COLUMN_NAME}"
                 FROM "{C.TABLE_NAME}"
-                ORDER BY
-                    SUBSTR("{C.SESSION_DATE_COLUMN_NAME}", 7, 4) DESC,
-                    SUBSTR("{C.SESSION_DATE_COLUMN_NAME}", 4, 2) DESC,
-                    SUBSTR("{C.SESSION_DATE_COLUMN_NAME}", 1, 2) DESC
+                ORDER BY "{C.SESSION_DATE_ISO_COLUMN_NAME}" DESC
                 LIMIT 1;
                 """
                 cursor = conn.cursor()
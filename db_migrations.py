@@ -0,0 +1,240 @@
+import logging
+import sqlite3
+import time
+from typing import Callable, Dict, List, NamedTuple
+
+import constants as C
+from curve_snapshots import create_snapshot_table, refresh_snapshots
+
+logger = logging.getLogger(__name__)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+def iso_date_sql(expr: str) -> str:
+    """
+    SQL expression turning a 'DD/MM/YYYY' or 'DD-MM-YYYY' session date into
+    a sortable 'YYYY-MM-DD' string, or NULL for anything else (e.g. 'N/A').
+    """
+    return (
+        f"CASE WHEN {expr} GLOB '[0-9][0-9]?[0-9][0-9]?[0-9][0-9][0-9][0-9]' "
+        f"THEN substr({expr}, 7, 4) || '-' || substr({expr}, 4, 2) || '-' "
+        f"|| substr({expr}, 1, 2) END"
+    )
+
+
+_BASE_COLUMNS = (
+    C.TENOR_COLUMN_NAME,
+    C.YIELD_COLUMN_NAME,
+    C.SESSION_DATE_COLUMN_NAME,
+    C.DATE_COLUMN_NAME,
+)
+
+
+def _create_table_sql(table: str) -> str:
+    return f"""
+    CREATE TABLE IF NOT EXISTS "{table}" (
+        "{C.TENOR_COLUMN_NAME}" INTEGER NOT NULL,
+        "{C.YIELD_COLUMN_NAME}" REAL NOT NULL,
+        "{C.SESSION_DATE_COLUMN_NAME}" TEXT NOT NULL,
+        "{C.DATE_COLUMN_NAME}" DATETIME NOT NULL,
+        PRIMARY KEY ("{C.TENOR_COLUMN_NAME}", "{C.SESSION_DATE_COLUMN_NAME}")
+    )
+    """
+
+
+def _table_info(conn: sqlite3.Connection, table: str) -> List[tuple]:
+    return conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+
+
+def _create_base_table(conn: sqlite3.Connection) -> None:
+    conn.execute(_create_table_sql(C.TABLE_NAME))
+
+
+def _rebuild_primary_key(conn: sqlite3.Connection) -> None:
+    """
+    Older databases were created with PRIMARY KEY (scrape_date, tenor), so
+    every scrape of the same auction added a duplicate row. SQLite cannot
+    alter a primary key, so the table is copied into the current schema,
+    keeping only the latest scrape of each (tenor, session_date).
+    """
+    table = C.TABLE_NAME
+    primary_key = [
+        row[1]
+        for row in sorted(_table_info(conn, table), key=lambda row: row[5])
+        if row[5]
+    ]
+    if primary_key == [C.TENOR_COLUMN_NAME, C.SESSION_DATE_COLUMN_NAME]:
+        return
+
+    rebuilt = f"{table}__rebuild"
+    columns = ", ".join(f'"{col}"' for col in _BASE_COLUMNS)
+    conn.execute(f'DROP TABLE IF EXISTS "{rebuilt}"')
+    conn.execute(_create_table_sql(rebuilt))
+    conn.execute(f"""
+        INSERT INTO "{rebuilt}" ({columns})
+        SELECT {columns} FROM (
+            SELECT *, ROW_NUMBER() OVER (
+                PARTITION BY "{C.TENOR_COLUMN_NAME}", "{C.SESSION_DATE_COLUMN_NAME}"
+                ORDER BY "{C.DATE_COLUMN_NAME}" DESC
+            ) AS rn
+            FROM "{table}"
+        )
+        WHERE rn = 1
+        """)
+    dropped = (
+        conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+        - conn.execute(f'SELECT COUNT(*) FROM "{rebuilt}"').fetchone()[0]
+    )
+    conn.execute(f'DROP TABLE "{table}"')
+    conn.execute(f'ALTER TABLE "{rebuilt}" RENAME TO "{table}"')
+    logger.info(
+        f"Rebuilt '{table}' with PRIMARY KEY (tenor, session_date); "
+        f"{dropped} duplicate scrapes dropped."
+    )
+
+
+def _add_session_date_iso(conn: sqlite3.Connection) -> None:
+    """
+    Adds and backfills the sortable `session_date_iso` column, and creates
+    the indexes behind the latest-session and latest-per-tenor lookups.
+    """
+    table = C.TABLE_NAME
+    iso_col = C.SESSION_DATE_ISO_COLUMN_NAME
+    session_col = f'"{C.SESSION_DATE_COLUMN_NAME}"'
+    if iso_col not in {row[1] for row in _table_info(conn, table)}:
+        conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{iso_col}" TEXT')
+    conn.execute(
+        f'UPDATE "{table}" SET "{iso_col}" = {iso_date_sql(session_col)} '
+        f'WHERE "{iso_col}" IS NULL'
+    )
+    # يغطي فهرس (المدة، تاريخ الجلسة) قراءة أحدث عائد لكل مدة دون الرجوع للجدول
+    conn.execute(
+        f'CREATE INDEX IF NOT EXISTS "idx_{table}_tenor_session" ON "{table}" '
+        f'("{C.TENOR_COLUMN_NAME}", "{iso_col}", "{C.DATE_COLUMN_NAME}", '
+        f'"{C.YIELD_COLUMN_NAME}", "{C.SESSION_DATE_COLUMN_NAME}")'
+    )
+    conn.execute(
+        f'CREATE INDEX IF NOT EXISTS "idx_{table}_session" ON "{table}" '
+        f'("{iso_col}", "{C.SESSION_DATE_COLUMN_NAME}")'
+    )
+    conn.execute(
+        f'CREATE INDEX IF NOT EXISTS "idx_{table}_scrape_date" ON "{table}" '
+        f'("{C.DATE_COLUMN_NAME}")'
+    )
+
+
+def _add_row_version(conn: sqlite3.Connection) -> None:
+    """
+    Adds `row_version`, the number of the write that last touched a row.
+    It is the watermark for incremental reads: rows written after version
+    N are exactly those with `row_version > N`.
+    """
+    table = C.TABLE_NAME
+    version_col = C.ROW_VERSION_COLUMN_NAME
+    if version_col not in {row[1] for row in _table_info(conn, table)}:
+        conn.execute(
+            f'ALTER TABLE "{table}" ADD COLUMN "{version_col}" '
+            "INTEGER NOT NULL DEFAULT 0"
+        )
+    conn.execute(
+        f'CREATE INDEX IF NOT EXISTS "idx_{table}_row_version" ON "{table}" '
+        f'("{version_col}")'
+    )
+
+
+def _add_curve_snapshots(conn: sqlite3.Connection) -> None:
+    create_snapshot_table(conn)
+    refresh_snapshots(conn, None)
+
+
+# القائمة مرتبة ولا يُعدل ترحيل تم نشره؛ أي تغيير جديد يُضاف كترحيل برقم أعلى
+MIGRATIONS: List[Migration] = [
+    Migration(1, "create_base_table", _create_base_table),
+    Migration(2, "rebuild_primary_key", _rebuild_primary_key),
+    Migration(3, "add_session_date_iso", _add_session_date_iso),
+    Migration(4, "add_row_version", _add_row_version),
+    Migration(5, "add_curve_snapshots", _add_curve_snapshots),
+]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def apply_migrations(
+    conn: sqlite3.Connection, migrations: List[Migration] = MIGRATIONS
+) -> List[Dict]:
+    """
+    Brings the database up to the latest schema version recorded in
+    `PRAGMA user_version`.
+
+    Each pending migration runs in its own write transaction together with
+    the version bump, so a failure leaves the database at the previous
+    version. The version is re-read after taking the write lock, which makes
+    concurrent startups safe: only one process applies a given migration.
+
+    Returns:
+        One entry per applied migration with its `version`, `name` and
+        `seconds`; empty when the schema was already current.
+    """
+    report = []
+    latest = migrations[-1].version if migrations else 0
+    current = schema_version(conn)
+    if current > latest:
+        logger.warning(
+            f"Database schema version {current} is newer than this code "
+            f"supports ({latest}); no migrations applied."
+        )
+        return report
+
+    for migration in migrations:
+        if migration.version <= current:
+            continue
+        started = time.perf_counter()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            current = schema_version(conn)
+            if migration.version <= current:
+                conn.rollback()
+                continue
+            migration.apply(conn)
+            conn.execute(f"PRAGMA user_version = {int(migration.version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error(
+                f"Migration {migration.version} ({migration.name}) failed; "
+                f"schema left at version {current}.",
+                exc_info=True,
+            )
+            raise
+        current = migration.version
+        elapsed = time.perf_counter() - started
+        report.append(
+            {"version": migration.version, "name": migration.name, "seconds": elapsed}
+        )
+        logger.info(
+            f"Applied migration {migration.version} ({migration.name}) "
+            f"in {elapsed * 1000:.1f} ms."
+        )
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    connection = sqlite3.connect(C.DB_FILENAME)
+    try:
+        applied = apply_migrations(connection)
+        print(f"Schema version: {schema_version(connection)}")
+        for entry in applied:
+            print(
+                f"  {entry['version']:>3} {entry['name']:<30} "
+                f"{entry['seconds'] * 1000:.1f} ms"
+            )
+    finally:
+        connection.close()
@@ -0,0 +1,285 @@
+import logging
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+import constants as C
+from yield_curve import curve_for_session
+
+logger = logging.getLogger(__name__)
+
+_COLUMN_DTYPES = {
+    "holding_id": np.int64,
+    C.FACE_VALUE_COLUMN_NAME: np.float64,
+    C.PURCHASE_YIELD_COLUMN_NAME: np.float64,
+    C.TENOR_COLUMN_NAME: np.int32,
+    C.PURCHASE_DATE_COLUMN_NAME: "datetime64[D]",
+    "purchase_price": np.float64,
+    "maturity_date": "datetime64[D]",
+}
+
+
+def _to_day_array(dates: Any) -> np.ndarray:
+    """Converts dates (strings, datetimes, Series...) to a datetime64[D] array."""
+    return np.asarray(pd.to_datetime(np.atleast_1d(dates)), dtype="datetime64[D]")
+
+
+def _today() -> np.datetime64:
+    return np.datetime64(pd.Timestamp.now(tz=C.TIMEZONE).date(), "D")
+
+
+class Portfolio:
+    """
+    A ledger of real T-bill holdings stored in array-backed columns.
+
+    Holdings live in pre-allocated NumPy arrays (one per column) that grow
+    geometrically, so adding or removing holdings never rebuilds the book:
+    removals move the last row into the freed slot and the running totals
+    are adjusted by the delta only. Valuation methods run as single
+    vectorized passes over the active rows.
+    """
+
+    def __init__(
+        self,
+        tax_rate: float = C.DEFAULT_TAX_RATE_PERCENT,
+        initial_capacity: int = 1024,
+    ):
+        if not 0 <= tax_rate <= 100:
+            raise ValueError("Tax rate must be between 0 and 100.")
+        self.tax_rate = tax_rate
+        self._size = 0
+        self._next_id = 0
+        self._row_of: Dict[int, int] = {}
+        self._columns = {
+            name: np.empty(max(1, initial_capacity), dtype=dtype)
+            for name, dtype in _COLUMN_DTYPES.items()
+        }
+        self._total_face_value = 0.0
+        self._total_cost = 0.0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _column(self, name: str) -> np.ndarray:
+        return self._columns[name][: self._size]
+
+    def _ensure_capacity(self, required: int) -> None:
+        capacity = len(self._columns["holding_id"])
+        if required <= capacity:
+            return
+        new_capacity = max(required, capacity * 2)
+        for name, column in self._columns.items():
+            grown = np.empty(new_capacity, dtype=column.dtype)
+            grown[: self._size] = column[: self._size]
+            self._columns[name] = grown
+
+    @property
+    def total_face_value(self) -> float:
+        return self._total_face_value
+
+    @property
+    def total_cost(self) -> float:
+        return self._total_cost
+
+    @property
+    def total_gross_return(self) -> float:
+        return self._total_face_value - self._total_cost
+
+    @property
+    def total_tax_liability(self) -> float:
+        """Tax due at maturity on the gross return of all holdings."""
+        return self.total_gross_return * (self.tax_rate / 100.0)
+
+    def add_holdings(
+        self,
+        face_value: Any,
+        purchase_yield: Any,
+        tenor: Any,
+        purchase_date: Any,
+    ) -> np.ndarray:
+        """
+        Appends holdings to the ledger. Arguments may be scalars or
+        array-likes and are broadcast together.
+
+        Returns:
+            The ids assigned to the new holdings, in input order.
+        """
+        face_value, purchase_yield, tenor, purchase_date = np.broadcast_arrays(
+            np.asarray(face_value, dtype=np.float64),
+            np.asarray(purchase_yield, dtype=np.float64),
+            np.asarray(tenor, dtype=np.int64),
+            _to_day_array(purchase_date),
+        )
+        face_value, purchase_yield, tenor, purchase_date = (
+            np.ravel(arr) for arr in (face_value, purchase_yield, tenor, purchase_date)
+        )
+        if not (
+            (face_value > 0).all() and (purchase_yield > 0).all() and (tenor > 0).all()
+        ):
+            raise ValueError("Face value, yield and tenor must all be positive.")
+        if np.isnat(purchase_date).any():
+            raise ValueError("Every holding needs a valid purchase date.")
+
+        count = face_value.size
+        start, end = self._size, self._size + count
+        self._ensure_capacity(end)
+
+        ids = np.arange(self._next_id, self._next_id + count, dtype=np.int64)
+        purchase_price = face_value / (
+            1 + (purchase_yield / 100.0 * tenor / C.DAYS_IN_YEAR)
+        )
+        new_rows = {
+            "holding_id": ids,
+            C.FACE_VALUE_COLUMN_NAME: face_value,
+            C.PURCHASE_YIELD_COLUMN_NAME: purchase_yield,
+            C.TENOR_COLUMN_NAME: tenor,
+            C.PURCHASE_DATE_COLUMN_NAME: purchase_date,
+            "purchase_price": purchase_price,
+            "maturity_date": purchase_date + tenor.astype("timedelta64[D]"),
+        }
+        for name, values in new_rows.items():
+            self._columns[name][start:end] = values
+
+        self._row_of.update(zip(ids.tolist(), range(start, end)))
+        self._size = end
+        self._next_id += count
+        self._total_face_value += float(face_value.sum())
+        self._total_cost += float(purchase_price.sum())
+        logger.debug(f"Added {count} holdings; portfolio size is now {end}.")
+        return ids
+
+    def add_holding(
+        self, face_value: float, purchase_yield: float, tenor: int, purchase_date: Any
+    ) -> int:
+        """Appends a single holding and returns its id."""
+        return int(
+            self.add_holdings(face_value, purchase_yield, tenor, purchase_date)[0]
+        )
+
+    def remove_holdings(self, holding_ids: Any) -> int:
+        """
+        Removes holdings by id in O(1) per holding. Unknown ids are skipped.
+
+        Returns:
+            The number of holdings actually removed.
+        """
+        removed = 0
+        for holding_id in np.atleast_1d(holding_ids).tolist():
+            row = self._row_of.pop(int(holding_id), None)
+            if row is None:
+                logger.warning(f"Holding id {holding_id} not found; skipping.")
+                continue
+            self._total_face_value -= float(
+                self._columns[C.FACE_VALUE_COLUMN_NAME][row]
+            )
+            self._total_cost -= float(self._columns["purchase_price"][row])
+
+            last = self._size - 1
+            if row != last:
+                for column in self._columns.values():
+                    column[row] = column[last]
+                self._row_of[int(self._columns["holding_id"][row])] = row
+            self._size = last
+            removed += 1
+        return removed
+
+    def to_frame(self) -> pd.DataFrame:
+        """Returns a copy of the holdings as a DataFrame indexed by holding id."""
+        df = pd.DataFrame({name: self._column(name).copy() for name in self._columns})
+        return df.set_index("holding_id")
+
+    def accrued_return(self, as_of: Optional[Any] = None) -> pd.Series:
+        """
+        Gross return earned so far by each holding, accruing the discount at
+        the purchase yield until `as_of` (capped at maturity).
+        """
+        as_of = _today() if as_of is None else _to_day_array(as_of)[0]
+        days_held = np.clip(
+            (as_of - self._column(C.PURCHASE_DATE_COLUMN_NAME)).astype(np.int64),
+            0,
+            self._column(C.TENOR_COLUMN_NAME),
+        )
+        accrued = (
+            self._column("purchase_price")
+            * (self._column(C.PURCHASE_YIELD_COLUMN_NAME) / 100.0)
+            * days_held
+            / C.DAYS_IN_YEAR
+        )
+        return pd.Series(
+            accrued, index=pd.Index(self._column("holding_id"), name="holding_id")
+        )
+
+    def mark_to_market(
+        self,
+        curve_df: pd.DataFrame,
+        as_of: Optional[Any] = None,
+        method: str = C.CURVE_INTERPOLATION_METHOD,
+    ) -> pd.DataFrame:
+        """
+        Values every holding against a yield curve, typically the frame
+        returned by `DatabaseManager.load_latest_data`.
+
+        The market yield for each holding's remaining days is read from the
+        session's `YieldCurve` (see `curve_for_session`), so the ledger
+        values a bill exactly as the batch pricer and the pricing API do.
+        Matured holdings are valued at face value.
+
+        Returns:
+            A DataFrame indexed by holding id with `remaining_days`,
+            `market_yield`, `market_value`, `accrued_return` and
+            `unrealized_gain` (market value minus purchase price).
+        """
+        if curve_df.empty:
+            raise ValueError("Cannot mark to market against an empty yield curve.")
+        as_of = _today() if as_of is None else _to_day_array(as_of)[0]
+
+        curve = curve_for_session(curve_df, method)
+        remaining_days = np.maximum(
+            (self._column("maturity_date") - as_of).astype(np.int64), 0
+        )
+        market_yield = np.asarray(curve.yields_for(remaining_days), dtype=np.float64)
+        face_value = self._column(C.FACE_VALUE_COLUMN_NAME)
+        market_value = face_value / (
+            1 + (market_yield / 100.0 * remaining_days / C.DAYS_IN_YEAR)
+        )
+
+        accrued = self.accrued_return(as_of)
+        return pd.DataFrame(
+            {
+                "remaining_days": remaining_days,
+                "market_yield": market_yield,
+                "market_value": market_value,
+                "accrued_return": accrued.to_numpy(),
+                "unrealized_gain": market_value - self._column("purchase_price"),
+            },
+            index=accrued.index,
+        )
+
+    def maturity_ladder(self, freq: str = "M") -> pd.DataFrame:
+        """
+        Aggregates face value, gross return and tax due per maturity period.
+
+        Args:
+            freq: A pandas period alias such as "M" (monthly) or "W" (weekly).
+
+        Returns:
+            A DataFrame indexed by maturity period, sorted chronologically.
+        """
+        face_value = self._column(C.FACE_VALUE_COLUMN_NAME)
+        gross_return = face_value - self._column("purchase_price")
+        periods = pd.PeriodIndex(self._column("maturity_date"), freq=freq)
+        ladder = (
+            pd.DataFrame(
+                {
+                    "holdings": np.ones(self._size, dtype=np.int64),
+                    C.FACE_VALUE_COLUMN_NAME: face_value,
+                    "gross_return": gross_return,
+                    "tax_due": gross_return * (self.tax_rate / 100.0),
+                },
+                index=pd.Index(periods, name="maturity_period"),
+            )
+            .groupby(level=0)
+            .sum()
+        )
+        return ladder.sort_index()
@@ -0,0 +1,520 @@
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import sys
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+# إضافة المسار الحالي للسماح بالاستيراد المحلي
+sys.path.append(os.getcwd())
+
+import constants as C  # noqa: E402
+from calculations import (  # noqa: E402
+    analyze_secondary_sale_batch,
+    calculate_primary_yield_batch,
+)
+from db_manager import DatabaseManager, get_db_manager  # noqa: E402
+from utils import setup_logging  # noqa: E402
+from yield_curve import YieldCurve, curve_for_session  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+# الحقول المطلوبة والاختيارية لكل نوع من طلبات التسعير؛ العائد المحذوف يؤخذ من المنحنى
+QUOTE_FIELDS = {
+    "primary": (
+        (C.FACE_VALUE_COLUMN_NAME, C.TENOR_COLUMN_NAME),
+        (C.YIELD_COLUMN_NAME, "tax_rate"),
+    ),
+    "secondary": (
+        (
+            C.FACE_VALUE_COLUMN_NAME,
+            C.PURCHASE_YIELD_COLUMN_NAME,
+            C.TENOR_COLUMN_NAME,
+            C.HOLDING_DAYS_COLUMN_NAME,
+        ),
+        ("market_yield", "tax_rate"),
+    ),
+}
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    501: "Not Implemented",
+    503: "Service Unavailable",
+}
+
+
+class ApiError(Exception):
+    """A request error reported to the client with an HTTP status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class LatestCurve:
+    """
+    The latest auction curve kept in memory. Each `get` compares the
+    database's data version (re-read at most once per
+    `DB_CACHE_TTL_SECONDS`) with the version the curve was built from, and
+    rebuilds it only after a write.
+    """
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        method: str = C.CURVE_INTERPOLATION_METHOD,
+    ):
+        self._db_manager = db_manager
+        self.method = method
+        self.version: Optional[int] = None
+        self._curve: Optional[YieldCurve] = None
+        self._sessions: Dict[int, str] = {}
+
+    def get(self) -> Tuple[YieldCurve, int]:
+        version = self._db_manager.current_version()
+        if version != self.version:
+            df, _ = self._db_manager.load_latest_data()
+            self._curve = curve_for_session(df, self.method) if not df.empty else None
+            self._sessions = (
+                {
+                    int(tenor): str(session)
+                    for tenor, session in zip(
+                        df[C.TENOR_COLUMN_NAME], df[C.SESSION_DATE_COLUMN_NAME]
+                    )
+                }
+                if not df.empty
+                else {}
+            )
+            self.version = version
+            logger.info(f"Loaded the latest curve at data version {version}.")
+        if self._curve is None:
+            raise ApiError(503, "No auction data is available yet.")
+        return self._curve, self.version
+
+    def describe(self, days: Optional[List[float]] = None) -> Dict[str, Any]:
+        curve, version = self.get()
+        payload = {
+            "version": version,
+            "method": curve.method,
+            "tenors": [int(tenor) for tenor in curve.tenors],
+            "yields": [float(value) for value in curve.yields],
+            "session_dates": [self._sessions.get(int(tenor)) for tenor in curve.tenors],
+        }
+        if days is not None:
+            payload["days"] = days
+            payload["curve_yields"] = np.atleast_1d(
+                curve.yields_for(_day_counts(np.asarray(days, dtype=np.float64)))
+            ).tolist()
+        return payload
+
+
+def _day_counts(days: np.ndarray) -> np.ndarray:
+    # الأيام الصحيحة تُقرأ من جدول المنحنى المحسوب مسبقاً
+    if np.all(np.isfinite(days)) and np.all(days == np.round(days)):
+        return days.astype(np.int64)
+    return days
+
+
+def _columns(items: List[Dict[str, float]], names) -> List[np.ndarray]:
+    return [
+        np.fromiter(
+            (item.get(name, np.nan) for item in items),
+            dtype=np.float64,
+            count=len(items),
+        )
+        for name in names
+    ]
+
+
+def _records(results: pd.DataFrame, **extra: np.ndarray) -> List[Dict[str, Any]]:
+    """Result rows as JSON-ready dicts, with NaN reported as null."""
+    columns = {name: results[name].to_numpy() for name in results.columns}
+    columns.update(extra)
+    names = list(columns)
+    rows = []
+    for values in zip(*(columns[name].tolist() for name in names)):
+        rows.append(
+            {
+                name: (
+                    None
+                    if isinstance(value, float) and not math.isfinite(value)
+                    else value
+                )
+                for name, value in zip(names, values)
+            }
+        )
+    return rows
+
+
+def quote_primary(
+    curve: YieldCurve, items: List[Dict[str, float]]
+) -> List[Dict[str, Any]]:
+    """Prices many primary purchases in one `calculate_primary_yield_batch` call."""
+    face_value, tenor, yield_rate, tax_rate = _columns(
+        items,
+        (
+            C.FACE_VALUE_COLUMN_NAME,
+            C.TENOR_COLUMN_NAME,
+            C.YIELD_COLUMN_NAME,
+            "tax_rate",
+        ),
+    )
+    yield_rate = np.where(
+        np.isnan(yield_rate), curve.yields_for(_day_counts(tenor)), yield_rate
+    )
+    tax_rate = np.where(np.isnan(tax_rate), C.DEFAULT_TAX_RATE_PERCENT, tax_rate)
+    results = calculate_primary_yield_batch(face_value, yield_rate, tenor, tax_rate)
+    return _records(results, market_yield=yield_rate)
+
+
+def quote_secondary(
+    curve: YieldCurve, items: List[Dict[str, float]]
+) -> List[Dict[str, Any]]:
+    """Prices many secondary sales in one `analyze_secondary_sale_batch` call."""
+    face_value, purchase_yield, tenor, holding_days, market_yield, tax_rate = _columns(
+        items,
+        (
+            C.FACE_VALUE_COLUMN_NAME,
+            C.PURCHASE_YIELD_COLUMN_NAME,
+            C.TENOR_COLUMN_NAME,
+            C.HOLDING_DAYS_COLUMN_NAME,
+            "market_yield",
+            "tax_rate",
+        ),
+    )
+    remaining_days = _day_counts(np.clip(tenor - holding_days, 0, None))
+    market_yield = np.where(
+        np.isnan(market_yield), curve.yields_for(remaining_days), market_yield
+    )
+    tax_rate = np.where(np.isnan(tax_rate), C.DEFAULT_TAX_RATE_PERCENT, tax_rate)
+    results = analyze_secondary_sale_batch(
+        face_value, purchase_yield, tenor, holding_days, market_yield, tax_rate
+    )
+    return _records(
+        results, market_yield=np.where(results["is_valid"], market_yield, np.nan)
+    )
+
+
+QUOTERS = {"primary": quote_primary, "secondary": quote_secondary}
+
+
+def parse_quote_request(kind: str, payload: Any) -> List[Dict[str, float]]:
+    """
+    Validates a JSON body (one object or a list of objects) for `kind` and
+    returns the items with numeric fields only.
+    """
+    required, optional = QUOTE_FIELDS[kind]
+    items = payload if isinstance(payload, list) else [payload]
+    if not items:
+        raise ApiError(400, "The request body is an empty list.")
+    parsed = []
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise ApiError(400, f"Item {position} is not a JSON object.")
+        missing = [name for name in required if item.get(name) is None]
+        if missing:
+            raise ApiError(400, f"Item {position} is missing {missing}.")
+        values = {}
+        for name in required + optional:
+            value = item.get(name)
+            if value is None:
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ApiError(400, f"Item {position}: '{name}' must be a number.")
+            values[name] = float(value)
+        parsed.append(values)
+    return parsed
+
+
+class MicroBatcher:
+    """
+    Collects the requests that arrive within `window` seconds (or until
+    `max_batch` items are waiting) and prices them in a single vectorized
+    call, then hands each request its own slice of the results. A zero
+    window batches whatever arrives in the same event-loop iteration.
+    """
+
+    def __init__(
+        self,
+        price_many: Callable[[List[Dict[str, float]]], List[Dict[str, Any]]],
+        window: float = C.PRICING_API_BATCH_WINDOW_SECONDS,
+        max_batch: int = C.PRICING_API_MAX_BATCH_SIZE,
+    ):
+        self._price_many = price_many
+        self._window = window
+        self._max_batch = max_batch
+        self._pending: List[Tuple[List[Dict[str, float]], asyncio.Future]] = []
+        self._pending_items = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.batches = 0
+
+    async def submit(self, items: List[Dict[str, float]]) -> List[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((items, future))
+        self._pending_items += len(items)
+        if self._pending_items >= self._max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = (
+                loop.call_later(self._window, self.flush)
+                if self._window > 0
+                else loop.call_soon(self.flush)
+            )
+        return await future
+
+    def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending, self._pending_items = self._pending, [], 0
+        if not pending:
+            return
+        self.batches += 1
+        try:
+            results = self._price_many([item for items, _ in pending for item in items])
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        offset = 0
+        for items, future in pending:
+            if not future.done():
+                future.set_result(results[offset : offset + len(items)])
+            offset += len(items)
+
+
+def parse_request_head(
+    head: bytes,
+) -> Tuple[str, str, str, Dict[str, str], int]:
+    """
+    Splits an HTTP request head into (method, target, version, headers,
+    content length). Header names are lower-cased.
+
+    Raises:
+        ApiError: 400 for a malformed request line or Content-Length,
+        413 for a body over `PRICING_API_MAX_BODY_BYTES`, and 501 for a
+        Transfer-Encoding (chunked bodies are not supported).
+    """
+    request_line, *header_lines = head.decode("latin-1").split("\r\n")
+    parts = request_line.split(" ")
+    if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+        raise ApiError(400, "Malformed request line.")
+    method, target, version = parts
+    headers = {}
+    for line in header_lines:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    if headers.get("transfer-encoding", "identity").lower() != "identity":
+        # بدون هذا الرفض يُقرأ جسم الطلب المقسّم كرأس الطلب التالي
+        raise ApiError(501, "Transfer-Encoding is not supported; send Content-Length.")
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise ApiError(400, "Content-Length must be an integer.")
+    if length < 0:
+        raise ApiError(400, "Content-Length must not be negative.")
+    if length > C.PRICING_API_MAX_BODY_BYTES:
+        raise ApiError(413, "The request body is too large.")
+    return method, target, version, headers, length
+
+
+async def _read_head(reader: asyncio.StreamReader) -> Optional[bytes]:
+    """
+    Reads one request head, or returns None once the client has closed the
+    connection.
+
+    Raises:
+        ApiError: 431 for a head over the stream's buffer limit.
+    """
+    try:
+        return await reader.readuntil(b"\r\n\r\n")
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+    except (asyncio.LimitOverrunError, ValueError):
+        raise ApiError(431, "The request head is too large.")
+
+
+class PricingServer:
+    """
+    A small HTTP/1.1 JSON server on asyncio streams, with keep-alive.
+
+    Endpoints:
+        GET  /curve[?days=30,45]  The latest curve (and its yields for `days`).
+        POST /primary             Primary purchase quotes.
+        POST /secondary           Secondary sale quotes.
+        GET  /health              The data version being served.
+
+    Quote bodies are one JSON object or a list of objects; the response
+    mirrors that shape. Quotes from concurrent requests are priced
+    together through a `MicroBatcher` per endpoint.
+    """
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        method: str = C.CURVE_INTERPOLATION_METHOD,
+        window: float = C.PRICING_API_BATCH_WINDOW_SECONDS,
+        max_batch: int = C.PRICING_API_MAX_BATCH_SIZE,
+    ):
+        self.curve = LatestCurve(db_manager, method)
+        self.batchers = {
+            kind: MicroBatcher(self._quoter(quote), window, max_batch)
+            for kind, quote in QUOTERS.items()
+        }
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def _quoter(self, quote):
+        def price_many(items):
+            curve, _ = self.curve.get()
+            return quote(curve, items)
+
+        return price_many
+
+    async def start(
+        self, host: str = C.PRICING_API_HOST, port: int = C.PRICING_API_PORT
+    ) -> Tuple[str, int]:
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        address = self._server.sockets[0].getsockname()[:2]
+        logger.info(f"Pricing API listening on http://{address[0]}:{address[1]}")
+        return address
+
+    async def serve_forever(self) -> None:
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, Any]:
+        """Routes one request and returns (status, JSON payload)."""
+        url = urlsplit(target)
+        try:
+            if url.path in ("/primary", "/secondary"):
+                if method != "POST":
+                    raise ApiError(405, "Use POST with a JSON body.")
+                try:
+                    payload = json.loads(body or b"null")
+                except ValueError:
+                    raise ApiError(400, "The request body is not valid JSON.")
+                kind = url.path[1:]
+                quotes = await self.batchers[kind].submit(
+                    parse_quote_request(kind, payload)
+                )
+                return 200, quotes if isinstance(payload, list) else quotes[0]
+            if method != "GET":
+                raise ApiError(405, "Use GET.")
+            if url.path == "/curve":
+                query = parse_qs(url.query).get("days")
+                try:
+                    days = (
+                        [float(day) for day in ",".join(query).split(",")]
+                        if query
+                        else None
+                    )
+                except ValueError:
+                    raise ApiError(400, "'days' must be comma-separated numbers.")
+                return 200, self.curve.describe(days)
+            if url.path == "/health":
+                return 200, {"status": "ok", "version": self.curve.version}
+            raise ApiError(404, f"Unknown path '{url.path}'.")
+        except ApiError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:
+            # أي خطأ غير متوقع (قاعدة البيانات أو التسعير) يصل للعميل كرد 500
+            logger.error(f"Pricing API request {target} failed: {e}", exc_info=True)
+            return 500, {"error": "Internal server error."}
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                try:
+                    head = await _read_head(reader)
+                    if head is None:
+                        return
+                    method, target, version, headers, length = parse_request_head(head)
+                except ApiError as e:
+                    # لا يمكن معرفة حدود الطلب التالي بعد رأس تالف، فتُغلق الاتصال
+                    status, payload = e.status, {"error": str(e)}
+                    keep_alive = False
+                else:
+                    try:
+                        body = await reader.readexactly(length) if length else b""
+                    except (asyncio.IncompleteReadError, ConnectionError):
+                        return
+                    status, payload = await self.dispatch(method, target, body)
+                    connection = headers.get("connection", "").lower()
+                    keep_alive = connection != "close" and (
+                        version == "HTTP/1.1" or connection == "keep-alive"
+                    )
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                writer.write(
+                    (
+                        f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                        "Content-Type: application/json; charset=utf-8\r\n"
+                        f"Content-Length: {len(data)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                        "\r\n"
+                    ).encode("latin-1")
+                    + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except Exception as e:
+            logger.error(f"Pricing API connection failed: {e}", exc_info=True)
+        finally:
+            writer.close()
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    server = PricingServer(
+        get_db_manager(args.db), method=args.method, window=args.window
+    )
+    await server.start(args.host, args.port)
+    await server.serve_forever()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="خدمة HTTP محلية لتسعير أذون الخزانة بصيغة JSON."
+    )
+    parser.add_argument("--host", default=C.PRICING_API_HOST)
+    parser.add_argument("--port", type=int, default=C.PRICING_API_PORT)
+    parser.add_argument("--method", default=C.CURVE_INTERPOLATION_METHOD)
+    parser.add_argument(
+        "--window",
+        type=float,
+        default=C.PRICING_API_BATCH_WINDOW_SECONDS,
+        help="مدة تجميع الطلبات بالثواني قبل تسعيرها معًا.",
+    )
+    parser.add_argument("--db", default=C.DB_FILENAME)
+    args = parser.parse_args(argv)
+
+    setup_logging(level=logging.INFO)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        logger.info("Pricing API stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import logging
+import os
+
+import streamlit as st
+
+import constants as C
+from db_manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# طبقة الربط الوحيدة مع Streamlit: الحسابات والتخزين والجلب والتحليل لا تستورد
+# Streamlit أبداً، وتستخدمها السكربتات وعمليات التسعير مباشرة دون تكلفة إطار الويب
+
+
+@st.cache_resource
+def get_db_manager(db_filename: str = C.DB_FILENAME) -> DatabaseManager:
+    """
+    The web app's DatabaseManager, created once per server process and
+    shared by every session. Streamlit owns its lifetime, so clearing the
+    resource cache opens a fresh manager. Scripts and workers use
+    `db_manager.get_db_manager` instead.
+    """
+    return DatabaseManager(db_filename)
+
+
+def load_css(file_path: str) -> None:
+    if os.path.exists(file_path):
+        logger.debug(f"Loading CSS from {file_path}")
+        with open(file_path, encoding="utf-8") as f:
+            st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+    else:
+        logger.warning(f"CSS file not found at path: {file_path}")
@@ -0,0 +1,176 @@
+import argparse
+import logging
+import os
+import sys
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# إضافة المسار الحالي للسماح بالاستيراد المحلي
+sys.path.append(os.getcwd())
+
+import constants as C  # noqa: E402
+from db_manager import DatabaseManager  # noqa: E402
+from utils import setup_logging  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+# كل جلسة تطرح زوجاً من الآجال: الأحد 91 و273 يوماً، والخميس 182 و364 يوماً
+AUCTION_PAIRS: Tuple[Tuple[int, ...], ...] = ((91, 273), (182, 364))
+AUCTION_WEEKDAYS: Tuple[int, ...] = (6, 3)  # الأحد والخميس (الاثنين = 0)
+
+# متوسط العائد طويل الأجل وسرعة الارتداد إليه وحجم الصدمة اليومية (نقاط مئوية)
+_LONG_RUN_YIELD = 25.0
+_MEAN_REVERSION = 0.01
+_DAILY_SHOCK = 0.12
+# فارق كل أجل عن مستوى المنحنى وتذبذبه من جلسة لأخرى
+_TENOR_SPREADS = {91: 0.6, 182: 0.4, 273: 0.1, 364: -0.4}
+_SPREAD_NOISE = 0.08
+# أقدم تاريخ جلسة واقعي؛ التواريخ الأقدم منه لا تُولد على تقويم العطاءات
+_EARLIEST_SESSION_DATE = "1900-01-01"
+
+
+def _auction_calendar(
+    rows: int,
+    end_date: str,
+    pairs: Sequence[Tuple[int, ...]],
+    weekdays: Sequence[int],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Picks the session days (oldest first) and the index into `pairs` of
+    each session, with enough sessions to hold `rows` rows.
+
+    Sessions fall on the real auction calendar: `pairs[i]` is auctioned
+    every `weekdays[i]`, up to `end_date`. Four rows a week only reach back
+    to `_EARLIEST_SESSION_DATE` for about 26k rows, so longer histories
+    (the 100k and 1M row scaling runs) drop the calendar and put one
+    session on every day instead. Those dates are not realistic; they
+    only exist to give each row a unique key.
+    """
+    end = np.datetime64(end_date, "D")
+    per_session = np.array([len(pair) for pair in pairs])
+
+    days = np.arange(np.datetime64(_EARLIEST_SESSION_DATE, "D"), end + 1)
+    # 1970-01-01 كان يوم خميس (3)
+    pair_of_weekday = np.full(7, -1)
+    pair_of_weekday[list(weekdays)] = np.arange(len(pairs))
+    pair_index = pair_of_weekday[(days.astype(np.int64) + 3) % 7]
+    days, pair_index = days[pair_index >= 0], pair_index[pair_index >= 0]
+    rows_from_newest = np.cumsum(per_session[pair_index][::-1])
+    if rows_from_newest.size and rows_from_newest[-1] >= rows:
+        sessions = int(np.searchsorted(rows_from_newest, rows)) + 1
+        return days[-sessions:], pair_index[-sessions:]
+
+    sessions = -(-rows // int(per_session.sum())) * len(pairs)
+    position = np.arange(sessions)
+    # الجلسة الأحدث تطرح آخر زوج كما في التقويم الواقعي
+    return end - (sessions - 1 - position), (position - sessions) % len(pairs)
+
+
+def generate_history(
+    rows: int,
+    end_date: str = "2025-12-04",
+    pairs: Sequence[Tuple[int, ...]] = AUCTION_PAIRS,
+    weekdays: Sequence[int] = AUCTION_WEEKDAYS,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    Builds a synthetic auction history with the columns of the stored
+    table, ending with the last session on or before `end_date`.
+
+    The curve level follows a mean-reverting random walk around
+    `_LONG_RUN_YIELD`, and each tenor keeps a noisy spread to it, so the
+    series look like real auction results. Session dates follow
+    `_auction_calendar`: real Sunday/Thursday auctions for histories of up
+    to about 26k rows, and one session a day for longer ones. Every result
+    is scraped the day after its session.
+
+    Returns:
+        `rows` rows ordered from the oldest session to the newest.
+    """
+    rng = np.random.default_rng(seed)
+    session_days, pair_index = _auction_calendar(rows, end_date, pairs, weekdays)
+    sessions = session_days.size
+
+    level = np.empty(sessions)
+    level[0] = _LONG_RUN_YIELD
+    shocks = rng.normal(0.0, _DAILY_SHOCK, sessions)
+    for i in range(1, sessions):
+        level[i] = (
+            level[i - 1]
+            + _MEAN_REVERSION * (_LONG_RUN_YIELD - level[i - 1])
+            + shocks[i]
+        )
+
+    counts = np.array([len(pair) for pair in pairs])[pair_index]
+    session_of_row = np.repeat(np.arange(sessions), counts)
+    tenors = np.concatenate([pairs[i] for i in pair_index]).astype(np.int64)
+    unique_tenors, tenor_of_row = np.unique(tenors, return_inverse=True)
+    spreads = np.array([_TENOR_SPREADS.get(int(t), 0.0) for t in unique_tenors])
+    yields = np.round(
+        level[session_of_row]
+        + spreads[tenor_of_row]
+        + rng.normal(0.0, _SPREAD_NOISE, tenors.size),
+        3,
+    )
+
+    row_days = session_days[session_of_row]
+    iso = np.datetime_as_string(row_days, unit="D")
+    session_dates = [f"{d[8:10]}/{d[5:7]}/{d[0:4]}" for d in iso]
+
+    df = pd.DataFrame(
+        {
+            C.DATE_COLUMN_NAME: np.datetime_as_string(row_days + 1, unit="D"),
+            C.TENOR_COLUMN_NAME: tenors,
+            C.YIELD_COLUMN_NAME: yields,
+            C.SESSION_DATE_COLUMN_NAME: session_dates,
+        }
+    )
+    return df.iloc[len(df) - rows :].reset_index(drop=True)
+
+
+def render_results_page(history: pd.DataFrame) -> str:
+    """
+    Renders auction rows as a CBE results page: one results section per
+    session, in the markup that `parse_cbe_html` reads.
+    """
+    parts: List[str] = []
+    for session_date, session in history.groupby(
+        C.SESSION_DATE_COLUMN_NAME, sort=False
+    ):
+        tenors = session[C.TENOR_COLUMN_NAME].tolist()
+        yields = session[C.YIELD_COLUMN_NAME].tolist()
+        parts.append(
+            "<h2>النتائج</h2><table><thead><tr><th>البيان</th>"
+            + "".join(f"<th>{tenor}</th>" for tenor in tenors)
+            + "</tr></thead><tbody><tr><td>تاريخ الجلسة</td>"
+            + "".join(f"<td>{session_date}</td>" for _ in tenors)
+            + "</tr></tbody></table><p><strong>تفاصيل العروض المقبولة</strong></p>"
+            + "<table><tbody><tr><td>متوسط العائد المرجح</td>"
+            + "".join(f"<td>{value:.3f}</td>" for value in yields)
+            + "</tr></tbody></table>"
+        )
+    return f"<html><body>{''.join(parts)}</body></html>"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="إنشاء قاعدة بيانات بتاريخ عطاءات صناعي لاختبار الأداء دون اتصال بالإنترنت."
+    )
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--db", required=True, help="مسار قاعدة البيانات الناتجة.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    setup_logging(level=logging.INFO)
+    db_manager = DatabaseManager(args.db)
+    try:
+        db_manager.save_data(generate_history(args.rows, seed=args.seed))
+    finally:
+        db_manager.close()
+    logger.info(f"Wrote {args.rows} synthetic auction rows to {args.db}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# tests/conftest.py
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import pytest
+
+# الرد على طلب: (رمز الحالة، نص الصفحة، ترويسات إضافية)، أو None لإرجاع 404
+Response = Tuple[int, str, Dict[str, str]]
+Route = Callable[[str, Dict[str, str]], Optional[Response]]
+
+
+class StandInRequest(NamedTuple):
+    path: str
+    headers: Dict[str, str]
+
+
+class StandInServer:
+    """خادم HTTP محلي بديل لموقع البنك المركزي، يسجل الطلبات التي تصله."""
+
+    def __init__(self, route: Route):
+        self.requests: List[StandInRequest] = []
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler(route))
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def _handler(self, route: Route):
+        requests = self.requests
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                headers = dict(self.headers.items())
+                requests.append(StandInRequest(self.path, headers))
+                response = route(self.path, headers)
+                if response is None:
+                    self.send_error(404)
+                    return
+                status, body, extra_headers = response
+                payload = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                for name, value in extra_headers.items():
+                    self.send_header(name, value)
+                if status != 304:
+                    self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                if status != 304:
+                    self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def serve_pages():
+    """يشغّل خوادم بديلة تجيب بدالة التوجيه المعطاة، ويغلقها بعد الاختبار."""
+    servers: List[StandInServer] = []
+
+    def serve(route: Route) -> StandInServer:
+        server = StandInServer(route)
+        servers.append(server)
+        return server
+
+    yield serve
+    for server in servers:
+        server.close()
@@ -0,0 +1,145 @@
+# tests/test_backfill_data.py
+import sys
+import os
+from datetime import date
+from urllib.parse import parse_qs, urlparse
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import backfill_data
+from backfill_data import BackfillCheckpoint, archive_dates, run_backfill
+from db_manager import DatabaseManager
+import constants as C
+
+SECTION_TEMPLATE = """
+<h2>النتائج</h2><table><thead><tr><th>البيان</th><th>91</th><th>273</th></tr></thead><tbody><tr><td>تاريخ الجلسة</td><td>{day}</td><td>{day}</td></tr></tbody></table>
+<p><strong>تفاصيل العروض المقبولة</strong></p><table><tbody><tr><td>متوسط العائد المرجح</td><td>{y91}</td><td>{y273}</td></tr></tbody></table>
+"""
+
+
+class _Archive:
+    """أرشيف وهمي: صفحة لكل يوم عطاء، مع إمكانية محاكاة أيام متعطلة."""
+
+    def __init__(self, serve_pages):
+        self.broken_days = set()
+        self.server = serve_pages(self.route)
+        self.url_template = f"{self.server.url}/archive?date={{date:%Y-%m-%d}}"
+
+    @staticmethod
+    def _day(path):
+        return parse_qs(urlparse(path).query)["date"][0]
+
+    def route(self, path, headers):
+        day = self._day(path)
+        if day in self.broken_days:
+            return 500, "", {}
+        year, month, dom = day.split("-")
+        body = SECTION_TEMPLATE.format(
+            day=f"{dom}/{month}/{year}", y91=20 + int(dom) / 10, y273=21 + int(dom) / 10
+        )
+        return 200, f"<html><body>{body}</body></html>", {}
+
+    def requested_days(self):
+        return [self._day(request.path) for request in self.server.requests]
+
+
+@pytest.fixture
+def archive(serve_pages):
+    return _Archive(serve_pages)
+
+
+def test_archive_dates_filters_weekdays():
+    """🧪 يختبر اختيار أيام العطاءات (الأحد والخميس) داخل النطاق."""
+    days = archive_dates(date(2025, 7, 1), date(2025, 7, 14), weekdays=[3, 6])
+    assert [d.day for d in days] == [3, 6, 10, 13]
+
+
+def test_backfill_stores_history_and_resumes(archive, tmp_path):
+    """🧪 يختبر ملء البيانات التاريخية بالتوازي ثم الاستئناف من نقطة الحفظ."""
+    db = DatabaseManager(db_filename=tmp_path / "test.db")
+    checkpoint_path = tmp_path / "checkpoint.json"
+    archive.broken_days.add("2025-07-10")
+
+    summary = run_backfill(
+        db,
+        date(2025, 7, 1),
+        date(2025, 7, 14),
+        url_template=archive.url_template,
+        weekdays=[3, 6],
+        workers=3,
+        requests_per_second=1000,
+        checkpoint=BackfillCheckpoint(checkpoint_path),
+        batch_size=2,
+    )
+    assert summary == {"days": 4, "skipped": 0, "failed": 1, "rows": 6}
+    history = db.load_all_historical_data()
+    assert len(history) == 6
+    # تاريخ السحب يساوي تاريخ الجلسة حتى تظهر البيانات في موضعها التاريخي
+    assert history[C.DATE_COLUMN_NAME].str.startswith("2025-07-13").sum() == 2
+
+    archive.server.requests.clear()
+    archive.broken_days.clear()
+    summary = run_backfill(
+        db,
+        date(2025, 7, 1),
+        date(2025, 7, 14),
+        url_template=archive.url_template,
+        weekdays=[3, 6],
+        requests_per_second=1000,
+        checkpoint=BackfillCheckpoint(checkpoint_path),
+    )
+    assert archive.requested_days() == ["2025-07-10"]
+    assert summary == {"days": 4, "skipped": 3, "failed": 0, "rows": 2}
+    assert len(db.load_all_historical_data()) == 8
+
+
+def test_backfill_does_not_checkpoint_failed_saves(archive, tmp_path, mocker):
+    """🧪 يختبر أن الأيام التي فشل حفظها لا تُسجل في نقطة الحفظ وتُعاد لاحقاً."""
+    db = DatabaseManager(db_filename=tmp_path / "test.db")
+    checkpoint_path = tmp_path / "checkpoint.json"
+    mocker.patch.object(db, "bulk_upsert", return_value={"inserted": 0, "updated": 0})
+    summary = run_backfill(
+        db,
+        date(2025, 7, 1),
+        date(2025, 7, 7),
+        url_template=archive.url_template,
+        weekdays=[3, 6],
+        requests_per_second=1000,
+        checkpoint=BackfillCheckpoint(checkpoint_path),
+    )
+    assert summary == {"days": 2, "skipped": 0, "failed": 2, "rows": 0}
+    checkpoint = BackfillCheckpoint(checkpoint_path)
+    assert not checkpoint.is_done(date(2025, 7, 3))
+    assert not checkpoint.is_done(date(2025, 7, 6))
+
+
+def test_backfill_interrupt_cancels_queued_days(archive, tmp_path, mocker):
+    """🧪 يختبر أن المقاطعة تلغي الأيام المتبقية وتحفظ ما اكتمل جلبه بالفعل."""
+    db = DatabaseManager(db_filename=tmp_path / "test.db")
+    checkpoint_path = tmp_path / "checkpoint.json"
+    days = archive_dates(date(2025, 1, 1), date(2025, 6, 30), weekdays=[3, 6])
+    fetch = backfill_data.fetch_archive_day
+
+    def interrupt_on_second_day(day, url_template, rate_limiter):
+        if day == days[1]:
+            raise KeyboardInterrupt
+        return fetch(day, url_template, rate_limiter)
+
+    mocker.patch("backfill_data.fetch_archive_day", side_effect=interrupt_on_second_day)
+    with pytest.raises(KeyboardInterrupt):
+        run_backfill(
+            db,
+            days[0],
+            days[-1],
+            url_template=archive.url_template,
+            weekdays=[3, 6],
+            workers=1,
+            requests_per_second=20,
+            checkpoint=BackfillCheckpoint(checkpoint_path),
+        )
+    assert len(archive.requested_days()) < len(days) // 2
+    checkpoint = BackfillCheckpoint(checkpoint_path)
+    assert checkpoint.is_done(days[0])
+    assert not checkpoint.is_done(days[1])
+    assert len(db.load_all_historical_data()) >= 2
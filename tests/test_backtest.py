@@ -0,0 +1,88 @@
+import sys
+import os
+import numpy as np
+import pytest
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backtest import CurveHistory, Strategy, default_grid, run_sweep, simulate
+import constants as C
+
+
+@pytest.fixture
+def history():
+    """منحنى ثابت أسبوعياً لمدة عامين: 91 يوماً بعائد 25% و 364 يوماً بعائد 28%."""
+    sessions = pd.date_range("2023-01-01", periods=104, freq="7D")
+    rows = []
+    for session in sessions:
+        for tenor, yield_rate in [(91, 25.0), (364, 28.0)]:
+            rows.append(
+                {
+                    C.TENOR_COLUMN_NAME: tenor,
+                    C.YIELD_COLUMN_NAME: yield_rate,
+                    C.SESSION_DATE_COLUMN_NAME: session.strftime("%d/%m/%Y"),
+                    C.DATE_COLUMN_NAME: session.strftime("%Y-%m-%d"),
+                }
+            )
+    return CurveHistory.from_historical_frame(pd.DataFrame(rows))
+
+
+def _growth(yield_rate: float, tenor: int, tax_rate: float = 20.0) -> float:
+    return 1 + yield_rate / 100 * tenor / C.DAYS_IN_YEAR * (1 - tax_rate / 100)
+
+
+def test_history_carries_forward_missing_tenors():
+    """🧪 يختبر ترحيل عائد الأجل غير المطروح في الجلسة من آخر عطاء له."""
+    df = pd.DataFrame(
+        {
+            C.TENOR_COLUMN_NAME: [91, 364, 91],
+            C.YIELD_COLUMN_NAME: [25.0, 28.0, 24.0],
+            C.SESSION_DATE_COLUMN_NAME: ["01/01/2023", "05-01-2023", "08/01/2023"],
+            C.DATE_COLUMN_NAME: ["2023-01-01", "2023-01-05", "2023-01-08"],
+        }
+    )
+    history = CurveHistory.from_historical_frame(df)
+    assert history.tenors.tolist() == [91, 364]
+    np.testing.assert_allclose(history.yields[-1], [24.0, 28.0])
+    assert np.isnan(history.yields[0, 1])
+
+
+def test_roll_compounds_net_payouts(history):
+    """🧪 يختبر أن إعادة استثمار أذون 91 يوماً تراكم صافي العائد بعد الضريبة."""
+    results = simulate(history, Strategy("roll", (91,), horizon_days=364))
+    assert len(results) > 0
+    np.testing.assert_allclose(results["final_wealth"], _growth(25.0, 91) ** 4)
+
+
+def test_ladder_averages_its_sleeves(history):
+    """🧪 يختبر أن السلم يقسم رأس المال بالتساوي بين الآجال."""
+    ladder = simulate(history, Strategy("ladder", (91, 364), horizon_days=364))
+    expected = (_growth(25.0, 91) ** 4 + _growth(28.0, 364)) / 2
+    np.testing.assert_allclose(ladder["final_wealth"], expected)
+
+
+def test_switch_follows_spread_threshold(history):
+    """🧪 يختبر أن استراتيجية التبديل تختار الأجل الأطول فقط عندما يتجاوز الفارق الحد."""
+    switched = simulate(history, Strategy("switch", (91, 364), threshold=2.0))
+    stayed = simulate(history, Strategy("switch", (91, 364), threshold=3.5))
+    np.testing.assert_allclose(switched["final_wealth"], _growth(28.0, 364))
+    np.testing.assert_allclose(stayed["final_wealth"], _growth(25.0, 91) ** 4)
+
+
+def test_invalid_strategies_are_rejected(history):
+    """🧪 يختبر رفض الاستراتيجيات غير المعروفة أو الآجال غير الموجودة."""
+    with pytest.raises(ValueError):
+        simulate(history, Strategy("hold", (91,)))
+    with pytest.raises(ValueError):
+        simulate(history, Strategy("roll", (182,)))
+
+
+def test_parallel_sweep_matches_serial(history):
+    """🧪 يختبر أن تشغيل الشبكة على عدة عمليات يعطي نفس نتائج التشغيل المتسلسل."""
+    grid = default_grid(history, thresholds=[-1.0, 0.0, 3.0])
+    serial = run_sweep(history, grid, workers=1)
+    parallel = run_sweep(history, grid, workers=2, chunk_size=2)
+
+    assert len(serial) == len(grid) == 2 + 1 + 2 * 3
+    pd.testing.assert_frame_equal(serial, parallel)
@@ -0,0 +1,127 @@
+import sys
+import os
+import warnings
+import numpy as np
+import pytest
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from batch_pricer import main, price_chunk, price_file
+from db_manager import DatabaseManager
+from yield_curve import YieldCurve
+import constants as C
+
+CURVE = YieldCurve([91, 182, 273, 364], [26.478, 26.428, 26.042, 25.443])
+
+
+@pytest.fixture
+def holdings():
+    rng = np.random.default_rng(7)
+    tenors = rng.choice([91, 182, 273, 364], size=25)
+    return pd.DataFrame(
+        {
+            "holding_id": np.arange(25),
+            C.FACE_VALUE_COLUMN_NAME: rng.choice([25000.0, 100000.0], size=25),
+            C.PURCHASE_YIELD_COLUMN_NAME: rng.uniform(20, 30, size=25).round(3),
+            C.TENOR_COLUMN_NAME: tenors,
+            C.HOLDING_DAYS_COLUMN_NAME: rng.integers(1, tenors),
+        }
+    )
+
+
+def test_streamed_csv_matches_whole_file_pricing(holdings, tmp_path):
+    """🧪 يختبر أن التسعير على دفعات صغيرة يطابق تسعير الملف كاملاً مرة واحدة."""
+    input_path, output_path = tmp_path / "in.csv", tmp_path / "out.csv"
+    holdings.to_csv(input_path, index=False)
+
+    rows = price_file(str(input_path), str(output_path), CURVE, chunk_size=4)
+
+    assert rows == len(holdings)
+    expected = price_chunk(holdings, CURVE, "secondary", C.DEFAULT_TAX_RATE_PERCENT)
+    pd.testing.assert_frame_equal(pd.read_csv(output_path), expected, check_dtype=False)
+
+
+def test_parquet_pool_matches_serial(holdings, tmp_path):
+    """🧪 يختبر أن توزيع الدفعات على عدة عمليات يعطي نفس الملف الناتج بنفس الترتيب."""
+    pytest.importorskip("pyarrow")
+    input_path = tmp_path / "in.parquet"
+    holdings.to_parquet(input_path, index=False)
+
+    price_file(
+        str(input_path),
+        str(tmp_path / "serial.parquet"),
+        CURVE,
+        "primary",
+        chunk_size=4,
+    )
+    price_file(
+        str(input_path),
+        str(tmp_path / "pool.parquet"),
+        CURVE,
+        "primary",
+        chunk_size=4,
+        workers=2,
+    )
+
+    serial = pd.read_parquet(tmp_path / "serial.parquet")
+    assert serial["holding_id"].tolist() == list(range(25))
+    assert (
+        serial["market_yield"].tolist()
+        == CURVE.yields_for(holdings[C.TENOR_COLUMN_NAME].to_numpy()).tolist()
+    )
+    pd.testing.assert_frame_equal(serial, pd.read_parquet(tmp_path / "pool.parquet"))
+
+
+def test_blank_cells_are_priced_as_invalid_rows(holdings, tmp_path):
+    """🧪 يختبر أن الخلايا الفارغة أو غير الرقمية في الملف تنتج صفوفاً غير صالحة دون تحذيرات."""
+    input_path, output_path = tmp_path / "in.csv", tmp_path / "out.csv"
+    holdings = holdings.astype({C.HOLDING_DAYS_COLUMN_NAME: object})
+    holdings.loc[3, C.HOLDING_DAYS_COLUMN_NAME] = ""
+    holdings.loc[5, C.HOLDING_DAYS_COLUMN_NAME] = "n/a"
+    holdings.to_csv(input_path, index=False)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        price_file(str(input_path), str(output_path), CURVE, chunk_size=4)
+
+    priced = pd.read_csv(output_path)
+    assert not priced.loc[[3, 5], "is_valid"].any()
+    assert priced.loc[[3, 5], "market_yield"].isna().all()
+    assert priced["is_valid"].sum() == len(holdings) - 2
+
+
+def test_missing_columns_are_rejected(holdings):
+    """🧪 يختبر رفض ملف ينقصه عمود مطلوب لنوع التسعير."""
+    with pytest.raises(ValueError, match=C.HOLDING_DAYS_COLUMN_NAME):
+        price_chunk(
+            holdings.drop(columns=[C.HOLDING_DAYS_COLUMN_NAME]),
+            CURVE,
+            "secondary",
+            20.0,
+        )
+
+
+def test_cli_prices_against_stored_curve(holdings, tmp_path):
+    """🧪 يختبر أن أمر التسعير يستخدم منحنى آخر عطاءات من قاعدة البيانات."""
+    db_path = str(tmp_path / "pricer.db")
+    db = DatabaseManager(db_filename=db_path)
+    db.save_data(
+        pd.DataFrame(
+            {
+                C.DATE_COLUMN_NAME: ["2025-12-04"] * 4,
+                C.TENOR_COLUMN_NAME: [91, 182, 273, 364],
+                C.YIELD_COLUMN_NAME: [26.478, 26.428, 26.042, 25.443],
+                C.SESSION_DATE_COLUMN_NAME: ["04/12/2025"] * 4,
+            }
+        )
+    )
+    db.close()
+    input_path, output_path = tmp_path / "in.csv", tmp_path / "out.csv"
+    holdings.to_csv(input_path, index=False)
+
+    main([str(input_path), str(output_path), "--db", db_path, "--chunk-size", "10"])
+
+    result = pd.read_csv(output_path)
+    expected = price_chunk(holdings, CURVE, "secondary", C.DEFAULT_TAX_RATE_PERCENT)
+    np.testing.assert_allclose(result["net_profit"], expected["net_profit"])
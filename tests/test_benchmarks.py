@@ -0,0 +1,207 @@
+import sys
+import os
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from calculations import (
+    analyze_secondary_sale,
+    analyze_secondary_sale_batch,
+    calculate_primary_yield,
+    calculate_primary_yield_batch,
+)
+from cbe_scraper import parse_cbe_html
+from db_manager import DatabaseManager
+from synthetic_data import generate_history, render_results_page
+
+# مجموعة قياس أداء اختيارية تتطلب pytest-benchmark، ولا تعمل في CI.
+# خط الأساس ناتج تشغيل الإضافة نفسها ومحفوظ في tests/benchmarks/<الجهاز>/،
+# والمقارنة به تفشل عند تباطؤ المتوسط بأكثر من 50% (وتحفظ كل تشغيل في .benchmarks):
+#   pytest -m benchmark --benchmark-only --benchmark-autosave \
+#       --benchmark-compare=tests/benchmarks/Linux-CPython-3.11-64bit/0001_baseline.json \
+#       --benchmark-compare-fail=mean:50%
+# ولإنشاء خط أساس لجهاز آخر، أو تحديثه بعد تحسين مقصود بعد حذف الملف القديم:
+#   pytest -m benchmark --benchmark-only --benchmark-storage=tests/benchmarks \
+#       --benchmark-save=baseline
+pytestmark = pytest.mark.benchmark
+
+ROW_COUNTS = {"1k": 1_000, "100k": 100_000, "1M": 1_000_000}
+# عدد الجولات لكل حجم؛ الأحجام الكبيرة مكلفة لذلك تُقاس مرات أقل
+DB_ROUNDS = {"1k": 20, "100k": 3, "1M": 1}
+SCALAR_QUOTES = 1_000
+BATCH_QUOTES = 100_000
+
+
+@pytest.fixture(scope="module")
+def quotes():
+    rng = np.random.default_rng(0)
+    tenors = rng.choice([91, 182, 273, 364], size=BATCH_QUOTES)
+    return {
+        "face_value": rng.choice([25000.0, 50000.0, 100000.0], size=BATCH_QUOTES),
+        "yield_rate": rng.uniform(20, 30, size=BATCH_QUOTES).round(3),
+        "tenor": tenors,
+        "holding_days": rng.integers(1, tenors),
+        "market_yield": rng.uniform(20, 30, size=BATCH_QUOTES).round(3),
+    }
+
+
+@pytest.fixture(scope="module")
+def populated_db(tmp_path_factory):
+    """قواعد بيانات صناعية بكل حجم، تُنشأ مرة واحدة عند أول طلب."""
+    paths = {}
+
+    def build(size: str) -> str:
+        if size not in paths:
+            path = str(tmp_path_factory.mktemp("bench") / f"history_{size}.db")
+            db = DatabaseManager(path)
+            db.save_data(generate_history(ROW_COUNTS[size]))
+            db.close()
+            paths[size] = path
+        return paths[size]
+
+    return build
+
+
+def _cold_manager(path: str, opened: list):
+    # مدير جديد في كل جولة حتى تُقاس القراءة الأولى وليس الذاكرة المؤقتة
+    db = DatabaseManager(path)
+    opened.append(db)
+    return (db,), {}
+
+
+@pytest.mark.benchmark(group="calculations")
+def test_primary_yield_scalar(benchmark, quotes):
+    """🧪 يقيس سرعة حساب العائد الأساسي لإذن واحد في كل استدعاء."""
+    rows = list(
+        zip(
+            quotes["face_value"][:SCALAR_QUOTES].tolist(),
+            quotes["yield_rate"][:SCALAR_QUOTES].tolist(),
+            quotes["tenor"][:SCALAR_QUOTES].tolist(),
+        )
+    )
+    benchmark.extra_info["quotes"] = SCALAR_QUOTES
+
+    def run():
+        for face, rate, tenor in rows:
+            calculate_primary_yield(face, rate, tenor, 20.0)
+
+    benchmark(run)
+
+
+@pytest.mark.benchmark(group="calculations")
+def test_primary_yield_batch(benchmark, quotes):
+    """🧪 يقيس سرعة حساب العائد الأساسي لمئة ألف إذن دفعة واحدة."""
+    benchmark.extra_info["quotes"] = BATCH_QUOTES
+    result = benchmark(
+        calculate_primary_yield_batch,
+        quotes["face_value"],
+        quotes["yield_rate"],
+        quotes["tenor"],
+        20.0,
+    )
+    assert len(result) == BATCH_QUOTES
+
+
+@pytest.mark.benchmark(group="calculations")
+def test_secondary_sale_scalar(benchmark, quotes):
+    """🧪 يقيس سرعة تحليل البيع الثانوي لإذن واحد في كل استدعاء."""
+    rows = list(
+        zip(
+            *(
+                quotes[name][:SCALAR_QUOTES].tolist()
+                for name in (
+                    "face_value",
+                    "yield_rate",
+                    "tenor",
+                    "holding_days",
+                    "market_yield",
+                )
+            )
+        )
+    )
+    benchmark.extra_info["quotes"] = SCALAR_QUOTES
+
+    def run():
+        for face, rate, tenor, held, market in rows:
+            analyze_secondary_sale(face, rate, tenor, held, market, 20.0)
+
+    benchmark(run)
+
+
+@pytest.mark.benchmark(group="calculations")
+def test_secondary_sale_batch(benchmark, quotes):
+    """🧪 يقيس سرعة تحليل البيع الثانوي لمئة ألف إذن دفعة واحدة."""
+    benchmark.extra_info["quotes"] = BATCH_QUOTES
+    result = benchmark(
+        analyze_secondary_sale_batch,
+        quotes["face_value"],
+        quotes["yield_rate"],
+        quotes["tenor"],
+        quotes["holding_days"],
+        quotes["market_yield"],
+        20.0,
+    )
+    assert len(result) == BATCH_QUOTES
+
+
+@pytest.mark.benchmark(group="parser")
+@pytest.mark.parametrize("sections", [10, 100, 1000])
+@pytest.mark.parametrize("backend", ["lxml", "bs4"])
+def test_parse_cbe_html(benchmark, backend, sections):
+    """🧪 يقيس سرعة تحليل صفحات نتائج صناعية بعدد متزايد من الأقسام."""
+    page = render_results_page(generate_history(2 * sections))
+    benchmark.extra_info["page_bytes"] = len(page.encode("utf-8"))
+    result = benchmark(parse_cbe_html, page, backend=backend)
+    assert len(result) == 4
+
+
+@pytest.mark.benchmark(group="database")
+@pytest.mark.parametrize("size", list(ROW_COUNTS))
+def test_save_data(benchmark, tmp_path, size):
+    """🧪 يقيس سرعة حفظ تاريخ كامل في قاعدة بيانات جديدة."""
+    history = generate_history(ROW_COUNTS[size])
+    opened = []
+
+    def fresh_database():
+        path = str(tmp_path / f"save_{len(opened)}.db")
+        return _cold_manager(path, opened)
+
+    counts = benchmark.pedantic(
+        lambda db: db.save_data(history),
+        setup=fresh_database,
+        rounds=DB_ROUNDS[size],
+    )
+    for db in opened:
+        db.close()
+    assert counts["inserted"] == ROW_COUNTS[size]
+
+
+@pytest.mark.benchmark(group="database")
+@pytest.mark.parametrize("size", list(ROW_COUNTS))
+def test_load_latest_data(benchmark, populated_db, size):
+    """🧪 يقيس سرعة قراءة أحدث العوائد من قاعدة بيانات بأحجام مختلفة."""
+    path, opened = populated_db(size), []
+    df, _ = benchmark.pedantic(
+        lambda db: db.load_latest_data(),
+        setup=lambda: _cold_manager(path, opened),
+        rounds=DB_ROUNDS["1k"],
+    )
+    for db in opened:
+        db.close()
+    assert len(df) == 4
+
+
+@pytest.mark.benchmark(group="database")
+@pytest.mark.parametrize("size", list(ROW_COUNTS))
+def test_load_all_historical_data(benchmark, populated_db, size):
+    """🧪 يقيس سرعة تحميل التاريخ الكامل للرسم البياني من قاعدة بيانات باردة."""
+    path, opened = populated_db(size), []
+    df = benchmark.pedantic(
+        lambda db: db.load_all_historical_data(),
+        setup=lambda: _cold_manager(path, opened),
+        rounds=DB_ROUNDS[size],
+    )
+    for db in opened:
+        db.close()
+    assert len(df) == ROW_COUNTS[size]
@@ -1,11 +1,21 @@
 # tests/test_calculations.py
 import sys
 import os
+import math
+import numpy as np
 import pytest
+import pandas as pd
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from calculations import calculate_primary_yield, analyze_secondary_sale
+from calculations import (
+    calculate_primary_yield,
+    analyze_secondary_sale,
+    calculate_primary_yield_batch,
+    analyze_secondary_sale_batch,
+    analyze_secondary_sale_grid,
+    solve_break_even_yield,
+)
 
 
 def test_primary_yield_logic_is_self_consistent():
@@ -58,3 +68,150 @@ def test_secondary_sale_invalid_days():
     """🧪 يختبر الحالة التي تكون فيها أيام الاحتفاظ غير صالحة."""
     assert "error" in analyze_secondary_sale(100000, 25.0, 91, 91, 28.0, 20.0)
     assert "error" in analyze_secondary_sale(100000, 25.0, 91, 92, 28.0, 20.0)
+
+
+def test_primary_yield_batch_matches_scalar():
+    """🧪 يختبر أن الحساب المجمع يطابق الحاسبة الأساسية صفاً بصف."""
+    face_values = [25000.0, 100000.0, 50000.0]
+    yields = [26.0, 25.0, 27.5]
+    tenors = [91, 364, 182]
+    batch = calculate_primary_yield_batch(face_values, yields, tenors, 20.0)
+    assert batch["is_valid"].all()
+    for i, row in batch.iterrows():
+        scalar = calculate_primary_yield(face_values[i], yields[i], tenors[i], 20.0)
+        for key in [
+            "purchase_price",
+            "gross_return",
+            "tax_amount",
+            "net_return",
+            "total_payout",
+            "real_profit_percentage",
+        ]:
+            assert row[key] == pytest.approx(scalar[key])
+
+
+def test_primary_yield_batch_validation_mask():
+    """🧪 يختبر أن الصفوف غير الصالحة تُعلَّم في قناع التحقق بدلاً من رسائل الخطأ."""
+    batch = calculate_primary_yield_batch(
+        [100000, 0, 100000, 100000, 100000],
+        [25.0, 25.0, 0, 25.0, 25.0],
+        [364, 364, 364, 0, 364],
+        [20.0, 20.0, 20.0, 20.0, 101],
+    )
+    assert batch["is_valid"].tolist() == [True, False, False, False, False]
+    assert batch.loc[~batch["is_valid"], "net_return"].isna().all()
+    assert batch.loc[0, "net_return"] > 0
+
+
+def test_primary_yield_batch_keeps_series_index():
+    """🧪 يختبر أن الحساب المجمع يحتفظ بفهرس أعمدة الـ DataFrame المُدخلة."""
+    holdings = pd.DataFrame(
+        {"face_value": [25000.0, 75000.0], "yield": [26.0, 27.0], "tenor": [91, 273]},
+        index=["a", "b"],
+    )
+    batch = calculate_primary_yield_batch(
+        holdings["face_value"], holdings["yield"], holdings["tenor"], 20.0
+    )
+    assert batch.index.tolist() == ["a", "b"]
+
+
+def test_secondary_sale_batch_matches_scalar():
+    """🧪 يختبر أن تحليل البيع المجمع يطابق الحاسبة الفردية ويعلّم الصفوف غير الصالحة."""
+    holdings = pd.DataFrame(
+        {
+            "face_value": [100000.0, 50000.0, 100000.0],
+            "yield": [25.0, 29.0, 25.0],
+            "tenor": [91, 364, 91],
+            "holding_days": [60, 100, 91],
+            "market_yield": [20.0, 30.0, 20.0],
+        },
+        index=["a", "b", "c"],
+    )
+    batch = analyze_secondary_sale_batch(
+        holdings["face_value"],
+        holdings["yield"],
+        holdings["tenor"],
+        holdings["holding_days"],
+        holdings["market_yield"],
+        20.0,
+    )
+    assert list(batch.index) == ["a", "b", "c"]
+    assert batch["is_valid"].tolist() == [True, True, False]
+    assert batch.loc["c", ["sale_price", "net_profit"]].isna().all()
+    for key in ["a", "b"]:
+        row = holdings.loc[key]
+        scalar = analyze_secondary_sale(
+            row["face_value"],
+            row["yield"],
+            int(row["tenor"]),
+            int(row["holding_days"]),
+            row["market_yield"],
+            20.0,
+        )
+        for column in ["sale_price", "tax_amount", "net_profit", "period_yield"]:
+            assert batch.loc[key, column] == pytest.approx(scalar[column])
+
+
+def test_secondary_sale_grid_matches_scalar():
+    """🧪 يختبر أن شبكة البيع الثانوي تطابق الحاسبة الفردية في كل خلية."""
+    market_yields = [20.0, 25.0, 35.0]
+    grid = analyze_secondary_sale_grid(100000, 25.0, 91, market_yields, 20.0)
+    assert grid["error"] is None
+    assert grid["net_profit"].shape == (90, 3)
+    assert grid["holding_days"][0] == 1 and grid["holding_days"][-1] == 90
+    for row, days in [(0, 1), (59, 60), (89, 90)]:
+        for col, market_yield in enumerate(market_yields):
+            scalar = analyze_secondary_sale(100000, 25.0, 91, days, market_yield, 20.0)
+            assert grid["net_profit"][row, col] == pytest.approx(scalar["net_profit"])
+            assert grid["tax_amount"][row, col] == pytest.approx(scalar["tax_amount"])
+            assert grid["breaks_even"][row, col] == (scalar["net_profit"] >= 0)
+
+
+def test_secondary_sale_grid_invalid_input():
+    """🧪 يختبر أن شبكة البيع الثانوي تُرجع خطأ عند إدخال قيم غير صالحة."""
+    assert analyze_secondary_sale_grid(100000, 25.0, 91, [25.0, 0], 20.0)["error"]
+    assert analyze_secondary_sale_grid(100000, 25.0, 91, [], 20.0)["error"]
+    assert analyze_secondary_sale_grid(100000, 25.0, 91, [25.0], 120)["error"]
+    assert analyze_secondary_sale_grid(100000, 25.0, 1, [25.0], 20.0)["error"]
+
+
+def test_break_even_yield_zeroes_net_profit():
+    """🧪 يختبر أن عائد التعادل المحسوب يجعل صافي الربح صفراً."""
+    break_even = solve_break_even_yield(100000, 25.0, 364, 90, 20.0)
+    assert isinstance(break_even, float)
+    assert break_even == pytest.approx(25.0 * 364 / 274)
+    results = analyze_secondary_sale(100000, 25.0, 364, 90, break_even, 20.0)
+    assert results["net_profit"] == pytest.approx(0.0, abs=1e-6)
+    assert (
+        analyze_secondary_sale(100000, 25.0, 364, 90, break_even + 0.01, 20.0)[
+            "net_profit"
+        ]
+        < 0
+    )
+
+
+def test_break_even_yield_target_profit_respects_tax_asymmetry():
+    """🧪 يختبر أن الحل يراعي خصم الضريبة على الأرباح فقط دون الخسائر."""
+    for target in [500.0, -500.0]:
+        secondary_yield = solve_break_even_yield(
+            100000, 25.0, 364, 90, 20.0, target_net_profit=target
+        )
+        results = analyze_secondary_sale(100000, 25.0, 364, 90, secondary_yield, 20.0)
+        assert results["net_profit"] == pytest.approx(target)
+    assert math.isnan(
+        solve_break_even_yield(100000, 25.0, 364, 90, 100.0, target_net_profit=1.0)
+    )
+
+
+def test_break_even_yield_vectorized():
+    """🧪 يختبر أن الحل يعمل على مصفوفات كاملة ويُرجع NaN للمدخلات غير الصالحة."""
+    holding_days = np.array([1, 90, 363, 364])
+    break_even = solve_break_even_yield(100000, 25.0, 364, holding_days, 20.0)
+    assert break_even.shape == (4,)
+    assert break_even[:3] == pytest.approx(25.0 * 364 / (364 - holding_days[:3]))
+    assert np.isnan(break_even[3])
+
+    grid = analyze_secondary_sale_grid(100000, 25.0, 91, [25.0], 20.0)
+    assert grid["break_even_yield"] == pytest.approx(
+        solve_break_even_yield(100000, 25.0, 91, grid["holding_days"], 20.0)
+    )
@@ -7,7 +7,16 @@ import pytest
 # إضافة المسار الرئيسي للمشروع للسماح بالاستيراد
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from cbe_scraper import parse_cbe_html, verify_page_structure
+import cbe_scraper
+from cbe_scraper import (
+    DriverPool,
+    FetchStateCache,
+    compute_content_hash,
+    parse_cbe_html,
+    verify_page_structure,
+    fetch_page_via_http,
+)
+from db_manager import DatabaseManager
 import constants as C
 
 # محتوى HTML وهمي يحتوي على تاريخين مختلفين لاختبار المنطق الجديد
@@ -21,9 +30,10 @@ MOCK_HTML_CONTENT = """
 """
 
 
-def test_html_parser_full_run():
+@pytest.mark.parametrize("backend", ["bs4", "lxml"])
+def test_html_parser_full_run(backend):
     """🧪 يختبر دالة تحليل HTML ويتأكد من أنها تختار التاريخ الأحدث بشكل صحيح."""
-    parsed_df = parse_cbe_html(MOCK_HTML_CONTENT)
+    parsed_df = parse_cbe_html(MOCK_HTML_CONTENT, backend=backend)
     assert isinstance(parsed_df, pd.DataFrame)
     assert len(parsed_df) == 4
 
@@ -42,6 +52,46 @@ def test_html_parser_full_run():
     assert yield_364 == 25.043
 
 
+def _build_archive_page(sections: int) -> str:
+    """يبني صفحة أرشيف وهمية تحتوي على عدد كبير من أقسام النتائج."""
+    parts = []
+    for i in range(sections):
+        session_date = f"{1 + i % 28:02d}/{1 + i % 12:02d}/{2015 + i // 336}"
+        tenors = (91, 273) if i % 2 else (182, 364)
+        parts.append(
+            f"<h2>النتائج</h2><table><thead><tr><th>البيان</th>"
+            f"<th>{tenors[0]}</th><th>{tenors[1]}</th></tr></thead><tbody>"
+            f"<tr><td>تاريخ الجلسة</td><td>{session_date}</td><td>{session_date}</td>"
+            f"</tr></tbody></table><p><strong>تفاصيل العروض المقبولة</strong></p>"
+            f"<table><tbody><tr><td>متوسط العائد المرجح</td>"
+            f"<td>{20 + (i % 97) / 10:.3f}</td><td>{21 + (i % 89) / 10:.3f}</td>"
+            f"</tr></tbody></table>"
+        )
+    return f"<html><body>{''.join(parts)}</body></html>"
+
+
+@pytest.mark.parametrize(
+    "page", [MOCK_HTML_CONTENT, _build_archive_page(60)], ids=["mock", "archive"]
+)
+def test_lxml_backend_matches_bs4_backend(page):
+    """🧪 يختبر أن محلل lxml ينتج نفس الـ DataFrame الذي ينتجه محلل BeautifulSoup."""
+    bs4_df = parse_cbe_html(page, backend="bs4").drop(columns=[C.DATE_COLUMN_NAME])
+    lxml_df = parse_cbe_html(page, backend="lxml").drop(columns=[C.DATE_COLUMN_NAME])
+    pd.testing.assert_frame_equal(bs4_df, lxml_df, check_dtype=False)
+    assert lxml_df[C.TENOR_COLUMN_NAME].dtype.kind == "i"
+
+
+def test_parser_backends_reject_pages_without_results():
+    """🧪 يختبر أن المحللين يُرجعان None للصفحات الخالية من النتائج وأن الخيار غير المعروف مرفوض."""
+    empty_page = (
+        "<html><body><h2>أخبار</h2><table><tr><td>1</td></tr></table></body></html>"
+    )
+    assert parse_cbe_html(empty_page, backend="bs4") is None
+    assert parse_cbe_html(empty_page, backend="lxml") is None
+    with pytest.raises(ValueError):
+        parse_cbe_html(MOCK_HTML_CONTENT, backend="regex")
+
+
 def test_verify_page_structure_success():
     """🧪 يختبر أن التحقق من هيكل الصفحة ينجح عند وجود كل العلامات."""
     verify_page_structure(MOCK_HTML_CONTENT)
@@ -53,3 +103,199 @@ def test_verify_page_structure_failure():
     with pytest.raises(RuntimeError) as excinfo:
         verify_page_structure(invalid_html)
     assert "متوسط العائد المرجح" in str(excinfo.value)
+
+
+STAND_IN_PAGES = {
+    "/": MOCK_HTML_CONTENT,
+    "/etag": MOCK_HTML_CONTENT,
+    "/js-shell": "<html><body><div id='app'></div></body></html>",
+}
+STAND_IN_ETAG = '"auction-v1"'
+
+
+def _cbe_route(path, headers):
+    """موقع بديل للبنك المركزي يقدم صفحات ثابتة، ويدعم ETag على المسار /etag."""
+    body = STAND_IN_PAGES.get(path)
+    if body is None:
+        return None
+    if path != "/etag":
+        return 200, body, {}
+    if headers.get("If-None-Match") == STAND_IN_ETAG:
+        return 304, "", {}
+    return 200, body, {"ETag": STAND_IN_ETAG}
+
+
+@pytest.fixture
+def stand_in_server(serve_pages):
+    return serve_pages(_cbe_route)
+
+
+def test_fetch_page_via_http_uses_user_agent(stand_in_server):
+    """🧪 يختبر أن الجلب المباشر عبر HTTP يُرجع الصفحة ويرسل الـ User-Agent المحدد."""
+    page = fetch_page_via_http(stand_in_server.url + "/")
+    assert "متوسط العائد المرجح" in page
+    assert stand_in_server.requests[-1].headers["User-Agent"] == C.USER_AGENT
+    assert fetch_page_via_http(stand_in_server.url + "/missing") is None
+
+
+def test_http_fast_path_skips_selenium(stand_in_server, tmp_path, mocker):
+    """🧪 يختبر أن المسار السريع يحفظ البيانات دون تشغيل المتصفح."""
+    setup_driver = mocker.patch("cbe_scraper.setup_driver")
+    db = DatabaseManager(db_filename=tmp_path / "test.db")
+    cbe_scraper.fetch_data_from_cbe(db, url=stand_in_server.url + "/")
+    setup_driver.assert_not_called()
+    latest_df, _ = db.load_latest_data()
+    assert len(latest_df) == 4
+
+
+def test_http_fast_path_falls_back_to_selenium(stand_in_server, tmp_path, mocker):
+    """🧪 يختبر الرجوع إلى Selenium عندما لا تحتوي الصفحة الثابتة على العلامات."""
+    setup_driver = mocker.patch("cbe_scraper.setup_driver", return_value=None)
+    mocker.patch("cbe_scraper.time.sleep")
+    db = DatabaseManager(db_filename=tmp_path / "test.db")
+    with pytest.raises(RuntimeError):
+        cbe_scraper.fetch_data_from_cbe(db, url=stand_in_server.url + "/js-shell")
+    assert setup_driver.call_count == C.SCRAPER_RETRIES
+
+
+class _FakeDriver:
+    """متصفح وهمي لاختبار مجمع المتصفحات دون تشغيل Chrome."""
+
+    def __init__(self):
+        self.crashed = False
+        self.quit_called = False
+
+    def execute_script(self, script):
+        if self.crashed:
+            raise RuntimeError("browser crashed")
+        return 1
+
+    def get(self, url):
+        raise TimeoutError("page load timed out")
+
+    def quit(self):
+        self.quit_called = True
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_driver_pool_reuses_warm_driver():
+    """🧪 يختبر أن المجمع يعيد استخدام نفس المتصفح بين الطلبات."""
+    created = []
+    pool = DriverPool(factory=lambda: created.append(_FakeDriver()) or created[-1])
+    with pool.lease() as first:
+        pass
+    with pool.lease() as second:
+        pass
+    assert first is second
+    assert len(created) == 1
+    pool.close()
+    assert first.quit_called
+
+
+def test_driver_pool_recycles_expired_and_crashed_drivers():
+    """🧪 يختبر إعادة تدوير المتصفح عند تجاوز العمر الأقصى أو عند تعطله."""
+    clock = _FakeClock()
+    pool = DriverPool(factory=_FakeDriver, max_age_seconds=60, clock=clock)
+    with pool.lease() as first:
+        pass
+    clock.now = 61
+    with pool.lease() as second:
+        pass
+    assert second is not first and first.quit_called
+
+    with pytest.raises(ValueError):
+        with pool.lease() as driver:
+            assert driver is second
+            raise ValueError("page error")
+    with pool.lease() as third:
+        assert third is second, "متصفح سليم بعد خطأ في الصفحة يجب أن يبقى في المجمع"
+
+    with pytest.raises(ValueError):
+        with pool.lease() as driver:
+            driver.crashed = True
+            raise ValueError("browser crash")
+    assert second.quit_called
+    with pool.lease() as fourth:
+        assert fourth is not second
+
+
+def test_fetch_retries_share_one_browser(tmp_path, mocker):
+    """🧪 يختبر أن إعادة المحاولة تعيد تحميل الصفحة فقط دون تشغيل متصفح جديد."""
+    mocker.patch("cbe_scraper.time.sleep")
+    factory = mocker.Mock(side_effect=_FakeDriver)
+    pool = DriverPool(factory=factory)
+    db = DatabaseManager(db_filename=tmp_path / "test.db")
+    with pytest.raises(RuntimeError):
+        cbe_scraper.fetch_data_from_cbe(db, use_http_fast_path=False, driver_pool=pool)
+    assert factory.call_count == 1
+
+
+def test_content_hash_ignores_changes_outside_auction_tables():
+    """🧪 يختبر أن بصمة المحتوى تتجاهل التغييرات خارج جداول العطاءات."""
+    base_hash = compute_content_hash(MOCK_HTML_CONTENT)
+    with_footer = MOCK_HTML_CONTENT.replace(
+        "</body>", "<footer>آخر زيارة 12:01</footer></body>"
+    )
+    assert compute_content_hash(with_footer) == base_hash
+    new_yield = MOCK_HTML_CONTENT.replace("27.558", "27.601")
+    assert compute_content_hash(new_yield) != base_hash
+
+
+@pytest.mark.parametrize("path", ["/etag", "/"])
+def test_unchanged_page_skips_parsing_and_db(stand_in_server, tmp_path, mocker, path):
+    """🧪 يختبر تخطي التحليل وقاعدة البيانات عندما لا تتغير الصفحة (ETag أو البصمة)."""
+    db = DatabaseManager(db_filename=tmp_path / "test.db")
+    state_path = tmp_path / "fetch_state.json"
+    url = stand_in_server.url + path
+    cbe_scraper.fetch_data_from_cbe(
+        db, url=url, fetch_state=FetchStateCache(state_path)
+    )
+    assert FetchStateCache(state_path).state["content_hash"]
+
+    parse = mocker.patch("cbe_scraper.parse_cbe_html")
+    latest_session = mocker.patch.object(db, "get_latest_session_date")
+    setup_driver = mocker.patch("cbe_scraper.setup_driver")
+    cbe_scraper.fetch_data_from_cbe(
+        db, url=url, fetch_state=FetchStateCache(state_path)
+    )
+    parse.assert_not_called()
+    latest_session.assert_not_called()
+    setup_driver.assert_not_called()
+
+
+def test_unchanged_page_does_not_rewrite_fetch_state(stand_in_server, tmp_path, mocker):
+    """🧪 يختبر أن ملف حالة الجلب لا يُعاد كتابته عندما لا تتغير الصفحة."""
+    db = DatabaseManager(db_filename=tmp_path / "test.db")
+    state_path = tmp_path / "fetch_state.json"
+    url = stand_in_server.url + "/"
+    cbe_scraper.fetch_data_from_cbe(
+        db, url=url, fetch_state=FetchStateCache(state_path)
+    )
+    saved_state = state_path.read_text(encoding="utf-8")
+    assert "checked_at" not in saved_state
+
+    replace = mocker.spy(cbe_scraper.os, "replace")
+    cbe_scraper.fetch_data_from_cbe(
+        db, url=url, fetch_state=FetchStateCache(state_path)
+    )
+    replace.assert_not_called()
+    assert state_path.read_text(encoding="utf-8") == saved_state
+
+
+def test_failed_save_does_not_record_content_hash(stand_in_server, tmp_path, mocker):
+    """🧪 يختبر أن فشل الحفظ لا يسجل بصمة الصفحة حتى تُعاد المحاولة في التشغيل التالي."""
+    db = DatabaseManager(db_filename=tmp_path / "test.db")
+    state_path = tmp_path / "fetch_state.json"
+    mocker.patch.object(db, "bulk_upsert", return_value={"inserted": 0, "updated": 0})
+    with pytest.raises(RuntimeError):
+        cbe_scraper.fetch_data_from_cbe(
+            db, url=stand_in_server.url + "/", fetch_state=FetchStateCache(state_path)
+        )
+    assert not state_path.exists()
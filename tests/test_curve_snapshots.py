@@ -0,0 +1,74 @@
+import sys
+import os
+import sqlite3
+import pytest
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from curve_snapshots import main, session_column, yield_column
+from db_manager import DatabaseManager
+import constants as C
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DatabaseManager(db_filename=tmp_path / "snapshots.db")
+
+
+def _auction(scrape_date: str, session_date: str, yields: dict) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            C.DATE_COLUMN_NAME: [scrape_date] * len(yields),
+            C.TENOR_COLUMN_NAME: list(yields),
+            C.YIELD_COLUMN_NAME: list(yields.values()),
+            C.SESSION_DATE_COLUMN_NAME: [session_date] * len(yields),
+        }
+    )
+
+
+def test_save_data_maintains_carried_forward_snapshots(db: DatabaseManager):
+    """🧪 يختبر أن كل جلسة تحمل المنحنى كاملاً مع ترحيل عوائد الأيام الأخرى."""
+    db.save_data(_auction("2025-01-05", "05/01/2025", {91: 25.0, 273: 27.0}))
+    db.save_data(_auction("2025-01-09", "09/01/2025", {182: 26.0, 364: 28.0}))
+
+    snapshots = db.load_curve_snapshots()
+    assert snapshots[C.SESSION_DATE_ISO_COLUMN_NAME].tolist() == [
+        "2025-01-05",
+        "2025-01-09",
+    ]
+    first, latest = snapshots.iloc[0], snapshots.iloc[1]
+    assert pd.isna(first[yield_column(182)])
+    assert latest[yield_column(91)] == 25.0
+    assert latest[session_column(91)] == "05/01/2025"
+    assert latest[yield_column(364)] == 28.0
+    assert latest[session_column(364)] == "09/01/2025"
+
+    latest_df, _ = db.load_latest_data()
+    assert latest_df[C.TENOR_COLUMN_NAME].tolist() == [91, 182, 273, 364]
+    assert latest_df[C.YIELD_COLUMN_NAME].tolist() == [25.0, 26.0, 27.0, 28.0]
+
+
+def test_backfilled_session_refreshes_later_snapshots(db: DatabaseManager):
+    """🧪 يختبر أن إضافة جلسة قديمة تحدث لقطات الجلسات اللاحقة لها."""
+    db.save_data(_auction("2025-01-09", "09/01/2025", {182: 26.0}))
+    db.save_data(_auction("2025-01-05", "05/01/2025", {91: 25.0}))
+
+    snapshots = db.load_curve_snapshots().set_index(C.SESSION_DATE_ISO_COLUMN_NAME)
+    assert snapshots.loc["2025-01-09", yield_column(91)] == 25.0
+    assert pd.isna(snapshots.loc["2025-01-05", yield_column(182)])
+
+
+def test_rebuild_command_restores_snapshots(db: DatabaseManager, capsys):
+    """🧪 يختبر أن أمر إعادة البناء يعيد ملء جدول اللقطات من البيانات الأصلية."""
+    db.save_data(_auction("2025-01-05", "05/01/2025", {91: 25.0}))
+    db.save_data(_auction("2025-01-09", "09/01/2025", {182: 26.0}))
+    expected = db.load_curve_snapshots()
+    with sqlite3.connect(db.db_filename) as conn:
+        conn.execute(f'DELETE FROM "{C.SNAPSHOT_TABLE_NAME}"')
+    conn.close()
+
+    main(["--db", db.db_filename])
+
+    assert "Snapshots written: 2" in capsys.readouterr().out
+    pd.testing.assert_frame_equal(db.load_curve_snapshots(), expected)
@@ -1,5 +1,7 @@
 import sys
 import os
+import sqlite3
+import threading
 import pytest
 import pandas as pd
 
@@ -69,3 +71,264 @@ def test_save_and_load_flow(db: DatabaseManager):
     assert latest_df_2_sorted[C.SESSION_DATE_COLUMN_NAME].iloc[1] == session_date1
     assert latest_df_2_sorted[C.SESSION_DATE_COLUMN_NAME].iloc[2] == session_date2
     # --- نهاية الإصلاح ---
+
+
+def test_bulk_upsert_reports_inserted_and_updated(db: DatabaseManager):
+    """🧪 يختبر أن الحفظ المجمع يحدّث الصفوف الموجودة ويُبلغ عن أعداد الإدراج والتحديث."""
+    scrape_dates = pd.to_datetime(["2025-01-05 10:00", "2025-01-05 10:00"], utc=True)
+    df = pd.DataFrame(
+        {
+            C.DATE_COLUMN_NAME: scrape_dates,
+            C.TENOR_COLUMN_NAME: [91, 182],
+            C.YIELD_COLUMN_NAME: [25.0, 26.0],
+            C.SESSION_DATE_COLUMN_NAME: ["05/01/2025", "05/01/2025"],
+        }
+    )
+    assert db.save_data(df) == {"inserted": 2, "updated": 0}
+
+    corrected = pd.concat(
+        [
+            df.assign(**{C.YIELD_COLUMN_NAME: [25.5, 26.5]}),
+            pd.DataFrame(
+                {
+                    C.DATE_COLUMN_NAME: pd.to_datetime(["2025-01-12"], utc=True),
+                    C.TENOR_COLUMN_NAME: [364],
+                    C.YIELD_COLUMN_NAME: [27.0],
+                    C.SESSION_DATE_COLUMN_NAME: ["12/01/2025"],
+                }
+            ),
+        ],
+        ignore_index=True,
+    )
+    assert db.save_data(corrected) == {"inserted": 1, "updated": 2}
+
+    history = db.load_all_historical_data().sort_values(by=C.TENOR_COLUMN_NAME)
+    assert history[C.YIELD_COLUMN_NAME].tolist() == [25.5, 26.5, 27.0]
+    assert history[C.DATE_COLUMN_NAME].iloc[0] == "2025-01-05 10:00:00+00:00"
+
+
+def test_bulk_upsert_missing_columns_is_rejected(db: DatabaseManager):
+    """🧪 يختبر أن الحفظ يرفض البيانات الناقصة دون كتابة أي صف."""
+    df = pd.DataFrame({C.TENOR_COLUMN_NAME: [91], C.YIELD_COLUMN_NAME: [25.0]})
+    assert db.save_data(df) == {"inserted": 0, "updated": 0}
+    assert len(db.load_all_historical_data()) == 0
+
+
+def test_connections_are_pooled_per_thread_in_wal_mode(db: DatabaseManager):
+    """🧪 يختبر إعادة استخدام الاتصال داخل نفس الخيط وتفعيل وضع WAL."""
+    conn = db._connection()
+    assert db._connection() is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    other = []
+    worker = threading.Thread(target=lambda: other.append(db._connection()))
+    worker.start()
+    worker.join()
+    assert other[0] is not conn
+
+    db.close()
+    assert db._connection() is not conn
+    assert db.get_latest_session_date() is None
+
+
+def test_readers_are_not_blocked_by_open_write(db: DatabaseManager):
+    """🧪 يختبر أن القراءة من خيط آخر لا تنتظر انتهاء عملية كتابة مفتوحة."""
+    df = pd.DataFrame(
+        {
+            C.DATE_COLUMN_NAME: ["2025-01-05"],
+            C.TENOR_COLUMN_NAME: [91],
+            C.YIELD_COLUMN_NAME: [25.0],
+            C.SESSION_DATE_COLUMN_NAME: ["05/01/2025"],
+        }
+    )
+    db.save_data(df)
+
+    writer = sqlite3.connect(db.db_filename)
+    writer.execute("BEGIN IMMEDIATE")
+    writer.execute(f'UPDATE "{C.TABLE_NAME}" SET "{C.YIELD_COLUMN_NAME}" = 99.0')
+    try:
+        results = []
+        reader = threading.Thread(target=lambda: results.append(db.load_latest_data()))
+        reader.start()
+        reader.join(timeout=5)
+        assert not reader.is_alive()
+        latest_df, _ = results[0]
+        assert latest_df[C.YIELD_COLUMN_NAME].tolist() == [25.0]
+    finally:
+        writer.rollback()
+        writer.close()
+
+
+def _legacy_db(path) -> str:
+    """ينشئ قاعدة بيانات بالمخطط القديم (بدون عمود التاريخ الموحد)."""
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            f'CREATE TABLE "{C.TABLE_NAME}" ("scrape_date" TEXT NOT NULL, '
+            '"tenor" INTEGER NOT NULL, "yield" REAL NOT NULL, '
+            '"session_date" TEXT NOT NULL, PRIMARY KEY ("scrape_date", "tenor"))'
+        )
+        conn.executemany(
+            f'INSERT INTO "{C.TABLE_NAME}" VALUES (?, ?, ?, ?)',
+            [
+                ("2024-12-31 10:00:00+00:00", 91, 20.0, "31-12-2024"),
+                ("2025-01-05 10:00:00+00:00", 91, 25.0, "05/01/2025"),
+                ("2025-01-05 10:00:00+00:00", 182, 26.0, "N/A"),
+            ],
+        )
+    conn.close()
+    return str(path)
+
+
+def test_legacy_database_is_migrated_in_place(tmp_path):
+    """🧪 يختبر إضافة عمود التاريخ الموحد وملأه والفهارس على قاعدة بيانات قديمة."""
+    db = DatabaseManager(_legacy_db(tmp_path / "legacy.db"))
+    conn = db._connection()
+    iso_dates = dict(
+        conn.execute(
+            f'SELECT "session_date", "{C.SESSION_DATE_ISO_COLUMN_NAME}" '
+            f'FROM "{C.TABLE_NAME}"'
+        ).fetchall()
+    )
+    assert iso_dates == {
+        "31-12-2024": "2024-12-31",
+        "05/01/2025": "2025-01-05",
+        "N/A": None,
+    }
+    indexes = {row[1] for row in conn.execute(f'PRAGMA index_list("{C.TABLE_NAME}")')}
+    assert {
+        f"idx_{C.TABLE_NAME}_tenor_session",
+        f"idx_{C.TABLE_NAME}_session",
+        f"idx_{C.TABLE_NAME}_scrape_date",
+    } <= indexes
+
+    # عند التحليل النصي القديم كان "31-12-2024" يُعتبر أحدث من يناير 2025
+    assert db.get_latest_session_date() == "05/01/2025"
+    # إعادة الفتح لا تعيد الترحيل ولا تفشل
+    assert DatabaseManager(db.db_filename).get_latest_session_date() == "05/01/2025"
+
+
+def test_latest_lookups_use_index_seeks(db: DatabaseManager):
+    """🧪 يختبر أن استعلامات أحدث البيانات لا تمسح الجدول بالكامل."""
+    db.save_data(
+        pd.DataFrame(
+            {
+                C.DATE_COLUMN_NAME: ["2025-01-05", "2025-01-12"],
+                C.TENOR_COLUMN_NAME: [91, 91],
+                C.YIELD_COLUMN_NAME: [25.0, 24.0],
+                C.SESSION_DATE_COLUMN_NAME: ["05/01/2025", "12/01/2025"],
+            }
+        )
+    )
+    conn = db._connection()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        latest_df, _ = db.load_latest_data()
+        latest_session = db.get_latest_session_date()
+    finally:
+        conn.set_trace_callback(None)
+
+    assert latest_df[C.YIELD_COLUMN_NAME].tolist() == [24.0]
+    assert latest_session == "12/01/2025"
+    assert statements
+    for statement in statements:
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            continue
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}")]
+        table_scans = [
+            step
+            for step in plan
+            if step.startswith("SCAN") and C.TABLE_NAME in step and "INDEX" not in step
+        ]
+        assert not table_scans, plan
+
+
+def _auction(scrape_date: str, session_date: str, yields: dict) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            C.DATE_COLUMN_NAME: [scrape_date] * len(yields),
+            C.TENOR_COLUMN_NAME: list(yields),
+            C.YIELD_COLUMN_NAME: list(yields.values()),
+            C.SESSION_DATE_COLUMN_NAME: [session_date] * len(yields),
+        }
+    )
+
+
+def test_load_historical_data_since_returns_only_new_rows(db: DatabaseManager):
+    """🧪 يختبر أن التحميل التزايدي يعيد الصفوف المكتوبة بعد العلامة فقط."""
+    db.save_data(_auction("2025-01-05", "05/01/2025", {91: 25.0, 182: 26.0}))
+    full_df, watermark = db.load_historical_data_since()
+    assert len(full_df) == 2
+
+    no_change_df, same_watermark = db.load_historical_data_since(watermark)
+    assert no_change_df.empty and same_watermark == watermark
+
+    # صف جديد وتعديل صف موجود
+    db.save_data(_auction("2025-01-12", "12/01/2025", {91: 24.0}))
+    db.save_data(_auction("2025-01-13", "05/01/2025", {182: 26.5}))
+    delta_df, new_watermark = db.load_historical_data_since(watermark)
+    assert new_watermark > watermark
+    assert sorted(delta_df[C.YIELD_COLUMN_NAME]) == [24.0, 26.5]
+
+
+def test_historical_cache_appends_deltas(db: DatabaseManager):
+    """🧪 يختبر أن ذاكرة البيانات التاريخية تدمج التغييرات دون إعادة قراءة الجدول."""
+    db.save_data(_auction("2025-01-05", "05/01/2025", {91: 25.0, 182: 26.0}))
+    assert len(db.load_all_historical_data()) == 2
+
+    db.save_data(_auction("2025-01-12", "12/01/2025", {91: 24.0}))
+    db.save_data(_auction("2025-01-13", "05/01/2025", {182: 26.5}))
+
+    conn = db._connection()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        history = db.load_all_historical_data()
+    finally:
+        conn.set_trace_callback(None)
+
+    # استعلام رقم الإصدار واستعلام التغييرات فقط، دون قراءة الجدول كاملاً
+    selects = [s for s in statements if s.startswith("SELECT") and "MAX(" not in s]
+    assert len(selects) == 1
+    assert selects == [s for s in statements if f'"{C.ROW_VERSION_COLUMN_NAME}" >' in s]
+    assert len(history) == 3
+    assert history[C.DATE_COLUMN_NAME].tolist() == [
+        "2025-01-13",
+        "2025-01-12",
+        "2025-01-05",
+    ]
+    updated = history[history[C.TENOR_COLUMN_NAME] == 182]
+    assert updated[C.YIELD_COLUMN_NAME].tolist() == [26.5]
+
+
+def test_latest_data_is_cached_until_a_write(db: DatabaseManager, mocker):
+    """🧪 يختبر مشاركة نتيجة أحدث البيانات حتى تُحفظ بيانات جديدة."""
+    db.save_data(_auction("2025-01-05", "05/01/2025", {91: 25.0}))
+    read_spy = mocker.spy(db, "_read_latest_data")
+
+    first_df, _ = db.load_latest_data()
+    second_df, _ = db.load_latest_data()
+    assert second_df is first_df
+    assert read_spy.call_count == 1
+    assert db.load_all_historical_data() is db.load_all_historical_data()
+
+    db.save_data(_auction("2025-01-12", "12/01/2025", {91: 24.0}))
+    fresh_df, _ = db.load_latest_data()
+    assert read_spy.call_count == 2
+    assert fresh_df[C.YIELD_COLUMN_NAME].tolist() == [24.0]
+
+
+def test_writes_from_other_processes_are_seen_after_ttl(db: DatabaseManager, mocker):
+    """🧪 يختبر ظهور الكتابة من مدير آخر بعد انتهاء مدة صلاحية رقم الإصدار."""
+    clock = mocker.patch("db_manager.time.monotonic", return_value=1000.0)
+    db.save_data(_auction("2025-01-05", "05/01/2025", {91: 25.0}))
+    assert db.load_latest_data()[0][C.YIELD_COLUMN_NAME].tolist() == [25.0]
+
+    DatabaseManager(db.db_filename).save_data(
+        _auction("2025-01-12", "12/01/2025", {91: 24.0})
+    )
+    assert db.load_latest_data()[0][C.YIELD_COLUMN_NAME].tolist() == [25.0]
+
+    clock.return_value = 1000.0 + C.DB_CACHE_TTL_SECONDS
+    assert db.load_latest_data()[0][C.YIELD_COLUMN_NAME].tolist() == [24.0]
+    assert len(db.load_all_historical_data()) == 2
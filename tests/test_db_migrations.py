@@ -0,0 +1,95 @@
+import sys
+import os
+import sqlite3
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import db_migrations
+from db_migrations import MIGRATIONS, Migration, apply_migrations, schema_version
+from db_manager import DatabaseManager
+import constants as C
+
+
+@pytest.fixture
+def conn(tmp_path):
+    connection = sqlite3.connect(tmp_path / "migrations.db")
+    yield connection
+    connection.close()
+
+
+def _primary_key(conn) -> list:
+    info = conn.execute(f'PRAGMA table_info("{C.TABLE_NAME}")').fetchall()
+    return [row[1] for row in sorted(info, key=lambda row: row[5]) if row[5]]
+
+
+def test_fresh_database_reaches_latest_version(conn):
+    """🧪 يختبر تطبيق كل الترحيلات بالترتيب على قاعدة بيانات جديدة مع تقرير التوقيت."""
+    report = apply_migrations(conn)
+
+    assert [entry["version"] for entry in report] == [m.version for m in MIGRATIONS]
+    assert all(entry["seconds"] >= 0 for entry in report)
+    assert schema_version(conn) == MIGRATIONS[-1].version
+    assert _primary_key(conn) == [C.TENOR_COLUMN_NAME, C.SESSION_DATE_COLUMN_NAME]
+    # التشغيل مرة أخرى لا يطبق شيئاً
+    assert apply_migrations(conn) == []
+
+
+def test_legacy_primary_key_is_rebuilt_keeping_latest_scrape(conn):
+    """🧪 يختبر إعادة بناء المفتاح الأساسي القديم مع الإبقاء على أحدث سحب لكل جلسة."""
+    conn.execute(
+        f'CREATE TABLE "{C.TABLE_NAME}" ("scrape_date" TEXT NOT NULL, '
+        '"tenor" INTEGER NOT NULL, "yield" REAL NOT NULL, '
+        '"session_date" TEXT NOT NULL, PRIMARY KEY ("scrape_date", "tenor"))'
+    )
+    conn.executemany(
+        f'INSERT INTO "{C.TABLE_NAME}" VALUES (?, ?, ?, ?)',
+        [
+            ("2025-01-05 10:00:00+00:00", 91, 25.0, "05/01/2025"),
+            ("2025-01-06 10:00:00+00:00", 91, 25.5, "05/01/2025"),
+            ("2025-01-06 10:00:00+00:00", 182, 26.0, "05/01/2025"),
+        ],
+    )
+    conn.commit()
+
+    apply_migrations(conn)
+
+    assert _primary_key(conn) == [C.TENOR_COLUMN_NAME, C.SESSION_DATE_COLUMN_NAME]
+    rows = conn.execute(
+        f'SELECT "tenor", "yield", "{C.SESSION_DATE_ISO_COLUMN_NAME}" '
+        f'FROM "{C.TABLE_NAME}" ORDER BY "tenor"'
+    ).fetchall()
+    assert rows == [(91, 25.5, "2025-01-05"), (182, 26.0, "2025-01-05")]
+
+
+def test_failed_migration_rolls_back(conn):
+    """🧪 يختبر أن فشل أحد الترحيلات يلغي تغييراته ولا يرفع رقم الإصدار."""
+
+    def broken(connection):
+        connection.execute('CREATE TABLE "half_done" (x INTEGER)')
+        raise sqlite3.OperationalError("boom")
+
+    migrations = MIGRATIONS[:1] + [Migration(2, "broken", broken)]
+    with pytest.raises(sqlite3.OperationalError):
+        apply_migrations(conn, migrations)
+
+    assert schema_version(conn) == 1
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+    assert "half_done" not in tables
+
+
+def test_newer_schema_is_left_untouched(conn, mocker):
+    """🧪 يختبر عدم تطبيق أي ترحيل على قاعدة بيانات من إصدار أحدث من الكود."""
+    conn.execute(f"PRAGMA user_version = {MIGRATIONS[-1].version + 1}")
+    apply_spy = mocker.spy(db_migrations, "_create_base_table")
+
+    assert apply_migrations(conn) == []
+    apply_spy.assert_not_called()
+
+
+def test_database_manager_records_migration_report(tmp_path):
+    """🧪 يختبر أن مدير قاعدة البيانات يطبق الترحيلات عند البدء ويحتفظ بالتقرير."""
+    db_file = tmp_path / "managed.db"
+    first = DatabaseManager(db_file)
+    assert len(first.migration_report) == len(MIGRATIONS)
+    assert DatabaseManager(db_file).migration_report == []
@@ -0,0 +1,77 @@
+import sys
+import os
+import json
+import subprocess
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# حدود سخية لزمن الاستيراد البارد؛ الهدف اكتشاف التراجع الكبير وليس قياس الأداء بدقة
+IMPORT_BUDGET_SECONDS = {"update_data": 3.0, "backfill_data": 3.0, "app": 5.0}
+
+CORE_MODULES = (
+    "calculations",
+    "cbe_scraper",
+    "db_manager",
+    "portfolio",
+    "utils",
+    "yield_curve",
+)
+
+HEAVY_MODULES = (
+    "selenium",
+    "webdriver_manager",
+    "bs4",
+    "lxml",
+    "plotly.express",
+    "sentry_sdk",
+)
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "loaded": sorted(name for name in {heavy!r} if name in sys.modules),
+}}))
+"""
+
+
+def _cold_import(module: str, heavy: tuple = HEAVY_MODULES) -> dict:
+    env = {**os.environ, "SENTRY_DSN": ""}
+    completed = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, heavy=heavy)],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("script", ["update_data", "backfill_data"])
+def test_cron_job_imports_without_streamlit_or_browser(script):
+    """🧪 يختبر أن سكربتات سطر الأوامر لا تحمّل Streamlit ولا Sentry ولا مكتبات المتصفح عند البدء."""
+    result = _cold_import(script, HEAVY_MODULES + ("streamlit",))
+    assert result["loaded"] == []
+    assert result["seconds"] < IMPORT_BUDGET_SECONDS[script]
+
+
+@pytest.mark.parametrize("module", CORE_MODULES)
+def test_core_modules_do_not_import_streamlit(module):
+    """🧪 يختبر أن وحدات النواة تعمل في العمليات الخلفية دون تحميل Streamlit."""
+    result = _cold_import(module, ("streamlit",))
+    assert result["loaded"] == []
+
+
+def test_app_defers_heavy_dependencies():
+    """🧪 يختبر أن واجهة التطبيق لا تحمّل Selenium أو Plotly Express قبل الحاجة إليها."""
+    result = _cold_import("app")
+    assert result["loaded"] == []
+    assert result["seconds"] < IMPORT_BUDGET_SECONDS["app"]
@@ -0,0 +1,121 @@
+# tests/test_portfolio.py
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from portfolio import Portfolio
+from yield_curve import YieldCurve
+from calculations import calculate_primary_yield, analyze_secondary_sale
+import constants as C
+
+CURVE_DF = pd.DataFrame(
+    {
+        C.TENOR_COLUMN_NAME: [91, 182, 273, 364],
+        C.YIELD_COLUMN_NAME: [26.0, 26.5, 27.0, 27.5],
+        C.SESSION_DATE_COLUMN_NAME: ["11/07/2025"] * 4,
+    }
+)
+
+
+@pytest.fixture
+def book():
+    portfolio = Portfolio(tax_rate=20.0, initial_capacity=2)
+    portfolio.add_holdings(
+        [100000.0, 25000.0, 50000.0],
+        [25.0, 26.0, 27.0],
+        [364, 91, 182],
+        ["2025-01-01", "2025-03-01", "2025-02-01"],
+    )
+    return portfolio
+
+
+def test_add_holdings_grows_columns_and_totals(book: Portfolio):
+    """🧪 يختبر أن إضافة الأذون تحدّث الأعمدة والإجماليات بشكل صحيح."""
+    assert len(book) == 3
+    expected_cost = sum(
+        calculate_primary_yield(fv, y, t, 20.0)["purchase_price"]
+        for fv, y, t in [
+            (100000.0, 25.0, 364),
+            (25000.0, 26.0, 91),
+            (50000.0, 27.0, 182),
+        ]
+    )
+    assert book.total_face_value == pytest.approx(175000.0)
+    assert book.total_cost == pytest.approx(expected_cost)
+    assert book.total_tax_liability == pytest.approx((175000.0 - expected_cost) * 0.20)
+    frame = book.to_frame()
+    assert frame.loc[1, "maturity_date"] == pd.Timestamp("2025-05-31")
+
+
+def test_remove_holdings_is_incremental(book: Portfolio):
+    """🧪 يختبر أن حذف الأذون يحدّث الإجماليات دون إعادة بناء المحفظة."""
+    new_id = book.add_holding(75000.0, 26.5, 273, "2025-04-01")
+    assert book.remove_holdings([0, 999]) == 1
+    assert len(book) == 3
+    assert sorted(book.to_frame().index.tolist()) == [1, 2, new_id]
+
+    rebuilt = Portfolio(tax_rate=20.0)
+    frame = book.to_frame()
+    rebuilt.add_holdings(
+        frame[C.FACE_VALUE_COLUMN_NAME],
+        frame[C.PURCHASE_YIELD_COLUMN_NAME],
+        frame[C.TENOR_COLUMN_NAME],
+        frame[C.PURCHASE_DATE_COLUMN_NAME],
+    )
+    assert book.total_cost == pytest.approx(rebuilt.total_cost)
+    assert book.total_face_value == pytest.approx(rebuilt.total_face_value)
+
+
+def test_mark_to_market_matches_secondary_sale(book: Portfolio):
+    """🧪 يختبر أن التقييم بسعر السوق يطابق حاسبة البيع الثانوي."""
+    as_of = "2025-04-01"
+    valuation = book.mark_to_market(CURVE_DF, as_of=as_of)
+    row = valuation.loc[0]
+    assert row["remaining_days"] == 364 - 90
+    expected_yield = YieldCurve.from_frame(CURVE_DF)(274)
+    assert row["market_yield"] == pytest.approx(expected_yield)
+    sale = analyze_secondary_sale(100000.0, 25.0, 364, 90, expected_yield, 0.0)
+    assert row["market_value"] == pytest.approx(sale["sale_price"])
+    assert row["unrealized_gain"] == pytest.approx(sale["gross_profit"])
+
+    matured = book.mark_to_market(CURVE_DF, as_of="2026-06-01").loc[1]
+    assert matured["remaining_days"] == 0
+    assert matured["market_value"] == pytest.approx(25000.0)
+    primary = calculate_primary_yield(25000.0, 26.0, 91, 20.0)
+    assert matured["accrued_return"] == pytest.approx(primary["gross_return"])
+
+
+def test_mark_to_market_uses_shared_yield_curve(book: Portfolio):
+    """🧪 يختبر أن التقييم يستخدم نفس منحنى العائد (والاستيفاء) المستخدم في التسعير المجمع."""
+    humped = CURVE_DF.assign(**{C.YIELD_COLUMN_NAME: [26.0, 28.0, 27.0, 25.0]})
+    remaining = np.array([274, 60, 123])
+    valuation = book.mark_to_market(humped, as_of="2025-04-01")
+    np.testing.assert_array_equal(valuation["remaining_days"], remaining)
+    np.testing.assert_allclose(
+        valuation["market_yield"], YieldCurve.from_frame(humped)(remaining)
+    )
+    linear = book.mark_to_market(humped, as_of="2025-04-01", method="linear")
+    np.testing.assert_allclose(
+        linear["market_yield"],
+        np.interp(remaining, [91, 182, 273, 364], [26.0, 28.0, 27.0, 25.0]),
+    )
+    assert not np.allclose(linear["market_yield"], valuation["market_yield"])
+
+
+def test_maturity_ladder(book: Portfolio):
+    """🧪 يختبر تجميع الاستحقاقات حسب الشهر."""
+    ladder = book.maturity_ladder()
+    assert ladder["holdings"].sum() == 3
+    assert ladder[C.FACE_VALUE_COLUMN_NAME].sum() == pytest.approx(175000.0)
+    assert ladder.index.is_monotonic_increasing
+    assert ladder["tax_due"].sum() == pytest.approx(book.total_tax_liability)
+
+
+def test_add_holdings_rejects_invalid_rows():
+    """🧪 يختبر رفض الأذون ذات القيم غير الصالحة."""
+    with pytest.raises(ValueError):
+        Portfolio().add_holdings([25000.0, 0.0], 25.0, 91, "2025-01-01")
@@ -0,0 +1,225 @@
+import sys
+import os
+import asyncio
+import json
+import sqlite3
+import pytest
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from calculations import analyze_secondary_sale, calculate_primary_yield
+from db_manager import DatabaseManager
+from pricing_api import MicroBatcher, PricingServer, quote_primary, quote_secondary
+from yield_curve import YieldCurve
+import constants as C
+
+TENORS = [91, 182, 273, 364]
+YIELDS = [26.478, 26.428, 26.042, 25.443]
+
+
+def _auction(yields, session_date="04/12/2025"):
+    return pd.DataFrame(
+        {
+            C.DATE_COLUMN_NAME: ["2025-12-04"] * 4,
+            C.TENOR_COLUMN_NAME: TENORS,
+            C.YIELD_COLUMN_NAME: yields,
+            C.SESSION_DATE_COLUMN_NAME: [session_date] * 4,
+        }
+    )
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DatabaseManager(db_filename=tmp_path / "api.db")
+
+
+async def _request(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = b"" if payload is None else json.dumps(payload).encode()
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, data = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ")[1]), json.loads(data)
+
+
+async def _raw_request(port, data):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ")[1]), json.loads(body)
+
+
+def _serve_and_call(db, calls):
+    async def run():
+        server = PricingServer(db)
+        _, port = await server.start("127.0.0.1", 0)
+        try:
+            return [await _request(port, *call) for call in calls]
+        finally:
+            await server.close()
+
+    return asyncio.run(run())
+
+
+def test_quotes_match_scalar_calculators():
+    """🧪 يختبر أن التسعير المجمع يطابق الحاسبات الفردية بعائد المنحنى."""
+    curve = YieldCurve(TENORS, YIELDS)
+    primary = quote_primary(curve, [{"face_value": 100000.0, "tenor": 182.0}])[0]
+    expected = calculate_primary_yield(100000.0, YIELDS[1], 182, 20.0)
+    assert primary["market_yield"] == pytest.approx(YIELDS[1])
+    assert primary["net_return"] == pytest.approx(expected["net_return"])
+
+    item = {
+        "face_value": 100000.0,
+        "purchase_yield": 29.0,
+        "tenor": 364.0,
+        "holding_days": 60.0,
+        "tax_rate": 10.0,
+    }
+    secondary = quote_secondary(curve, [item, {**item, "holding_days": 400.0}])
+    expected = analyze_secondary_sale(100000.0, 29.0, 364, 60, curve(304), 10.0)
+    assert secondary[0]["net_profit"] == pytest.approx(expected["net_profit"])
+    assert secondary[1]["is_valid"] is False
+    assert secondary[1]["net_profit"] is None
+
+
+def test_micro_batcher_prices_concurrent_requests_together():
+    """🧪 يختبر دمج الطلبات المتزامنة في استدعاء تسعير واحد وإعادة نتيجة كل طلب له."""
+    calls = []
+
+    def price_many(items):
+        calls.append(len(items))
+        return [{"value": item["x"] * 2} for item in items]
+
+    async def run():
+        batcher = MicroBatcher(price_many, window=0.01)
+        return await asyncio.gather(
+            *(batcher.submit([{"x": i}, {"x": -i}]) for i in range(10))
+        )
+
+    results = asyncio.run(run())
+    assert calls == [20]
+    assert results[3] == [{"value": 6}, {"value": -6}]
+
+
+def test_endpoints_serve_quotes_and_curve(db: DatabaseManager):
+    """🧪 يختبر نقاط الخدمة الأساسية ورسائل الأخطاء."""
+    db.save_data(_auction(YIELDS))
+    curve, primary, single, bad, missing = _serve_and_call(
+        db,
+        [
+            ("GET", "/curve?days=91,100"),
+            ("POST", "/primary", [{"face_value": 100000, "tenor": 91}] * 3),
+            (
+                "POST",
+                "/secondary",
+                {
+                    "face_value": 1e5,
+                    "purchase_yield": 29,
+                    "tenor": 364,
+                    "holding_days": 60,
+                },
+            ),
+            ("POST", "/primary", {"face_value": "x", "tenor": 91}),
+            ("GET", "/missing"),
+        ],
+    )
+
+    assert curve[0] == 200
+    assert curve[1]["tenors"] == TENORS and curve[1]["yields"] == YIELDS
+    assert curve[1]["curve_yields"][0] == pytest.approx(YIELDS[0])
+    assert primary[0] == 200 and len(primary[1]) == 3
+    assert single[0] == 200 and isinstance(single[1], dict)
+    assert bad[0] == 400 and "face_value" in bad[1]["error"]
+    assert missing[0] == 404
+
+
+def test_curve_is_reloaded_after_database_change(db: DatabaseManager):
+    """🧪 يختبر أن المنحنى في الذاكرة يُستبدل بعد حفظ بيانات جديدة."""
+
+    async def run():
+        server = PricingServer(db)
+        _, port = await server.start("127.0.0.1", 0)
+        try:
+            empty = await _request(port, "GET", "/curve")
+            db.save_data(_auction(YIELDS, "04/12/2025"))
+            first = await _request(port, "GET", "/curve")
+            db.save_data(_auction([y + 1 for y in YIELDS], "11/12/2025"))
+            second = await _request(port, "GET", "/curve")
+            return empty, first, second
+        finally:
+            await server.close()
+
+    empty, first, second = asyncio.run(run())
+    assert empty[0] == 503
+    assert first[1]["yields"] == YIELDS
+    assert second[1]["version"] > first[1]["version"]
+    assert second[1]["yields"] == pytest.approx([y + 1 for y in YIELDS])
+
+
+def test_unexpected_errors_and_malformed_requests_get_json_replies(
+    db: DatabaseManager, mocker
+):
+    """🧪 يختبر أن الأخطاء غير المتوقعة والطلبات التالفة تحصل على رد JSON بدلاً من قطع الاتصال."""
+    mocker.patch(
+        "pricing_api.LatestCurve.get",
+        side_effect=sqlite3.OperationalError("disk I/O error"),
+    )
+
+    async def run():
+        server = PricingServer(db)
+        _, port = await server.start("127.0.0.1", 0)
+        try:
+            return [
+                await _request(port, "GET", "/curve"),
+                await _request(
+                    port, "POST", "/primary", {"face_value": 1, "tenor": 91}
+                ),
+                await _raw_request(port, b"NONSENSE\r\n\r\n"),
+                await _raw_request(
+                    port, b"POST /primary HTTP/1.1\r\nContent-Length: abc\r\n\r\n"
+                ),
+            ]
+        finally:
+            await server.close()
+
+    curve, primary, bad_line, bad_length = asyncio.run(run())
+    assert curve[0] == 500 and primary[0] == 500
+    assert "disk" not in curve[1]["error"]
+    assert bad_line[0] == 400 and bad_length[0] == 400
+
+
+def test_oversized_heads_and_chunked_bodies_are_refused(db: DatabaseManager):
+    """🧪 يختبر رفض الرؤوس الأكبر من حد القراءة والأجسام المقسّمة برد JSON وإغلاق الاتصال."""
+
+    async def run():
+        server = PricingServer(db)
+        _, port = await server.start("127.0.0.1", 0)
+        try:
+            oversized = await _raw_request(
+                port,
+                b"GET /health HTTP/1.1\r\nX-Padding: "
+                + b"a" * (2**16 + 1024)
+                + b"\r\n\r\n",
+            )
+            chunked = await _raw_request(
+                port,
+                b"POST /primary HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"
+                b'1d\r\n{"face_value": 1, "tenor": 91}\r\n0\r\n\r\n',
+            )
+            return oversized, chunked
+        finally:
+            await server.close()
+
+    oversized, chunked = asyncio.run(run())
+    assert oversized[0] == 431
+    assert chunked[0] == 501 and "Content-Length" in chunked[1]["error"]
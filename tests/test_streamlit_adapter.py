@@ -0,0 +1,32 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from db_manager import DatabaseManager
+from streamlit_adapter import get_db_manager, load_css
+
+
+def test_factory_shares_one_manager_per_database(tmp_path):
+    """🧪 يختبر أن مصنع Streamlit ينشئ مديراً واحداً لكل ملف قاعدة بيانات."""
+    db_path = str(tmp_path / "adapter.db")
+    first = get_db_manager(db_path)
+    assert isinstance(first, DatabaseManager)
+    assert get_db_manager(db_path) is first
+    assert get_db_manager(str(tmp_path / "other.db")) is not first
+    get_db_manager.clear()
+    assert get_db_manager(db_path) is not first
+
+
+def test_load_css_injects_style_tag(tmp_path, mocker):
+    """🧪 يختبر حقن ملف التنسيق في الصفحة وتجاهل الملف غير الموجود."""
+    markdown = mocker.patch("streamlit_adapter.st.markdown")
+    css_file = tmp_path / "style.css"
+    css_file.write_text("h1 { color: red; }", encoding="utf-8")
+
+    load_css(str(css_file))
+    load_css(str(tmp_path / "missing.css"))
+
+    markdown.assert_called_once_with(
+        "<style>h1 { color: red; }</style>", unsafe_allow_html=True
+    )
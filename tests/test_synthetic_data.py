@@ -0,0 +1,52 @@
+import sys
+import os
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cbe_scraper import parse_cbe_html
+from db_manager import DatabaseManager
+from synthetic_data import generate_history, main, render_results_page
+import constants as C
+
+
+def test_generated_history_is_realistic_and_unique():
+    """🧪 يختبر أن التاريخ الصناعي بالحجم المطلوب وبلا تكرار وبعوائد معقولة."""
+    history = generate_history(1001, seed=3)
+
+    assert len(history) == 1001
+    assert not history.duplicated(
+        subset=[C.TENOR_COLUMN_NAME, C.SESSION_DATE_COLUMN_NAME]
+    ).any()
+    assert set(history[C.TENOR_COLUMN_NAME]) == {91, 182, 273, 364}
+    assert history[C.YIELD_COLUMN_NAME].between(10, 40).all()
+    assert history[C.SESSION_DATE_COLUMN_NAME].iloc[-1] == "04/12/2025"
+    assert generate_history(1001, seed=3).equals(history)
+
+    # عطاءات الأحد لأجلي 91 و273 يوماً، والخميس لأجلي 182 و364 يوماً
+    weekday = pd.to_datetime(
+        history[C.SESSION_DATE_COLUMN_NAME], format="%d/%m/%Y"
+    ).dt.dayofweek
+    assert set(history.loc[weekday == 6, C.TENOR_COLUMN_NAME]) == {91, 273}
+    assert set(history.loc[weekday == 3, C.TENOR_COLUMN_NAME]) == {182, 364}
+    assert weekday.isin([3, 6]).all()
+
+
+def test_rendered_page_parses_back_to_latest_session():
+    """🧪 يختبر أن صفحة النتائج الصناعية تُحلل إلى آخر عوائد التاريخ."""
+    history = generate_history(40)
+    parsed = parse_cbe_html(render_results_page(history), backend="lxml")
+
+    latest = history.drop_duplicates(subset=C.TENOR_COLUMN_NAME, keep="last")
+    assert sorted(parsed[C.YIELD_COLUMN_NAME]) == sorted(latest[C.YIELD_COLUMN_NAME])
+
+
+def test_cli_writes_synthetic_database(tmp_path):
+    """🧪 يختبر أن الأمر ينشئ قاعدة بيانات صناعية قابلة للتحميل."""
+    db_path = str(tmp_path / "synthetic.db")
+    main(["--rows", "500", "--db", db_path])
+
+    db = DatabaseManager(db_path)
+    assert len(db.load_all_historical_data()) == 500
+    latest_df, _ = db.load_latest_data()
+    assert len(latest_df) == 4
@@ -0,0 +1,158 @@
+import sys
+import os
+import warnings
+import numpy as np
+import pytest
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from calculations import analyze_secondary_sale, calculate_primary_yield
+from yield_curve import (
+    MAX_CURVE_DAYS,
+    YieldCurve,
+    auto_price_secondary_sales,
+    curve_for_session,
+    latest_curve,
+)
+import constants as C
+
+TENORS = [91, 182, 273, 364]
+YIELDS = [26.478, 26.428, 26.042, 25.443]
+
+
+@pytest.fixture
+def latest_df():
+    return pd.DataFrame(
+        {
+            C.TENOR_COLUMN_NAME: TENORS,
+            C.YIELD_COLUMN_NAME: YIELDS,
+            C.SESSION_DATE_COLUMN_NAME: ["30/11/2025", "04/12/2025"] * 2,
+        }
+    )
+
+
+@pytest.mark.parametrize("method", ["linear", "monotone_cubic"])
+def test_curve_passes_through_auction_yields_and_is_flat_outside(method):
+    """🧪 يختبر مرور المنحنى بعوائد العطاءات وثباته خارج نطاق الآجال."""
+    curve = YieldCurve(TENORS, YIELDS, method)
+    np.testing.assert_allclose(curve.yields_for(np.array(TENORS)), YIELDS)
+    assert curve.yields_for(1) == pytest.approx(YIELDS[0])
+    assert curve.yields_for(MAX_CURVE_DAYS + 100) == pytest.approx(YIELDS[-1])
+
+
+def test_linear_curve_matches_numpy_interp():
+    """🧪 يختبر أن الاستيفاء الخطي يطابق np.interp لكل يوم."""
+    curve = YieldCurve(TENORS, YIELDS, "linear")
+    days = np.arange(1, MAX_CURVE_DAYS + 1)
+    np.testing.assert_allclose(curve.yields_for(days), np.interp(days, TENORS, YIELDS))
+
+
+def test_monotone_cubic_does_not_overshoot():
+    """🧪 يختبر أن المنحنى التكعيبي الرتيب لا يتجاوز العوائد المحيطة بكل فترة."""
+    curve = YieldCurve(TENORS, YIELDS, "monotone_cubic")
+    for left, right in zip(range(len(TENORS) - 1), range(1, len(TENORS))):
+        days = np.arange(TENORS[left], TENORS[right] + 1)
+        values = curve.yields_for(days)
+        low, high = sorted((YIELDS[left], YIELDS[right]))
+        assert values.min() >= low - 1e-9 and values.max() <= high + 1e-9
+        assert np.all(np.diff(values) <= 1e-12)  # المنحنى هنا متناقص
+
+
+def test_table_lookup_matches_direct_evaluation():
+    """🧪 يختبر تطابق الجدول المحسوب مسبقاً مع حساب المنحنى مباشرة."""
+    curve = YieldCurve(TENORS, YIELDS)
+    days = np.arange(0, MAX_CURVE_DAYS + 1)
+    np.testing.assert_allclose(
+        curve.yields_for(days), curve.yields_for(days.astype(float))
+    )
+
+
+def test_invalid_curves_are_rejected():
+    """🧪 يختبر رفض طريقة استيفاء غير معروفة أو منحنى بلا بيانات."""
+    with pytest.raises(ValueError):
+        YieldCurve(TENORS, YIELDS, "spline")
+    with pytest.raises(ValueError):
+        YieldCurve([np.nan], [np.nan])
+
+
+def test_price_bills_prices_odd_dated_bills_at_curve_yield():
+    """🧪 يختبر تسعير أذون بآجال غير قياسية بعائد المنحنى."""
+    curve = YieldCurve(TENORS, YIELDS)
+    results = curve.price_bills(100000.0, np.array([45, 91, 200]), 20.0)
+
+    assert results["is_valid"].all()
+    expected = calculate_primary_yield(100000.0, YIELDS[1], 182, 20.0)
+    single = curve.price_bills(100000.0, 182, 20.0)
+    assert single["purchase_price"].iloc[0] == pytest.approx(expected["purchase_price"])
+    assert results["market_yield"].iloc[1] == pytest.approx(YIELDS[0])
+
+
+def test_secondary_sales_with_missing_days_are_invalid():
+    """🧪 يختبر أن الأجل أو أيام الاحتفاظ المفقودة (NaN) تُعلّم كصفوف غير صالحة دون تحذيرات."""
+    curve = YieldCurve([91, 182, 273, 364], [26.478, 26.428, 26.042, 25.443])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        results = curve.price_secondary_sales(
+            100000.0,
+            [29.0, 29.0, 29.0],
+            [364.0, np.nan, 182.0],
+            [60.0, 30.0, np.nan],
+            20.0,
+        )
+    assert results["is_valid"].tolist() == [True, False, False]
+    assert results["market_yield"].iloc[0] == pytest.approx(curve.yields_for(304))
+    assert results["market_yield"].iloc[1:].isna().all()
+
+
+def test_session_curves_are_cached(latest_df, mocker):
+    """🧪 يختبر بناء منحنى الجلسة مرة واحدة ثم إعادته من الذاكرة المؤقتة."""
+    first = curve_for_session(latest_df)
+    assert curve_for_session(latest_df.copy()) is first
+    assert curve_for_session(latest_df, "linear") is not first
+
+    changed = latest_df.assign(**{C.YIELD_COLUMN_NAME: np.array(YIELDS) + 1})
+    assert curve_for_session(changed) is not first
+
+    db_manager = mocker.Mock()
+    db_manager.load_latest_data.return_value = (latest_df, ("2025-12-04", None))
+    assert latest_curve(db_manager) is first
+
+
+def test_auto_priced_secondary_sales_use_curve_yield(latest_df, mocker):
+    """🧪 يختبر تسعير بيع قائمة أذون بعائد المنحنى للأيام المتبقية دفعة واحدة."""
+    holdings = pd.DataFrame(
+        {
+            C.FACE_VALUE_COLUMN_NAME: [100000.0, 200000.0, 100000.0],
+            C.PURCHASE_YIELD_COLUMN_NAME: [29.0, 27.0, 26.0],
+            C.TENOR_COLUMN_NAME: [364, 182, 91],
+            C.HOLDING_DAYS_COLUMN_NAME: [60, 100, 91],
+        },
+        index=[10, 11, 12],
+    )
+    db_manager = mocker.Mock()
+    db_manager.load_latest_data.return_value = (latest_df, ("2025-12-04", None))
+
+    results = auto_price_secondary_sales(db_manager, holdings, tax_rate=20.0)
+
+    curve = curve_for_session(latest_df)
+    assert list(results.index) == [10, 11, 12]
+    assert results["is_valid"].tolist() == [True, True, False]
+    assert np.isnan(results.loc[12, "market_yield"])
+    for holding_id in [10, 11]:
+        row = holdings.loc[holding_id]
+        remaining = int(row[C.TENOR_COLUMN_NAME] - row[C.HOLDING_DAYS_COLUMN_NAME])
+        assert results.loc[holding_id, "market_yield"] == pytest.approx(
+            curve.yields_for(remaining)
+        )
+        scalar = analyze_secondary_sale(
+            row[C.FACE_VALUE_COLUMN_NAME],
+            row[C.PURCHASE_YIELD_COLUMN_NAME],
+            int(row[C.TENOR_COLUMN_NAME]),
+            int(row[C.HOLDING_DAYS_COLUMN_NAME]),
+            curve.yields_for(remaining),
+            20.0,
+        )
+        assert results.loc[holding_id, "net_profit"] == pytest.approx(
+            scalar["net_profit"]
+        )
@@ -1,7 +1,6 @@
 import logging
 import os
 import sys
-import sentry_sdk
 
 # --- بداية الإصلاح ---
 # إضافة المسار الحالي للسماح بالاستيراد المحلي
@@ -9,7 +8,7 @@ sys.path.append(os.getcwd())
 
 # استيراد وحدات المشروع بعد تعديل المسار
 # تم حذف `load_dotenv` لأنها غير مستخدمة هنا
-from cbe_scraper import fetch_data_from_cbe  # noqa: E402
+from cbe_scraper import fetch_data_from_cbe, FetchStateCache  # noqa: E402
 from db_manager import get_db_manager  # noqa: E402
 from utils import setup_logging  # noqa: E402
 
@@ -23,6 +22,8 @@ def run_update():
     """
     sentry_dsn = os.environ.get("SENTRY_DSN")
     if sentry_dsn:
+        import sentry_sdk
+
         sentry_sdk.init(
             dsn=sentry_dsn,
             traces_sample_rate=1.0,
@@ -35,13 +36,17 @@ def run_update():
     logger.info("=" * 50)
     logger.info("Starting scheduled data update process...")
 
+    db_manager = None
     try:
         db_manager = get_db_manager()
 
         logger.info("Fetching latest data from the Central Bank of Egypt website...")
 
         # We pass the db_manager to the scraper to handle the comparison internally
-        new_df = fetch_data_from_cbe(db_manager=db_manager, status_callback=None)
+        # حالة الجلب السابقة تسمح بتخطي الصفحات التي لم تتغير قبل التحليل
+        new_df = fetch_data_from_cbe(
+            db_manager=db_manager, status_callback=None, fetch_state=FetchStateCache()
+        )
 
         if new_df is None or new_df.empty:
             # The scraper now handles the logging for "already up-to-date" cases
@@ -63,6 +68,9 @@ def run_update():
             sentry_sdk.capture_exception(e)
         sys.exit(1)
     finally:
+        # إغلاق الاتصالات يدمج سجل WAL في ملف قاعدة البيانات قبل رفعه
+        if db_manager is not None:
+            db_manager.close()
         logger.info("=" * 50)
 
 
@@ -1,5 +1,3 @@
-import streamlit as st
-import os
 import logging
 
 # --- بداية الإصلاح ---
@@ -18,15 +16,6 @@ def prepare_arabic_text(text: str) -> str:
         return ""
 
 
-def load_css(file_path: str) -> None:
-    if os.path.exists(file_path):
-        logger.debug(f"Loading CSS from {file_path}")
-        with open(file_path, encoding="utf-8") as f:
-            st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
-    else:
-        logger.warning(f"CSS file not found at path: {file_path}")
-
-
 def setup_logging(level: int = logging.INFO) -> None:
     if not logging.getLogger().handlers:
         logging.basicConfig(
@@ -0,0 +1,263 @@
+import logging
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Tuple
+
+import numpy as np
+import pandas as pd
+
+import constants as C
+from calculations import analyze_secondary_sale_batch, calculate_primary_yield_batch
+
+if TYPE_CHECKING:
+    from db_manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+INTERPOLATION_METHODS = ("linear", "monotone_cubic")
+
+# أطول مدة يمكن تسعيرها بالأيام (آجال الأذون حتى سنة)
+MAX_CURVE_DAYS = 364
+
+
+def _monotone_slopes(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Knot slopes of the Fritsch-Carlson monotone cubic (PCHIP): the curve
+    never overshoots between auction yields, so no spurious humps appear.
+    """
+    h = np.diff(x)
+    delta = np.diff(y) / h
+    if len(x) == 2:
+        return np.array([delta[0], delta[0]])
+
+    slopes = np.zeros_like(y)
+    w1 = 2 * h[1:] + h[:-1]
+    w2 = h[1:] + 2 * h[:-1]
+    same_sign = delta[:-1] * delta[1:] > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        harmonic = (w1 + w2) / (w1 / delta[:-1] + w2 / delta[1:])
+    slopes[1:-1] = np.where(same_sign, harmonic, 0.0)
+
+    def edge(h0, h1, d0, d1):
+        slope = ((2 * h0 + h1) * d0 - h0 * d1) / (h0 + h1)
+        if np.sign(slope) != np.sign(d0):
+            return 0.0
+        if np.sign(d0) != np.sign(d1) and abs(slope) > 3 * abs(d0):
+            return 3 * d0
+        return slope
+
+    slopes[0] = edge(h[0], h[1], delta[0], delta[1])
+    slopes[-1] = edge(h[-1], h[-2], delta[-1], delta[-2])
+    return slopes
+
+
+class YieldCurve:
+    """
+    A yield curve over day counts, interpolated between auction tenors and
+    flat beyond the shortest and longest ones.
+
+    The yields for every whole day from 0 to `MAX_CURVE_DAYS` are computed
+    once when the curve is built, so pricing any number of bills is a single
+    array lookup.
+    """
+
+    def __init__(
+        self,
+        tenors: Any,
+        yields: Any,
+        method: str = C.CURVE_INTERPOLATION_METHOD,
+    ):
+        if method not in INTERPOLATION_METHODS:
+            raise ValueError(
+                f"Unknown interpolation method '{method}'; "
+                f"expected one of {INTERPOLATION_METHODS}."
+            )
+        tenors = np.asarray(tenors, dtype=np.float64)
+        yields = np.asarray(yields, dtype=np.float64)
+        known = ~(np.isnan(tenors) | np.isnan(yields))
+        tenors, yields = tenors[known], yields[known]
+        if tenors.size == 0:
+            raise ValueError("A yield curve needs at least one tenor.")
+        # عند تكرار المدة يُعتمد آخر عائد لها
+        tenors, last = np.unique(tenors[::-1], return_index=True)
+        yields = yields[::-1][last]
+
+        self.method = method
+        self.tenors = tenors
+        self.yields = yields
+        if tenors.size > 1 and method == "monotone_cubic":
+            self._slopes = _monotone_slopes(tenors, yields)
+        else:
+            self._slopes = None
+        self._table = self._evaluate(np.arange(MAX_CURVE_DAYS + 1, dtype=np.float64))
+        # المنحنيات مشتركة عبر الذاكرة المؤقتة، لذلك تُجعل للقراءة فقط
+        for array in (self.tenors, self.yields, self._table):
+            array.flags.writeable = False
+
+    @classmethod
+    def from_frame(
+        cls, df: pd.DataFrame, method: str = C.CURVE_INTERPOLATION_METHOD
+    ) -> "YieldCurve":
+        """Builds a curve from tenor/yield rows such as `load_latest_data`."""
+        return cls(
+            df[C.TENOR_COLUMN_NAME].to_numpy(),
+            df[C.YIELD_COLUMN_NAME].to_numpy(),
+            method,
+        )
+
+    def _evaluate(self, days: np.ndarray) -> np.ndarray:
+        x, y = self.tenors, self.yields
+        if self._slopes is None:
+            return np.interp(days, x, y)
+
+        clipped = np.clip(days, x[0], x[-1])
+        k = np.clip(np.searchsorted(x, clipped, side="right") - 1, 0, x.size - 2)
+        h = x[k + 1] - x[k]
+        t = (clipped - x[k]) / h
+        t2, t3 = t * t, t * t * t
+        return (
+            (2 * t3 - 3 * t2 + 1) * y[k]
+            + (t3 - 2 * t2 + t) * h * self._slopes[k]
+            + (-2 * t3 + 3 * t2) * y[k + 1]
+            + (t3 - t2) * h * self._slopes[k + 1]
+        )
+
+    def yields_for(self, days: Any) -> Any:
+        """
+        Annual yield (%) for each day count. Whole days are read from the
+        precomputed table; fractional days are interpolated directly.
+
+        Returns:
+            A float for scalar input, otherwise an array shaped like `days`.
+        """
+        days_array = np.asarray(days)
+        if np.issubdtype(days_array.dtype, np.integer):
+            result = self._table[np.clip(days_array, 0, MAX_CURVE_DAYS)]
+        else:
+            result = self._evaluate(days_array.astype(np.float64))
+        return float(result) if np.ndim(result) == 0 else result
+
+    __call__ = yields_for
+
+    def price_bills(self, face_value: Any, days: Any, tax_rate: Any) -> pd.DataFrame:
+        """
+        Prices bills of any day count at the curve yield, returning the
+        columns of `calculate_primary_yield_batch` plus `market_yield`.
+        """
+        market_yield = self.yields_for(np.asarray(days))
+        results = calculate_primary_yield_batch(
+            face_value, market_yield, days, tax_rate
+        )
+        shape = np.broadcast_shapes(
+            np.shape(face_value), np.shape(days), np.shape(tax_rate)
+        )
+        results.insert(0, "market_yield", np.broadcast_to(market_yield, shape).ravel())
+        return results
+
+    def price_secondary_sales(
+        self,
+        face_value: Any,
+        original_yield: Any,
+        original_tenor: Any,
+        holding_days: Any,
+        tax_rate: Any,
+    ) -> pd.DataFrame:
+        """
+        Evaluates selling each holding today, taking the buyer's yield from
+        the curve at the holding's remaining days instead of a hand-entered
+        market yield. Returns the columns of `analyze_secondary_sale_batch`
+        plus `market_yield`.
+        """
+        remaining_days = np.broadcast_arrays(
+            np.asarray(original_tenor), np.asarray(holding_days)
+        )
+        remaining_days = remaining_days[0] - remaining_days[1]
+        # الخلايا الفارغة أو غير الرقمية تصل كـ NaN؛ تُستبدل قبل التحويل لعدد صحيح
+        # ويعلّمها `is_valid` كصفوف غير صالحة
+        remaining_days = np.where(
+            np.isfinite(remaining_days), remaining_days, 0
+        ).astype(np.int64)
+        market_yield = self.yields_for(remaining_days)
+        results = analyze_secondary_sale_batch(
+            face_value,
+            original_yield,
+            original_tenor,
+            holding_days,
+            market_yield,
+            tax_rate,
+        )
+        shape = np.broadcast_shapes(
+            np.shape(face_value),
+            np.shape(original_yield),
+            np.shape(remaining_days),
+            np.shape(tax_rate),
+        )
+        market_yield = np.broadcast_to(market_yield, shape).ravel()
+        results.insert(
+            0, "market_yield", np.where(results["is_valid"], market_yield, np.nan)
+        )
+        return results
+
+
+@lru_cache(maxsize=C.CURVE_CACHE_SIZE)
+def _cached_curve(
+    session_key: str, tenors: Tuple[float, ...], yields: Tuple[float, ...], method: str
+) -> YieldCurve:
+    logger.debug(f"Building {method} yield curve for session {session_key}.")
+    return YieldCurve(tenors, yields, method)
+
+
+def curve_for_session(
+    df: pd.DataFrame, method: str = C.CURVE_INTERPOLATION_METHOD
+) -> YieldCurve:
+    """
+    Returns the curve of a session's tenor/yield rows, built once and then
+    served from a process-wide cache. The cache key is the session date
+    together with the yields, so a corrected auction never hits a stale
+    curve.
+    """
+    if df.empty:
+        raise ValueError("Cannot build a yield curve without any auction rows.")
+    sessions = (
+        df[C.SESSION_DATE_COLUMN_NAME] if C.SESSION_DATE_COLUMN_NAME in df else ()
+    )
+    session_key = "|".join(sorted(set(map(str, sessions))))
+    return _cached_curve(
+        session_key,
+        tuple(df[C.TENOR_COLUMN_NAME].astype(float)),
+        tuple(df[C.YIELD_COLUMN_NAME].astype(float)),
+        method,
+    )
+
+
+def latest_curve(
+    db_manager: "DatabaseManager", method: str = C.CURVE_INTERPOLATION_METHOD
+) -> YieldCurve:
+    """The curve of the latest stored auctions (see `load_latest_data`)."""
+    df, _ = db_manager.load_latest_data()
+    return curve_for_session(df, method)
+
+
+def auto_price_secondary_sales(
+    db_manager: "DatabaseManager",
+    holdings: pd.DataFrame,
+    tax_rate: float = C.DEFAULT_TAX_RATE_PERCENT,
+    method: str = C.CURVE_INTERPOLATION_METHOD,
+) -> pd.DataFrame:
+    """
+    Prices the sale of a list of holdings against the latest stored auction
+    curve in one batched call.
+
+    Args:
+        holdings: Rows with `face_value`, `purchase_yield`, `tenor` and
+            `holding_days` columns.
+
+    Returns:
+        The `price_secondary_sales` results, indexed like `holdings`.
+    """
+    return latest_curve(db_manager, method).price_secondary_sales(
+        holdings[C.FACE_VALUE_COLUMN_NAME],
+        holdings[C.PURCHASE_YIELD_COLUMN_NAME],
+        holdings[C.TENOR_COLUMN_NAME],
+        holdings[C.HOLDING_DAYS_COLUMN_NAME],
+        tax_rate,
+    )